@@ -7,7 +7,7 @@ from .users import (
     UserDetailView, AdminLoginView, OAuthView, UserDataSummaryView, UserAdminUpdateView, InActiveUsersView, SendInactiveUserMailReminder)
 from .deployments import DeploymentsView
 from .clusters import (
-    ClustersView, ClusterDetailView, ClusterNamespacesView,
+    ClustersView, ClusterClientsView, ClusterStatusReconcilerView, ClusterHealthView, ClusterDetailView, ClusterNamespacesView,
     ClusterNamespaceDetailView, ClusterNodesView, ClusterNodeDetailView,
     ClusterDeploymentsView, ClusterDeploymentDetailView, ClusterPvcsView,
     ClusterPvcDetailView, ClusterPVsView, ClusterPVDetailView,
@@ -22,7 +22,7 @@ from .transactions import TransactionRecordView, TransactionRecordDetailView, Cr
 from .project import (
     ProjectsView, ProjectDetailView, UserProjectsView, ProjectGetCostsView, ClusterProjectsView, ProjectPinView,
     ProjectDisableView, ProjectEnableView)
-from .app import (AppsView, ProjectAppsView, AppDetailView, AppLogsView, MLProjectAppsView,
+from .app import (AppsView, ProjectAppsView, AppDetailView, AppLogsView, AppLogsStreamView, MLProjectAppsView,
                   AppRevertView, AppReviseView, AppRedeployView, AppDisableView, AppEnableView, AppDockerWebhookListenerView)
 from .registry import RegistriesView
 from .billing_invoice import (
@@ -32,3 +32,4 @@ from .project_users import ProjectUsersView, ProjectUsersTransferView, ProjectUs
 from .activity_feed import ActivityFeedView
 from .tags import TagsView, TagsDetailView, TagFollowingView
 from .generic_search import GenericSearchView
+from .operations import OperationDetailView
@@ -5,34 +5,83 @@ from urllib.parse import urlsplit
 
 import requests
 from app.helpers.activity_logger import log_activity
+from app.helpers.search import ranked_search
+from app.helpers.platform_stats import get_platform_stats
+from app.helpers.app_discovery import app_label_selector, list_app_pods, list_app_replica_sets
 from app.schemas.app import AppDeploySchema, MLAppDeploySchema
 from app.schemas.cluster import ClusterDetailSchema, ClusterSchema
 from app.schemas.project import ProjectMiniListSchema, ProjectSchema
-from flask import current_app
+from flask import Response, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
 from flask_restful import Resource, request
 from kubernetes import client
 from types import SimpleNamespace
 from app.models.app import App
 from app.models.project import Project
-from app.helpers.kube import (create_kube_clients, create_pvc, delete_cluster_app,
-                              disable_user_app, enable_user_app, sort_apps_for_deployment, update_app_env_vars)
+from app.helpers.kube import (get_kube_clients, create_pvc, delete_cluster_app,
+                              disable_user_app, enable_user_app, sort_apps_for_deployment,
+                              get_app_deployments, get_available_condition)
 from app.schemas import AppSchema, PodsLogsSchema, AppGraphSchema
 from app.helpers.admin import is_admin, is_authorised_project_user, is_owner_or_admin
 from app.helpers.decorators import admin_required
 from app.helpers.decorators import admin_required
-from app.helpers.kube import create_kube_clients, delete_cluster_app, deploy_user_app, check_kube_error_code
+from app.helpers.kube import get_kube_clients, delete_cluster_app, deploy_user_app, check_kube_error_code
+from app.helpers.kube_patch import (add_ingress_rule, container_patch, env_vars_patch, patch_deployment,
+                                    patch_service, replace_list, retry_on_conflict, update_ingress_rules)
+from app.helpers.pod_logs import (describe_failed_pod, fetch_pod_logs, follow_pod_logs,
+                                  LogFollowerLimiter, since_seconds_for, stream_pod_logs)
+from app.helpers.prometheus import prometheus_query
+from app.helpers.redis_client import get_redis
 from app.helpers.url import get_app_subdomain
 from app.models.app import App
 from app.models.app_state import AppState
 from app.models.user import User
 from app.models.clusters import Cluster
 from app.models.project import Project
-from app.helpers.app_status_updater import update_or_create_app_state
+from app.helpers.app_status_updater import app_state_status, update_or_create_app_state
 from app.models import db
 from app.helpers.crane_app_logger import logger
-from app.helpers.pagination import paginate
+from app.helpers.pagination import paginate, paginate_query
 from app.helpers.dockerhub_images import docker_image_checker
+from app.helpers.deployment_graph import build_deployment_graph
+from app.helpers.deploy_credentials import stash_credentials
+from app.models.operation import Operation
+from app.schemas import OperationSchema
+from app.tasks import deploy_apps
+
+
+def queue_deployment(operation_type, project, user_id, app_data=None,
+                     apps_data=None, app_id=None):
+    """
+    record an operation and leave the deployment to a celery worker, the
+    client polls the operation for its progress. Registry credentials
+    don't travel with the task, they are stashed encrypted for the worker.
+    """
+    operation = Operation(
+        operation_type=operation_type,
+        status=Operation.PENDING,
+        user_id=user_id,
+        project_id=project.id,
+        steps=[]
+    )
+    if not operation.save():
+        return dict(status='fail', message='Internal Server Error'), 500
+
+    try:
+        task_kwargs = dict(app_id=app_id)
+        if app_data is not None:
+            task_kwargs['app_data'] = stash_credentials(operation.id, [app_data])[0]
+        if apps_data is not None:
+            task_kwargs['apps_data'] = stash_credentials(operation.id, apps_data)
+        deploy_apps.delay(str(operation.id), str(project.id), str(user_id), **task_kwargs)
+    except Exception:
+        logger.exception('Exception occurred')
+        operation.set_status(
+            Operation.FAILED, message='deployment could not be queued')
+        return dict(status='fail', message='Deployment could not be queued, try again later'), 503
+
+    operation_data, _ = OperationSchema().dump(operation)
+    return dict(status='success', data=dict(operation=operation_data)), 202
 
 
 class AppsView(Resource):
@@ -88,30 +137,8 @@ class AppsView(Resource):
                          a_cluster_id=project.cluster_id)
             return dict(status='fail', message=f'App {app_name} already exists'), 409
 
-        user = User.get_by_id(get_jwt_identity())
-
-        kube_host = cluster.host
-        kube_token = cluster.token
-
-        kube_client = create_kube_clients(kube_host, kube_token)
-        service_host = urlsplit(kube_host).hostname
-
-        new_app = deploy_user_app(
-            kube_client=kube_client, project=project, user=user, app_data=validated_app_data)
-
-        if type(new_app) == SimpleNamespace:
-            status_code = new_app.status_code if new_app.status_code else 500
-            return dict(status='fail', message=new_app.message), status_code
-
-        new_app_data, _ = app_schema.dump(new_app)
-        log_activity('App', status='Success',
-                     operation='Create',
-                     description='Deployed app Successfully',
-                     a_project=project,
-                     a_cluster_id=project.cluster_id,
-                     a_app=new_app)
-
-        return dict(status='success', data=dict(app=new_app_data)), 201
+        return queue_deployment('deploy_app', project, get_jwt_identity(),
+                                app_data=validated_app_data)
 
     @admin_required
     def get(self):
@@ -138,10 +165,11 @@ class AppsView(Resource):
         apps_schema = AppSchema(many=True)
 
         # since it is a one to one
+        app_stats = get_platform_stats('apps')
         metadata = {
-            'disabled': App.query.filter_by(disabled=True).count(),
-            'is_notebook': App.query.filter_by(is_notebook=True).count(),
-            'total_apps': App.query.count(),
+            'disabled': app_stats['disabled'],
+            'is_notebook': app_stats['is_notebook'],
+            'total_apps': app_stats['total'],
             'failing_apps': AppState.query.filter_by(status="failed").count(),
             'running_apps': AppState.query.filter_by(status="running").count(),
         }
@@ -154,19 +182,17 @@ class AppsView(Resource):
             if is_notebook is not None:
                 query = query.filter_by(is_notebook=is_notebook)
 
-            paginated_apps = query.paginate(
-                page=page, per_page=per_page, error_out=False)
-
-            pagination = {
-                'total': paginated_apps.total,
-                'pages': paginated_apps.pages,
-                'page': paginated_apps.page,
-                'per_page': paginated_apps.per_page,
-                'next': paginated_apps.next_num,
-                'prev': paginated_apps.prev_num
-            }
-            apps = paginated_apps.items
-            apps_data, errors = apps_schema.dumps(apps)
+            # ?cursor= opts into keyset paging, ?count=exact adds a total to it
+            count = request.args.get('count', None)
+            if disabled is None and is_notebook is None:
+                count = count or 'estimate'
+            try:
+                pagination, apps = paginate_query(
+                    query.order_by(App.date_created.desc()), App, page, per_page,
+                    cursor=request.args.get('cursor', None), count=count)
+            except ValueError as e:
+                return dict(status='fail', message=str(e)), 400
+            apps_data, errors = apps_schema.dump(apps)
 
             if errors:
                 return dict(status='fail', message=errors), 400
@@ -176,7 +202,7 @@ class AppsView(Resource):
                 data=dict(
                     metadata=metadata,
                     pagination=pagination,
-                    apps=json.loads(apps_data))
+                    apps=apps_data)
             ), 200
 
         validated_query_data, errors = filter_schema.load(graph_filter_data)
@@ -226,26 +252,22 @@ class ProjectAppsView(Resource):
             if not is_authorised_project_user(project, current_user_id, 'member'):
                 return dict(status='fail', message='Unauthorised'), 403
 
-        user = User.get_by_id(current_user_id)
-
         cluster = project.cluster
 
         if not cluster:
             return dict(status='fail', message="Invalid Cluster"), 500
 
-        kube_host = cluster.host
-        kube_token = cluster.token
-
-        kube_client = create_kube_clients(kube_host, kube_token)
         multi_app = validated_app_data.get('apps', [])
 
         if multi_app:
-            deployed_apps = sort_apps_for_deployment(
-                apps_data=multi_app, kube_client=kube_client,
-                project=project, user=user, app_schema=app_schema)
-            return dict(status='success', data=dict(
-                failed_apps=deployed_apps.failed_apps_data,
-                apps=deployed_apps.apps_data)), 201
+            # reject cycles and duplicates before anything is deployed
+            try:
+                build_deployment_graph(multi_app)
+            except ValueError as e:
+                return dict(status='fail', message=str(e)), 400
+
+            return queue_deployment('deploy_apps', project, current_user_id,
+                                    apps_data=multi_app)
         else:
             app_name = validated_app_data.get('name', None)
             app_image = validated_app_data.get('image', None)
@@ -267,46 +289,9 @@ class ProjectAppsView(Resource):
                     message=f'App with name {app_name} already exists'
                 ), 409
 
-            # check images existence
-            app_image = validated_app_data.get('image', None)
-            docker_server = validated_app_data.get(
-                'docker_server', 'docker.io')
-            docker_password = validated_app_data.get('docker_password', None)
-            # should be a docker hub image
-            if 'gcr' not in docker_server:
-                validate_docker_image = docker_image_checker(
-                    app_image, docker_password, project)
-                if validate_docker_image != True:
-                    return dict(status='fail', message=validate_docker_image), 404
-
-            # check images existence
-            app_image = validated_app_data.get('image', None)
-            docker_server = validated_app_data.get(
-                'docker_server', 'docker.io')
-            docker_password = validated_app_data.get('docker_password', None)
-            # should be a docker hub image
-            if 'gcr' not in docker_server:
-                validate_docker_image = docker_image_checker(
-                    app_image, docker_password, project)
-                if validate_docker_image != True:
-                    return dict(status='fail', message=validate_docker_image), 404
-
-            new_app = deploy_user_app(
-                kube_client=kube_client, project=project, user=user, app_data=validated_app_data)
-
-            if type(new_app) == SimpleNamespace:
-                status_code = new_app.status_code if new_app.status_code else 500
-                return dict(status='fail', message=new_app.message), status_code
-
-            new_app_data, _ = app_schema.dump(new_app)
-            log_activity('App', status='Success',
-                         operation='Create',
-                         description='Deployed app Successfully',
-                         a_project=project,
-                         a_cluster_id=project.cluster_id,
-                         a_app=new_app)
-
-            return dict(status='success', data=dict(app=new_app_data)), 201
+            # the image check runs as the first step of the deployment
+            return queue_deployment('deploy_app', project, current_user_id,
+                                    app_data=validated_app_data)
 
     @jwt_required
     def get(self, project_id):
@@ -334,68 +319,49 @@ class ProjectAppsView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {project.cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             if (keywords == ''):
-                paginated = App.find_all(
-                    project_id=project_id, paginate=True, page=page, per_page=per_page)
+                try:
+                    paginated = App.find_all(
+                        project_id=project_id, paginate=True, page=page, per_page=per_page,
+                        cursor=request.args.get('cursor', None),
+                        count=request.args.get('count', None))
+                except ValueError as e:
+                    return dict(status='fail', message=str(e)), 400
                 pagination = paginated.pagination
                 apps = paginated.items
-                apps_data, errors = app_schema.dumps(apps)
+                apps_data, errors = app_schema.dump(apps)
 
             else:
-                paginated = App.query.filter(App.name.ilike('%'+keywords+'%'), App.project_id == project_id).order_by(
-                    App.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
-                pagination = {
-                    'total': paginated.total,
-                    'pages': paginated.pages,
-                    'page': paginated.page,
-                    'per_page': paginated.per_page,
-                    'next': paginated.next_num,
-                    'prev': paginated.prev_num
-                }
-                apps = paginated.items
-                apps_data, errors = app_schema.dumps(apps)
+                # ranked matches are paged by offset
+                pagination, apps = paginate_query(ranked_search(
+                    App.query.filter(App.project_id == project_id), App, keywords, App.name
+                ), App, page, per_page)
+                apps_data, errors = app_schema.dump(apps)
 
             # if errors:
             #     return dict(status='fail', message=errors), 500
 
-            apps_data_list = json.loads(apps_data)
-            for app in apps_data_list:
-                try:
-                    # Dont check status of disabled apps
-                    if app['disabled']:
-                        app['app_running_status'] = "disabled"
-                        continue
-                    app_status_object = \
-                        kube_client.appsv1_api.read_namespaced_deployment_status(
-                            app['alias'] + "-deployment", project.alias)
-                    app_deployment_status_conditions = app_status_object.status.conditions
-
-                    app_deployment_status = None
-                    if app_deployment_status_conditions:
-                        for deplyoment_status_condition in app_deployment_status_conditions:
-                            if deplyoment_status_condition.type == "Available":
-                                app_deployment_status = deplyoment_status_condition.status
-
-                except client.rest.ApiException:
-                    app_deployment_status = None
-
-                try:
-                    app_db_status_object = \
-                        kube_client.appsv1_api.read_namespaced_deployment_status(
-                            app['alias'] + "-postgres-db", project.alias)
-
-                    app_db_state_conditions = app_db_status_object.status.conditions
-
-                    for app_db_condition in app_db_state_conditions:
-                        if app_db_condition.type == "Available":
-                            app_db_status = app_db_condition.status
+            # Dont check status of disabled apps
+            enabled_aliases = [app['alias']
+                               for app in apps_data if not app['disabled']]
+            try:
+                app_deployments = get_app_deployments(
+                    kube_client, project.alias, enabled_aliases)
+            except client.rest.ApiException:
+                app_deployments = {}
+
+            for app in apps_data:
+                if app['disabled']:
+                    app['app_running_status'] = "disabled"
+                    continue
 
-                except client.rest.ApiException:
-                    app_db_status = None
+                deployments = app_deployments.get(app['alias'])
+                app_deployment_status = get_available_condition(
+                    deployments.deployment) if deployments else None
+                app_db_status = get_available_condition(
+                    deployments.db_deployment) if deployments else None
 
                 if app_deployment_status and not app_db_status:
                     if app_deployment_status == "True":
@@ -410,9 +376,9 @@ class ProjectAppsView(Resource):
                 else:
                     app['app_running_status'] = "unknown"
             if errors:
-                return dict(status='error', error=errors, data=dict(apps=apps_data_list)), 409
+                return dict(status='error', error=errors, data=dict(apps=apps_data)), 409
             return dict(status='success',
-                        data=dict(pagination=pagination, apps=apps_data_list)), 200
+                        data=dict(pagination=pagination, apps=apps_data)), 200
 
         except client.rest.ApiException as exc:
             return dict(status='fail', message=exc.reason), check_kube_error_code(exc.status)
@@ -477,13 +443,13 @@ class MLProjectAppsView(Resource):
             return dict(status='fail', message="Invalid Cluster"), 500
 
         validated_app_data['project_id'] = project_id
-        project_data, errors = project_schema.dumps(project)
-        cluster_data, errors = cluster_schema.dumps(cluster)
+        project_data, errors = project_schema.dump(project)
+        cluster_data, errors = cluster_schema.dump(cluster)
         data = dict(
             **validated_app_data,
-            project=json.loads(project_data),
+            project=project_data,
             # user=user
-            cluster=json.loads(cluster_data)
+            cluster=cluster_data
         )
 
         mlops_deploy_url = f"{current_app.config['MLOPS_API_URL']}/apps"
@@ -533,38 +499,42 @@ class AppDetailView(Resource):
                 return dict(status='fail', message='Unauthorised'), 403
 
             app_schema = AppSchema()
-            app_data, errors = app_schema.dumps(app)
+            app_list, errors = app_schema.dump(app)
             if errors:
                 return dict(status='fail', message=str(errors)), 500
 
-            app_list = json.loads(app_data)
-
             cluster = Cluster.get_by_id(project.cluster_id)
             if not cluster:
                 return dict(status='fail', message=f'Cluster with id {project.cluster_id} does not exist'), 404
 
-            kube_client = create_kube_clients(cluster.host, cluster.token)
+            kube_client = get_kube_clients(cluster)
             try:
-                app_status_object = kube_client.appsv1_api.read_namespaced_deployment_status(
-                    f"{app_list['alias']}-deployment", project.alias)
+                app_deployments = get_app_deployments(
+                    kube_client, project.alias, [app.alias])[app.alias]
             except client.rest.ApiException as exc:
-                if exc.status == 404:
-                    return dict(status='fail', data=dict(apps=app_list), message="Application does not exist on the cluster"), 200
                 return dict(status='fail', data=dict(apps=app_list), message=str(exc)), 500
+
+            app_status_object = app_deployments.deployment
+            if not app_status_object:
+                return dict(status='fail', data=dict(apps=app_list), message="Application does not exist on the cluster"), 200
             app_list.update(self.extract_app_details(app_status_object))
 
             app_list["pod_statuses"] = self.get_pod_statuses(
                 kube_client, project.alias, app_list['alias'])
 
             app_list["deployment_messages"] = [
-                condition.message for condition in app_status_object.status.conditions
+                condition.message for condition in app_status_object.status.conditions or []
                 if condition.type == "Available"
             ]
 
             app_list["app_running_status"] = self.get_app_running_status(
-                app, app_status_object, kube_client, project.alias)
+                app, app_status_object, app_deployments.db_deployment)
 
-            self.update_app_state(app_list)
+            try:
+                self.update_app_state(app_list)
+            except Exception:
+                # the state is also kept by the status reconciler
+                logger.exception(f'failed to update state of app {app_id}')
 
             return dict(status='success', data=dict(apps=app_list)), 200
 
@@ -588,7 +558,7 @@ class AppDetailView(Resource):
     def get_pod_statuses(kube_client, namespace, app_alias):
         try:
             pods = kube_client.kube.list_namespaced_pod(
-                namespace, label_selector=f"app={app_alias}")
+                namespace, label_selector=app_label_selector(app_alias))
         except Exception as e:
             current_app.logger.error(f"Error fetching pods: {str(e)}")
             return []
@@ -639,20 +609,12 @@ class AppDetailView(Resource):
         return pod_statuses
 
     @staticmethod
-    def get_app_running_status(app, app_status_object, kube_client, namespace):
+    def get_app_running_status(app, app_status_object, app_db_status_object=None):
         if app.disabled:
             return "disabled"
 
-        app_deployment_status = next(
-            (condition.status for condition in app_status_object.status.conditions if condition.type == "Available"), None)
-
-        try:
-            app_db_status_object = kube_client.appsv1_api.read_namespaced_deployment_status(
-                f"{app.alias}-postgres-db", namespace)
-            app_db_status = next(
-                (condition.status for condition in app_db_status_object.status.conditions if condition.type == "Available"), None)
-        except client.rest.ApiException:
-            app_db_status = None
+        app_deployment_status = get_available_condition(app_status_object)
+        app_db_status = get_available_condition(app_db_status_object)
 
         if app_deployment_status == "True" and (app_db_status is None or app_db_status == "True"):
             return "running"
@@ -668,8 +630,11 @@ class AppDetailView(Resource):
         reasons = [reason.get("failureReason")
                    for reason in app_list.get("pod_statuses", [])]
 
+        pods_running = any(pod.get("status") == "running"
+                           for pod in app_list.get("pod_statuses", []))
+
         update_or_create_app_state({
-            "status": app_list['app_running_status'],
+            "status": app_state_status(app_list['app_running_status'], pods_running),
             "app": app_list['id'],
             "failure_reason": ", ".join(filter(None, reasons)),
             "message": ", ".join(filter(None, messages)),
@@ -711,9 +676,7 @@ class AppDetailView(Resource):
                              a_app=app)
                 return dict(status='fail', message='Internal server error'), 500
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             # delete deployment and service for the app
             delete_cluster_app(kube_client, namespace, app)
@@ -804,36 +767,25 @@ class AppDetailView(Resource):
                              a_app=app)
                 return dict(status='fail', message='Internal server error'), 500
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             # Create a deployment object
             dep_name = f'{app.alias}-deployment'
 
-            cluster_deployment = kube_client.appsv1_api.read_namespaced_deployment(
-                name=dep_name,
-                namespace=namespace
-            )
+            # changes to the deployment, sent as one strategic merge patch
+            container = {}
+            pod_spec = {}
+            serialize = kube_client.api_client.sanitize_for_serialization
+
             if is_ai:
                 # create a PVC
                 pvc_name = f'{app.alias}-pvc'
                 volumes, volume_mount = create_pvc(
                     kube_client, pvc_name, namespace)
 
-                # Add the volume to the pod spec
-                if not cluster_deployment.spec.template.spec.volumes:
-                    cluster_deployment.spec.template.spec.volumes = []
-                    cluster_deployment.spec.template.spec.volumes.append(
-                        volumes[0])
-
-                # Add the volume mount to the container
-                if not cluster_deployment.spec.template.spec.containers[0].volume_mounts:
-                    cluster_deployment.spec.template.spec.containers[0].volume_mounts = [
-                    ]
-                cluster_deployment.spec.template.spec.containers[0].volume_mounts.append(
-                    volume_mount)
+                # volumes are merged by name and mounts by mount path
+                pod_spec['volumes'] = [serialize(volumes[0])]
+                container['volumeMounts'] = [serialize(volume_mount)]
 
             if app_image:
                 docker_server = validated_update_data.get(
@@ -900,12 +852,9 @@ class AppDetailView(Resource):
                         body=secret_body,
                         _preload_content=False)
 
-                    image_pull_secret = client.V1LocalObjectReference(
-                        name=app.alias)
-                    cluster_deployment.spec.template.spec.image_pull_secrets.append(
-                        image_pull_secret)
+                    pod_spec['imagePullSecrets'] = [dict(name=app.alias)]
 
-                cluster_deployment.spec.template.spec.containers[0].image = app_image
+                container['image'] = app_image
 
             user = User.get_by_id(current_user_id)
 
@@ -934,57 +883,32 @@ class AppDetailView(Resource):
                     )
                 )
 
-                ingress_list = kube_client.networking_api.list_namespaced_ingress(
-                    namespace=namespace).items
-                ingress = ingress_list[0]
-
-                ingress.spec.rules.append(new_ingress_rule)
-
-                kube_client.networking_api.patch_namespaced_ingress(
-                    name=ingress_name,
-                    namespace=namespace,
-                    body=ingress
-                )
+                add_ingress_rule(
+                    kube_client, ingress_name, namespace, new_ingress_rule)
                 validated_update_data['url'] = f'https://{custom_domain}'
                 validated_update_data['has_custom_domain'] = True
 
-            if replicas:
-                cluster_deployment.spec.replicas = replicas
-
             if app_port:
-                cluster_deployment.spec.template.spec.containers[0].ports[0].container_port = app_port
-                # get service
-                service_name = f'{app.alias}-service'
-                service = kube_client.kube.read_namespaced_service(
-                    name=service_name,
-                    namespace=namespace
-                )
-
-                if service:
-                    service.spec.ports[0].target_port = app_port
-                    kube_client.kube.replace_namespaced_service(
-                        name=service_name,
-                        namespace=namespace,
-                        body=service
-                    )
+                container['ports'] = replace_list([dict(containerPort=app_port)])
+                # point the service at the new port
+                patch_service(
+                    kube_client, f'{app.alias}-service', namespace,
+                    [{'op': 'replace', 'path': '/spec/ports/0/targetPort',
+                      'value': app_port}])
 
             if ("command" in validated_update_data and validated_update_data["command"] == ""):
-                cluster_deployment.spec.template.spec.containers[0].command = [
-                ]
+                container['command'] = []
             elif command is not None:
-                cluster_deployment.spec.template.spec.containers[0].command = command.split(
-                )
+                container['command'] = command.split()
 
             if env_vars or delete_env_vars:
-                update_app_env_vars(client, cluster_deployment,
-                                    env_vars, delete_env_vars)
+                container['env'] = env_vars_patch(env_vars, delete_env_vars)
 
             # Update the application
-            kube_client.appsv1_api.replace_namespaced_deployment(
-                name=dep_name,
-                namespace=namespace,
-                body=cluster_deployment
-            )
+            deployment_patch = container_patch(
+                app.alias, replicas=replicas or None, pod_spec=pod_spec, **container)
+            if deployment_patch:
+                patch_deployment(kube_client, dep_name, namespace, deployment_patch)
 
             # update the app in database
             updated_app = App.update(app, **validated_update_data)
@@ -1060,9 +984,10 @@ class AppRevisionsView(Resource):
                 if not is_authorised_project_user(project, current_user_id, 'member'):
                     return dict(status='fail', message='Unauthorised'), 403
 
-            app_data, errors = app_schema.dumps(app)
+            app_data, errors = app_schema.dump(app)
 
-            app_list = json.loads(app_data)
+            # app_data is returned untouched if the app isn't on the cluster
+            app_list = dict(app_data)
 
             cluster = Cluster.get_by_id(project.cluster_id)
 
@@ -1071,9 +996,7 @@ class AppRevisionsView(Resource):
                     status='fail',
                     message=f'cluster with id {project.cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             app_status_object = \
                 kube_client.appsv1_api.read_namespaced_deployment_status(
@@ -1084,8 +1007,8 @@ class AppRevisionsView(Resource):
                 'deployment.kubernetes.io/revision')
 
             # Get deployment version history
-            version_history = kube_client.appsv1_api.list_namespaced_replica_set(
-                project.alias, label_selector=f"app={app_list['alias']}")
+            version_history = list_app_replica_sets(
+                kube_client, project.alias, app_list['alias'])
 
             revisions = []
             for item in version_history.items:
@@ -1126,7 +1049,7 @@ class AppRevisionsView(Resource):
         except client.rest.ApiException as exc:
 
             if exc.status == 404:
-                return dict(status='fail', data=json.loads(app_data), message="Application does not exist on the cluster"), 404
+                return dict(status='fail', data=app_data, message="Application does not exist on the cluster"), 404
 
             return dict(status='fail', message=exc.reason), check_kube_error_code(exc.status)
 
@@ -1178,37 +1101,23 @@ class AppRevertView(Resource):
                 ), 409
 
             # Create kube client
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            ingress_list = kube_client.networking_api.list_namespaced_ingress(
-                namespace=namespace).items
+            kube_client = get_kube_clients(cluster)
 
             service_name = f'{app.alias}-service'
             ingress_name = f'{project.alias}-ingress'
-            newUrl = None
-            ingress = ingress_list[0]
-            routes_list = ingress.spec.rules
 
-            # Check if app subdomain is present in ingress list
-            for item in routes_list:
-                if item.host == app_sub_domain:
-                    newUrl = app_sub_domain
-
-            if not newUrl:
-                # Create a new ingress rule with app Alias
-                new_ingress_backend = client.V1IngressBackend(
-                    service=client.V1IngressServiceBackend(
-                        name=service_name,
-                        port=client.V1ServiceBackendPort(
-                            number=3000
-                        )
+            # Create a new ingress rule with app Alias
+            new_ingress_backend = client.V1IngressBackend(
+                service=client.V1IngressServiceBackend(
+                    name=service_name,
+                    port=client.V1ServiceBackendPort(
+                        number=3000
                     )
                 )
+            )
 
-                new_ingress_rule = client.V1IngressRule(
+            new_ingress_rule = kube_client.api_client.sanitize_for_serialization(
+                client.V1IngressRule(
                     host=app_sub_domain,
                     http=client.V1HTTPIngressRuleValue(
                         paths=[client.V1HTTPIngressPath(
@@ -1217,20 +1126,19 @@ class AppRevertView(Resource):
                             backend=new_ingress_backend
                         )]
                     )
-                )
+                ))
 
-                ingress.spec.rules.append(new_ingress_rule)
+            def revert_rules(rules):
+                # Remove custom domain from ingress list
+                rules = [item for item in rules
+                         if item.get('host') != custom_domain]
+                # Check if app subdomain is present in ingress list
+                if not any(item.get('host') == app_sub_domain for item in rules):
+                    rules.append(new_ingress_rule)
+                return rules
 
-            # Remove custom domain from ingress list
-            for item in routes_list:
-                if item.host == custom_domain:
-                    ingress.spec.rules.remove(item)
-
-            kube_client.networking_api.patch_namespaced_ingress(
-                name=ingress_name,
-                namespace=namespace,
-                body=ingress
-            )
+            update_ingress_rules(kube_client, ingress_name, namespace,
+                                 revert_rules, create=False)
 
             # Update the database with new url
             updated_app = App.update(
@@ -1299,77 +1207,81 @@ class AppReviseView(Resource):
                 return dict(status='fail', message='Internal server error'), 500
 
             # Create kube client
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             # Get the app deployment
             dep_name = f'{app.alias}-deployment'
-            deployment = kube_client.appsv1_api.read_namespaced_deployment(
-                name=dep_name,
-                namespace=namespace
-            )
-
-            if not deployment:
-                log_activity('App', status='Failed',
-                             operation='Update',
-                             description=f'App revision Failed, Internal Server Error No project found',
-                             a_project=project,
-                             a_cluster_id=project.cluster_id,
-                             a_app=app)
-                return dict(
-                    status='fail',
-                    message='Internal Server Error, No project found'
-                ), 500
-
-            associated_replica_sets = kube_client.appsv1_api.list_namespaced_replica_set(
-                namespace=namespace,
-                label_selector=f'''app={
-                    deployment.spec.template.metadata.labels["app"]}'''
-            )
 
-            template = None
+            def revise_deployment():
+                deployment = kube_client.appsv1_api.read_namespaced_deployment(
+                    name=dep_name,
+                    namespace=namespace
+                )
+                if not deployment:
+                    log_activity('App', status='Failed',
+                                 operation='Update',
+                                 description=f'App revision Failed, Internal Server Error No project found',
+                                 a_project=project,
+                                 a_cluster_id=project.cluster_id,
+                                 a_app=app)
+                    return dict(
+                        status='fail',
+                        message='Internal Server Error, No project found'
+                    ), 500
+
+                associated_replica_sets = list_app_replica_sets(
+                    kube_client, namespace, app.alias)
+
+                template = None
+
+                for item in associated_replica_sets.items:
+                    revision = item.metadata.annotations['deployment.kubernetes.io/revision']
+                    if int(item.metadata.creation_timestamp.timestamp()) == int(revision_id):
+                        template = item.spec.template
+
+                if not template:
+                    log_activity('App', status='Failed',
+                                 operation='Update',
+                                 description=f'''App revision Failed, Revision with id {
+                                     revision_id} not found''',
+                                 a_project=project,
+                                 a_cluster_id=project.cluster_id,
+                                 a_app=app)
+                    return dict(
+                        status='fail',
+                        message=f'Revision with id {revision_id} not found'
+                    ), 401
+
+                patch = [
+                    {
+                        # fails with a conflict if the deployment changed
+                        'op': 'replace',
+                        'path': '/metadata/resourceVersion',
+                        'value': deployment.metadata.resource_version
+                    },
+                    {
+                        'op': 'replace',
+                        'path': '/spec/template',
+                        'value': template
+                    },
+                    {
+                        'op': 'replace',
+                        'path': '/metadata/annotations',
+                        'value': {
+                            'deployment.kubernetes.io/revision': revision,
+                            **deployment.metadata.annotations
+                        }
+                    }
+                ]
 
-            for item in associated_replica_sets.items:
-                revision = item.metadata.annotations['deployment.kubernetes.io/revision']
-                if int(item.metadata.creation_timestamp.timestamp()) == int(revision_id):
-                    template = item.spec.template
+                return patch_deployment(kube_client, dep_name, namespace, patch)
 
-            if not template:
-                log_activity('App', status='Failed',
-                             operation='Update',
-                             description=f'''App revision Failed, Revision with id {
-                                 revision_id} not found''',
-                             a_project=project,
-                             a_cluster_id=project.cluster_id,
-                             a_app=app)
-                return dict(
-                    status='fail',
-                    message=f'Revision with id {revision_id} not found'
-                ), 401
-
-            patch = [
-                {
-                    'op': 'replace',
-                    'path': '/spec/template',
-                    'value': template
-                },
-                {
-                    'op': 'replace',
-                    'path': '/metadata/annotations',
-                    'value': {
-                        'deployment.kubernetes.io/revision': revision,
-                        **deployment.metadata.annotations
-                    }
-                }
-            ]
+            # a revision looked up from a deployment that has changed since
+            # is looked up again
+            result = retry_on_conflict(revise_deployment)
+            if type(result) == tuple:
+                return result
 
-            kube_client.appsv1_api.patch_namespaced_deployment(
-                body=patch,
-                name=dep_name,
-                namespace=namespace
-            )
             log_activity('App', status='Successful',
                          operation='Update',
                          description='App revised successfully',
@@ -1431,34 +1343,14 @@ class AppRedeployView(Resource):
                 if not is_authorised_project_user(project, current_user_id, 'admin'):
                     return dict(status='fail', message='Unauthorised'), 403
 
-            user = User.get_by_id(current_user_id)
-
             cluster = project.cluster
             namespace = project.alias
 
             if not cluster or not namespace:
                 return dict(status='fail', message='Internal server error'), 500
 
-            kube_client = create_kube_clients(cluster.host, cluster.token)
-            new_app = deploy_user_app(
-                kube_client=kube_client,
-                project=project,
-                user=user,
-                app=app
-            )
-
-            if type(new_app) == SimpleNamespace:
-                status_code = new_app.status_code if new_app.status_code else 500
-                return dict(status='fail', message=new_app.message), status_code
-
-            new_app_data, _ = app_schema.dump(new_app)
-            log_activity('App', status='Success',
-                         operation='Create',
-                         description='Redeployed app Successfully',
-                         a_project=project,
-                         a_cluster_id=project.cluster_id,
-                         a_app=new_app)
-            return dict(status='success', data=dict(app=new_app_data)), 201
+            return queue_deployment('redeploy_app', project, current_user_id,
+                                    app_id=str(app.id))
         except Exception as e:
             log_activity('App', status='Failed',
                          operation='Create',
@@ -1546,46 +1438,18 @@ class AppDockerWebhookListenerView(Resource):
                     message="Internal Server Error"
                 ), 500
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             dep_name = f'{app.alias}-deployment'
 
-            cluster_deployment = kube_client.appsv1_api.read_namespaced_deployment(
-                name=dep_name,
-                namespace=namespace
-            )
+            pod_spec = {}
             if app.private_image:
-                try:
-                    app_secret = kube_client.kube.read_namespaced_secret(
-                        namespace=namespace,
-                        name=app.alias
-                    )
-
-                except Exception as e:
-                    logger.exception('Exception occcured')
-                    if e.status != 404:
-                        log_activity('App', status='Failed',
-                                     operation='Auto Update',
-                                     description=f'''{
-                                         app_image}: Internal server error''',
-                                     a_project=project,
-                                     a_cluster_id=project.cluster_id,
-                                     a_app=app)
-
-                cluster_deployment.spec.template.spec.image_pull_secrets.append(
-                    app_secret)
-
-            cluster_deployment.spec.template.spec.containers[0].image = app_image
+                # the app's pull secret, created when it was deployed
+                pod_spec['imagePullSecrets'] = [dict(name=app.alias)]
 
             # Update the application image
-            kube_client.appsv1_api.replace_namespaced_deployment(
-                name=dep_name,
-                namespace=namespace,
-                body=cluster_deployment
-            )
+            patch_deployment(kube_client, dep_name, namespace, container_patch(
+                app.alias, pod_spec=pod_spec, image=app_image))
 
             # update the app in database
             updated_app = App.update(app, image=app_image)
@@ -1727,32 +1591,18 @@ class AppLogsView(Resource):
         if not cluster:
             return dict(status='fail', message="Invalid Cluster"), 500
 
-        kube_host = cluster.host
-        kube_token = cluster.token
-        kube_client = create_kube_clients(kube_host, kube_token)
+        kube_client = get_kube_clients(cluster)
 
         namespace = project.alias
-        deployment = app.alias
 
         tail_lines = validated_query_data.get('tail_lines', 100)
         since_seconds = validated_query_data.get('since_seconds', 86400)
         timestamps = validated_query_data.get('timestamps', False)
 
-        ''' Get Replicas sets'''
-        replicas = kube_client.appsv1_api.list_namespaced_replica_set(
-            namespace).to_dict()
-        replicasList = []
-        for replica in replicas['items']:
-            name = replica['metadata']['name']
-            if name.startswith(deployment):
-                replicasList.append(name)
-
-        ''' get pods list'''
-        pods = kube_client.kube.list_namespaced_pod(namespace)
+        ''' get the app's pods by label'''
         podsList = []
         failed_pods = []
-        for item in pods.items:
-            item = kube_client.api_client.sanitize_for_serialization(item)
+        for item in list_app_pods(kube_client, namespace, app.alias):
             pod_name = item['metadata']['name']
 
             try:
@@ -1760,53 +1610,35 @@ class AppLogsView(Resource):
             except:
                 continue
 
-            for replica in replicasList:
-                if pod_name.startswith(replica):
-                    if status == 'True':
-                        podsList.append(pod_name)
-                    else:
-                        failed_pods.append(pod_name)
-                    continue
+            if status == 'True':
+                podsList.append(pod_name)
+            else:
+                state = item['status']['containerStatuses'][0]['state']
+                failed_pods.append(state)
 
-            if pod_name.startswith(deployment):
-                if status == 'True':
-                    podsList.append(pod_name)
-                else:
-                    state = item['status']['containerStatuses'][0]['state']
-                    failed_pods.append(state)
+        log_options = dict(
+            tail_lines=tail_lines, timestamps=timestamps, since_seconds=since_seconds)
+        max_workers = current_app.config.get('APP_LOGS_MAX_WORKERS', 8)
 
-        ''' Get pods logs '''
-        pods_logs = []
+        if validated_query_data.get('stream', False):
+            if not podsList and not any(map(describe_failed_pod, failed_pods)):
+                return dict(status='fail', data=dict(message='No logs found')), 404
 
-        for pod in podsList:
-            podLogs = kube_client.kube.read_namespaced_pod_log(
-                pod, namespace, pretty=True, tail_lines=tail_lines or 100,
-                timestamps=timestamps or False,
-                since_seconds=since_seconds or 86400
-            )
+            return Response(
+                stream_with_context(stream_pod_logs(
+                    kube_client, namespace, podsList, max_workers=max_workers,
+                    failed_pods=failed_pods, **log_options)),
+                mimetype='application/x-ndjson')
 
-            if podLogs == '':
-                podLogs = kube_client.kube.read_namespaced_pod_log(
-                    pod, namespace, pretty=True, tail_lines=tail_lines or 100,
-                    timestamps=timestamps or False
-                )
-            pods_logs.append(podLogs)
+        ''' Get pods logs '''
+        pods_logs = fetch_pod_logs(
+            kube_client, namespace, podsList, max_workers=max_workers, **log_options)
 
         # Get failed pods infor
         for state in failed_pods:
-            if type(state) == dict:
-                waiting = state.get('waiting')
-                if waiting:
-                    try:
-                        stop = state['waiting']['message'].index('container')
-                        message = state['waiting']['message'][:stop]
-                    except:
-                        message = state['waiting'].get('message')
-
-                    reason = state['waiting']['reason']
-                    pod_infor = f'''type\tstatus\treason\t\t\tmessage\n----\t------\t------\t\t\t------\nwaiting\tfailed\t{
-                        reason}\t{message}'''
-                    pods_logs.append(pod_infor)
+            pod_infor = describe_failed_pod(state)
+            if pod_infor:
+                pods_logs.append(pod_infor)
 
         if not pods_logs or not pods_logs[0]:
             return dict(status='fail', data=dict(message='No logs found')), 404
@@ -1814,6 +1646,90 @@ class AppLogsView(Resource):
         return dict(status='success', data=dict(pods_logs=pods_logs)), 200
 
 
+class AppLogsStreamView(Resource):
+    @jwt_required
+    def get(self, project_id, app_id):
+        """
+        follow the logs of all an app's pods over Server-Sent Events
+        """
+        if not current_app.config.get('APP_LOG_FOLLOW_ENABLED', False):
+            return dict(status='fail', message='Following logs is not enabled'), 503
+
+        current_user_id = get_jwt_identity()
+        current_user_roles = get_jwt_claims()['roles']
+
+        project = Project.get_by_id(project_id)
+
+        if not project:
+            return dict(
+                status='fail',
+                message=f'project {project_id} not found'
+            ), 404
+
+        if not is_owner_or_admin(project, current_user_id, current_user_roles):
+            if not is_authorised_project_user(project, current_user_id, 'member'):
+                return dict(status='fail', message='unauthorised'), 403
+
+        app = App.get_by_id(app_id)
+
+        if not app or app.project_id != project.id:
+            return dict(
+                status='fail',
+                message=f'app {app_id} not found'
+            ), 404
+
+        cluster = project.cluster
+        if not cluster:
+            return dict(status='fail', message="Invalid Cluster"), 500
+
+        # a reconnecting EventSource sends the id of the last line it got
+        since = request.headers.get(
+            'Last-Event-ID') or request.args.get('since', None)
+        tail_lines = request.args.get('tail_lines', 100, type=int)
+
+        try:
+            if since:
+                since_seconds_for(since)
+        except ValueError:
+            return dict(status='fail', message='since must be an RFC3339 timestamp'), 400
+
+        kube_client = get_kube_clients(cluster)
+
+        try:
+            pods = list_app_pods(kube_client, project.alias, app.alias)
+        except client.rest.ApiException as e:
+            return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
+
+        running_pods = [pod['metadata']['name'] for pod in pods
+                        if pod.get('status', {}).get('phase') == 'Running']
+
+        if not running_pods:
+            return dict(status='fail', data=dict(message='No running pods found')), 404
+
+        max_seconds = current_app.config.get('APP_LOG_FOLLOW_SECONDS', 200)
+        log_follower_limiter = LogFollowerLimiter(
+            get_redis(), ttl=max_seconds + 60)
+        # the app instance may be expired by the time the response closes
+        app_id = app.id
+        follower = log_follower_limiter.acquire(
+            app_id,
+            current_app.config.get('APP_LOG_FOLLOWERS_PER_APP', 5),
+            current_app.config.get('APP_LOG_FOLLOWERS_TOTAL', 8))
+        if not follower:
+            return dict(status='fail', message='Too many log followers, try again later'), 429
+
+        response = Response(
+            stream_with_context(follow_pod_logs(
+                kube_client, project.alias, running_pods, since=since,
+                tail_lines=tail_lines, max_seconds=max_seconds)),
+            mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.call_on_close(
+            lambda: log_follower_limiter.release(app_id, follower))
+        return response
+
+
 class AppStorageUsageView(Resource):
     @jwt_required
     def post(self, project_id, app_id):
@@ -1848,25 +1764,18 @@ class AppStorageUsageView(Resource):
         if not project.cluster.prometheus_url:
             return dict(status='fail', message='No prometheus url provided'), 404
 
-        os.environ["PROMETHEUS_URL"] = project.cluster.prometheus_url
-        prometheus = Prometheus()
+        prometheus_url = project.cluster.prometheus_url
+        pvc_selector = f'namespace="{namespace}", persistentvolumeclaim=~"{app_alias}.*"'
 
         try:
-            prom_data = prometheus.query(
-                metric='sum(kube_persistentvolumeclaim_resource_requests_storage_bytes{namespace="' +
-                       namespace + '", persistentvolumeclaim=~"' + app_alias + '.*"})'
-            )
-            #  change array values to json
-            new_data = json.loads(prom_data)
-            values = new_data["data"]
-
-            percentage_data = prometheus.query(metric='100*(kubelet_volume_stats_used_bytes{namespace="' +
-                                                      namespace + '", persistentvolumeclaim=~"' + app_alias + '.*"}/kubelet_volume_stats_capacity_bytes{namespace="' +
-                                                      namespace + '", persistentvolumeclaim=~"' + app_alias + '.*"})'
-                                               )
-
-            data = json.loads(percentage_data)
-            volume_perc_value = data["data"]
+            values = prometheus_query(
+                prometheus_url,
+                f'sum(kube_persistentvolumeclaim_resource_requests_storage_bytes{{{pvc_selector}}})')
+
+            volume_perc_value = prometheus_query(
+                prometheus_url,
+                f'100*(kubelet_volume_stats_used_bytes{{{pvc_selector}}}'
+                f'/kubelet_volume_stats_capacity_bytes{{{pvc_selector}}})')
         except:
             return dict(status='fail', message='No values found'), 404
 
@@ -1,5 +1,4 @@
 import datetime
-import json
 from flask import current_app
 from flask_restful import Resource, request
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
@@ -166,7 +165,7 @@ class BillingInvoiceView(Resource):
                 message=f'billing invoice records not found'
             ), 404
 
-        billing_invoice_data, errors = billing_invoice_schema.dumps(
+        billing_invoice_data, errors = billing_invoice_schema.dump(
             billing_invoice.items)
 
         if errors:
@@ -174,7 +173,7 @@ class BillingInvoiceView(Resource):
 
         return dict(status='success', data=dict(
             pagination=billing_invoice.pagination,
-            billing_invoice=json.loads(billing_invoice_data))), 200
+            billing_invoice=billing_invoice_data)), 200
 
 
 class BillingInvoiceDetailView(Resource):
@@ -205,7 +204,7 @@ class BillingInvoiceDetailView(Resource):
         namespace = project.alias
         cost_url = project.cluster.cost_modal_url
 
-        billing_invoice_data, errors = billing_invoice_schema.dumps(
+        billing_invoice_data, errors = billing_invoice_schema.dump(
             billing_invoice)
         if cost_url:
             start = project.date_created.timestamp()
@@ -222,14 +221,14 @@ class BillingInvoiceDetailView(Resource):
             if not new_billing_invoice:
                 return dict(status='fail', message="Internal server error"), 500
 
-            billing_invoice_data, errors = billing_invoice_schema.dumps(
+            billing_invoice_data, errors = billing_invoice_schema.dump(
                 new_billing_invoice)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
         return dict(status='success', data=dict(
-            billing_invoice=json.loads(billing_invoice_data))), 200
+            billing_invoice=billing_invoice_data)), 200
 
 
 class BillingInvoiceNotificationView(Resource):
@@ -1,11 +1,15 @@
-import json
 from flask_restful import Resource, request
 from kubernetes import client
 from flask_jwt_extended import jwt_required
 from app.schemas import ClusterSchema
 from app.models.clusters import Cluster
-from app.helpers.kube import create_kube_clients, check_kube_error_code
+from app.helpers.kube import (create_kube_clients, get_kube_clients, check_kube_error_code,
+                              get_cluster_objects_page, get_cluster_resource_counts)
+from app.helpers.kube_informer import kube_informers
+from app.helpers.kube_registry import kube_client_registry
+from app.helpers.kube_health import circuit_breakers, get_cluster_health
 from app.helpers.decorators import admin_required
+from app.helpers.app_status_updater import get_reconciler_stats
 from app.helpers.pagination import paginate
 
 
@@ -56,87 +60,84 @@ class ClustersView(Resource):
 
         clusters = Cluster.find_all()
 
-        validated_cluster_data, errors = cluster_schema.dumps(clusters)
+        validated_cluster_data, errors = cluster_schema.dump(clusters)
 
         if errors:
             return dict(status='fail', message='Internal Server Error'), 500
 
-        clusters_data_list = json.loads(validated_cluster_data)
-        cluster_count = len(clusters_data_list)
+        cluster_count = len(validated_cluster_data)
 
         return dict(status='Success',
-                    data=dict(clusters=json.loads(validated_cluster_data), metadata=dict(cluster_count=cluster_count))), 200
+                    data=dict(clusters=validated_cluster_data, metadata=dict(cluster_count=cluster_count))), 200
 
 
-class ClusterDetailView(Resource):
+class ClusterClientsView(Resource):
 
     @admin_required
-    def get(self, cluster_id):
+    def get(self):
         """
+        Connection pool usage of the shared kubernetes clients in this worker
         """
-        try:
-
-            cluster_schema = ClusterSchema()
-
-            resource_count = []
-
-            cluster = Cluster.get_by_id(cluster_id)
-            if not cluster:
-                return dict(status='fail', message=f'Cluster with id {cluster_id} does not exist'), 404
-
-            validated_cluster_data, errors = cluster_schema.dumps(cluster)
-
-            if errors:
-                return dict(status='fail', message=errors), 500
+        return dict(status='success', data=dict(
+            clients=kube_client_registry.stats())), 200
 
-            kube_host = cluster.host
-            kube_token = cluster.token
 
-            kube_client = create_kube_clients(kube_host, kube_token)
+class ClusterStatusReconcilerView(Resource):
 
-            # get number of nodes in the cluster
-            node_count = len(kube_client.kube.list_node().items)
+    @admin_required
+    def get(self):
+        """
+        Duration and lag of the last app status reconcile of each cluster
+        """
+        try:
+            return dict(status='success', data=dict(
+                reconciler=get_reconciler_stats())), 200
+        except Exception as e:
+            return dict(status='fail', message=str(e)), 500
 
-            resource_count.append(dict(name='nodes', count=node_count))
 
-            # get count of pvcs in the cluster
-            pvc_count = len(
-                kube_client.kube.list_persistent_volume_claim_for_all_namespaces().items)
+class ClusterHealthView(Resource):
 
-            resource_count.append(dict(name='PVCs', count=pvc_count))
+    @admin_required
+    def get(self):
+        """
+        Last probed reachability and API latency of each cluster, and the
+        state of this worker's circuit breakers
+        """
+        return dict(status='success', data=dict(
+            health={str(cluster.id): get_cluster_health(cluster.id)
+                    for cluster in Cluster.find_all()},
+            circuit_breakers=circuit_breakers.stats())), 200
 
-            # get count of all pods in the cluster
-            pod_count = len(
-                kube_client.kube.list_pod_for_all_namespaces().items)
 
-            resource_count.append(dict(name='pods', count=pod_count))
+class ClusterDetailView(Resource):
 
-            # get count of all services
-            service_count = len(
-                kube_client.kube.list_service_for_all_namespaces().items)
+    @admin_required
+    def get(self, cluster_id):
+        """
+        """
+        try:
 
-            resource_count.append(dict(name='services', count=service_count))
+            cluster_schema = ClusterSchema()
 
-            # get count of all deployments
-            deployment_count = len(
-                kube_client.appsv1_api.list_deployment_for_all_namespaces().items)
+            cluster = Cluster.get_by_id(cluster_id)
+            if not cluster:
+                return dict(status='fail', message=f'Cluster with id {cluster_id} does not exist'), 404
 
-            resource_count.append(
-                dict(name='deployments', count=deployment_count))
+            validated_cluster_data, errors = cluster_schema.dump(cluster)
 
-            # get count of all namespaces in the cluster
-            namespace_count = len(kube_client.kube.list_namespace().items)
+            if errors:
+                return dict(status='fail', message=errors), 500
 
-            resource_count.append(
-                dict(name='namespaces', count=namespace_count))
+            kube_client = get_kube_clients(cluster)
 
-            resource_count_json = json.dumps(resource_count)
+            resource_count = get_cluster_resource_counts(cluster, kube_client)
 
             return dict(
                 status='succcess',
                 data=dict(
-                    cluster=json.loads(validated_cluster_data),
-                    resource_count=json.loads(resource_count_json))
+                    cluster=validated_cluster_data,
+                    resource_count=resource_count)
             ), 200
 
         except Exception as e:
@@ -166,6 +167,11 @@ class ClusterDetailView(Resource):
         if not cluster_updated:
             return dict(status='fail', message='Internal Server Error'), 500
 
+        # drop pooled connections made with the old credentials
+        if 'host' in validated_cluster_data or 'token' in validated_cluster_data:
+            kube_client_registry.invalidate(cluster.id)
+            kube_informers.invalidate(cluster.id)
+
         return dict(status='success', message='Cluster updated successfully'), 200
 
     @admin_required
@@ -182,6 +188,9 @@ class ClusterDetailView(Resource):
         if not deleted:
             return dict(status='fail', message='Internal Server Error'), 500
 
+        kube_client_registry.invalidate(cluster_id)
+        kube_informers.invalidate(cluster_id)
+
         return dict(status='success', message=f'Cluster with id {cluster_id} deleted successfully'), 200
 
 
@@ -203,26 +212,23 @@ class ClusterNamespacesView(Resource):
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 10, type=int)
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            # get all namespaces in the cluster
-            namespace_resp = kube_client.kube.list_namespace()
-
-            pagination, paginated_items = paginate(
-                namespace_resp, per_page, page)
+            namespace = request.args.get('namespace', None)
+            label_selector = request.args.get('label_selector', None)
+            # ?cursor= opts into limit/continue paging
+            cursor = request.args.get('cursor', None)
+            prune = request.args.get('prune', 'false').lower() == 'true'
 
-            namespaces = []
+            kube_client = get_kube_clients(cluster)
 
-            for item in paginated_items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                namespaces.append(item)
+            pagination, namespaces, freshness = get_cluster_objects_page(
+                cluster, kube_client, 'namespaces', page, per_page,
+                namespace=namespace, label_selector=label_selector, cursor=cursor,
+                prune=prune)
 
-            namespaces_json = json.dumps(namespaces)
+            return dict(status='success', data=dict(pagination=pagination, freshness=freshness, namespaces=namespaces)), 200
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
 
-            return dict(status='success', data=dict(pagination=pagination, namespaces=json.loads(namespaces_json))), 200
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
 
@@ -247,18 +253,13 @@ class ClusterNamespaceDetailView(Resource):
                     message=f'cluster with id {cluster_id} does not exist'
                 ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             namespace = kube_client.kube.read_namespace(name=namespace_name)
             namespace = kube_client.api_client.sanitize_for_serialization(
                 namespace)
 
-            namespace_json = json.dumps(namespace)
-
-            return dict(status='success', data=dict(namespace=json.loads(namespace_json))), 200
+            return dict(status='success', data=dict(namespace=namespace)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -282,25 +283,23 @@ class ClusterNodesView(Resource):
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 10, type=int)
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            namespace = request.args.get('namespace', None)
+            label_selector = request.args.get('label_selector', None)
+            # ?cursor= opts into limit/continue paging
+            cursor = request.args.get('cursor', None)
+            prune = request.args.get('prune', 'false').lower() == 'true'
 
-            # get all nodes in the cluster
-            node_resp = kube_client.kube.list_node()
+            kube_client = get_kube_clients(cluster)
 
-            pagination, paginated_items = paginate(node_resp, per_page, page)
+            pagination, nodes, freshness = get_cluster_objects_page(
+                cluster, kube_client, 'nodes', page, per_page,
+                namespace=namespace, label_selector=label_selector, cursor=cursor,
+                prune=prune)
 
-            nodes = []
+            return dict(status='success', data=dict(pagination=pagination, freshness=freshness, nodes=nodes)), 200
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
 
-            for item in paginated_items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                nodes.append(item)
-
-            nodes_json = json.dumps(nodes)
-
-            return dict(status='success', data=dict(pagination=pagination, nodes=json.loads(nodes_json))), 200
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
 
@@ -320,17 +319,12 @@ class ClusterNodeDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             node = kube_client.kube.read_node(name=node_name)
             node = kube_client.api_client.sanitize_for_serialization(node)
 
-            node_json = json.dumps(node)
-
-            return dict(status='success', data=dict(node=json.loads(node_json))), 200
+            return dict(status='success', data=dict(node=node)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -348,31 +342,28 @@ class ClusterDeploymentsView(Resource):
         try:
             cluster = Cluster.get_by_id(cluster_id)
 
-            deployments = []
-
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 10, type=int)
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            namespace = request.args.get('namespace', None)
+            label_selector = request.args.get('label_selector', None)
+            # ?cursor= opts into limit/continue paging
+            cursor = request.args.get('cursor', None)
+            prune = request.args.get('prune', 'false').lower() == 'true'
 
-            deployment_resp =\
-                kube_client.appsv1_api.list_deployment_for_all_namespaces()
+            kube_client = get_kube_clients(cluster)
 
-            pagination, paginated_items = paginate(
-                deployment_resp.items, per_page, page)
+            pagination, deployments, freshness = get_cluster_objects_page(
+                cluster, kube_client, 'deployments', page, per_page,
+                namespace=namespace, label_selector=label_selector, cursor=cursor,
+                prune=prune)
 
             tot_deployment_count = 0
             tot_success_deployments = 0
-            for item in paginated_items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                deployments.append(item)
-
+            for item in deployments:
                 if ((item["status"]["conditions"][0]["status"] == "True") and (item["status"]["conditions"][1]["status"] == "True")):
                     tot_success_deployments = tot_success_deployments + 1
 
@@ -382,9 +373,11 @@ class ClusterDeploymentsView(Resource):
 
             summary_stats_metadata = dict(total_deployment_count=tot_deployment_count,
                                           total_successful_deployments=tot_success_deployments, total_failed_deployment=tot_failed_deployments)
-            deployments_json = json.dumps(deployments)
 
-            return dict(status='success', data=dict(pagination=pagination, deployment_summary_stats=summary_stats_metadata, deployments=json.loads(deployments_json))), 200
+            return dict(status='success', data=dict(pagination=pagination, freshness=freshness, deployment_summary_stats=summary_stats_metadata, deployments=deployments)), 200
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
+
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
 
@@ -404,10 +397,7 @@ class ClusterDeploymentDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             deployment = kube_client.appsv1_api.read_namespaced_deployment(
                 deployment_name, namespace_name
@@ -417,11 +407,9 @@ class ClusterDeploymentDetailView(Resource):
                 deployment
             )
 
-            deployment_json = json.dumps(deployment)
-
             return dict(
                 status='success',
-                data=dict(deployment=json.loads(deployment_json))
+                data=dict(deployment=deployment)
             ), 200
 
         except client.rest.ApiException as e:
@@ -446,27 +434,24 @@ class ClusterPvcsView(Resource):
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 10, type=int)
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            pvcs_resp = \
-                kube_client.kube.list_persistent_volume_claim_for_all_namespaces()
-
-            pagination, paginated_items = paginate(
-                pvcs_resp.items, per_page, page)
-
-            pvcs = []
+            namespace = request.args.get('namespace', None)
+            label_selector = request.args.get('label_selector', None)
+            # ?cursor= opts into limit/continue paging
+            cursor = request.args.get('cursor', None)
+            prune = request.args.get('prune', 'false').lower() == 'true'
 
-            for item in paginated_items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                pvcs.append(item)
+            kube_client = get_kube_clients(cluster)
 
-            pvcs_json = json.dumps(pvcs)
+            pagination, pvcs, freshness = get_cluster_objects_page(
+                cluster, kube_client, 'pvcs', page, per_page,
+                namespace=namespace, label_selector=label_selector, cursor=cursor,
+                prune=prune)
 
             return dict(
-                status='success', data=dict(pagination=pagination, pvcs=json.loads(pvcs_json))), 200
+                status='success', data=dict(pagination=pagination, freshness=freshness, pvcs=pvcs)), 200
+
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -487,10 +472,7 @@ class ClusterPvcDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             pvc = kube_client.kube.read_namespaced_persistent_volume_claim(
                 pvc_name, namespace_name
@@ -498,9 +480,7 @@ class ClusterPvcDetailView(Resource):
 
             pvc = kube_client.api_client.sanitize_for_serialization(pvc)
 
-            pvc_json = json.dumps(pvc)
-
-            return dict(status='success', data=dict(pvc=json.loads(pvc_json))), 200
+            return dict(status='success', data=dict(pvc=pvc)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -524,10 +504,7 @@ class ClusterPVsView(Resource):
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 10, type=int)
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             pvs_resp = kube_client.kube.list_persistent_volume()
 
@@ -540,9 +517,7 @@ class ClusterPVsView(Resource):
                 item = kube_client.api_client.sanitize_for_serialization(item)
                 pvs.append(item)
 
-            pvs_json = json.dumps(pvs)
-
-            return dict(status='success', data=dict(pagination=pagination, pvs=json.loads(pvs_json))), 200
+            return dict(status='success', data=dict(pagination=pagination, pvs=pvs)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -566,17 +541,12 @@ class ClusterPVDetailView(Resource):
                     message=f'cluster with id {cluster_id} does not exist'
                 ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             pv = kube_client.kube.read_persistent_volume(pv_name)
             pv = kube_client.api_client.sanitize_for_serialization(pv)
 
-            pv_json = json.dumps(pv)
-
-            return dict(status='success', data=dict(pv=json.loads(pv_json))), 200
+            return dict(status='success', data=dict(pv=pv)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -603,22 +573,23 @@ class ClusterPodsView(Resource):
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 10, type=int)
 
-            kube_host = cluster.host
-            kube_token = cluster.token
+            namespace = request.args.get('namespace', None)
+            label_selector = request.args.get('label_selector', None)
+            # ?cursor= opts into limit/continue paging
+            cursor = request.args.get('cursor', None)
+            prune = request.args.get('prune', 'false').lower() == 'true'
 
-            kube_client = create_kube_clients(kube_host, kube_token)
-            pods_resp = kube_client.kube.list_pod_for_all_namespaces()
+            kube_client = get_kube_clients(cluster)
 
-            pagination, paginated_items = paginate(
-                pods_resp.items, per_page, page)
-
-            pods = []
+            pagination, pods, freshness = get_cluster_objects_page(
+                cluster, kube_client, 'pods', page, per_page,
+                namespace=namespace, label_selector=label_selector, cursor=cursor,
+                prune=prune)
 
-            for item in paginated_items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                pods.append(item)
+            return dict(status='success', data=dict(pagination=pagination, freshness=freshness, pods=pods)), 200
 
-            return dict(status='success', data=dict(pagination=pagination, pods=pods)), 200
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -639,18 +610,13 @@ class ClusterPodDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             pod = kube_client.kube.read_namespaced_pod(
                 pod_name, namespace_name)
             pod = kube_client.api_client.sanitize_for_serialization(pod)
 
-            pod_json = json.dumps(pod)
-
-            return dict(status='success', data=dict(pod=json.loads(pod_json))), 200
+            return dict(status='success', data=dict(pod=pod)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -677,26 +643,23 @@ class ClusterServicesView(Resource):
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 10, type=int)
 
-            kube_host = cluster.host
-            kube_token = cluster.token
+            namespace = request.args.get('namespace', None)
+            label_selector = request.args.get('label_selector', None)
+            # ?cursor= opts into limit/continue paging
+            cursor = request.args.get('cursor', None)
+            prune = request.args.get('prune', 'false').lower() == 'true'
 
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
-            service_resp =\
-                kube_client.kube.list_service_for_all_namespaces()
+            pagination, services, freshness = get_cluster_objects_page(
+                cluster, kube_client, 'services', page, per_page,
+                namespace=namespace, label_selector=label_selector, cursor=cursor,
+                prune=prune)
 
-            pagination, paginated_items = paginate(
-                service_resp.items, per_page, page)
-
-            services = []
+            return dict(status='success', data=dict(pagination=pagination, freshness=freshness, services=services)), 200
 
-            for item in paginated_items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                services.append(item)
-
-            services_json = json.dumps(services)
-
-            return dict(status='success', data=dict(pagination=pagination, services=json.loads(services_json))), 200
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -717,19 +680,14 @@ class ClusterServiceDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             service = kube_client.kube.read_namespaced_service(
                 service_name, namespace_name)
             service = kube_client.api_client.sanitize_for_serialization(
                 service)
 
-            service_json = json.dumps(service)
-
-            return dict(status='success', data=dict(service=json.loads(service_json))), 200
+            return dict(status='success', data=dict(service=service)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -752,10 +710,7 @@ class ClusterJobsView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             jobs_resp = kube_client.batchv1_api.list_job_for_all_namespaces()
 
@@ -763,9 +718,7 @@ class ClusterJobsView(Resource):
                 item = kube_client.api_client.sanitize_for_serialization(item)
                 jobs.append(item)
 
-            jobs_json = json.dumps(jobs)
-
-            return dict(status='success', data=dict(jobs=json.loads(jobs_json))), 200
+            return dict(status='success', data=dict(jobs=jobs)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -786,19 +739,14 @@ class ClusterJobDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             job = kube_client.batchv1_api.read_namespaced_job(
                 job_name, namespace_name)
 
             job = kube_client.api_client.sanitize_for_serialization(job)
 
-            job_json = json.dumps(job)
-
-            return dict(status='success', data=dict(job=json.loads(job_json))), 200
+            return dict(status='success', data=dict(job=job)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
@@ -824,10 +772,7 @@ class ClusterStorageClassView(Resource):
                     message=f'cluster with id {cluster_id} does not exist'
                 ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             storage_classes_resp = kube_client.storageV1Api.list_storage_class()
 
@@ -835,11 +780,9 @@ class ClusterStorageClassView(Resource):
                 item = kube_client.api_client.sanitize_for_serialization(item)
                 storage_classes.append(item)
 
-            storage_classes_json = json.dumps(storage_classes)
-
             return dict(
                 status='success',
-                data=dict(storage_classes=json.loads(storage_classes_json))
+                data=dict(storage_classes=storage_classes)
             ), 200
 
         except client.rest.ApiException as e:
@@ -864,10 +807,7 @@ class ClusterStorageClassDetailView(Resource):
                     message=f'cluster with id {cluster_id} does not exist'
                 ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             storage_class =\
                 kube_client.storageV1Api.read_storage_class(storage_class_name)
@@ -876,11 +816,9 @@ class ClusterStorageClassDetailView(Resource):
                 kube_client.api_client.sanitize_for_serialization(
                     storage_class)
 
-            storage_class_json = json.dumps(storage_class)
-
             return dict(
                 status='success',
-                data=dict(storage_class=json.loads(storage_class_json))
+                data=dict(storage_class=storage_class)
             ), 200
 
         except client.rest.ApiException as e:
@@ -1,4 +1,3 @@
-import json
 from flask import current_app
 from flask_restful import Resource, request
 from app.schemas import CreditAssignmentSchema
@@ -144,12 +143,12 @@ class CreditAssignmentDetailView(Resource):
         credit_assignment_records = user.credit_assignments
         
 
-        credit_assignments_json, errors = credit_assignment_schema.dumps(credit_assignment_records)
+        credit_assignments_data, errors = credit_assignment_schema.dump(credit_assignment_records)
 
         if errors:
             return dict(status='fail', message='Internal server error'), 500
 
         return dict(
             status='success',
-            data=dict(credit_assignment_records=json.loads(credit_assignments_json))
+            data=dict(credit_assignment_records=credit_assignments_data)
         ), 200
\ No newline at end of file
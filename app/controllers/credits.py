@@ -1,4 +1,3 @@
-import json
 from flask import current_app
 from flask_restful import Resource, request
 from app.schemas import CreditSchema
@@ -15,14 +14,14 @@ class CreditView(Resource):
 
         users_credit = Credit.find_all()
 
-        users_credit_data, errors = credit_schema.dumps(users_credit)
+        users_credit_data, errors = credit_schema.dump(users_credit)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(credit=json.loads(users_credit_data))
+            data=dict(credit=users_credit_data)
         ), 200
 
 
@@ -32,13 +31,13 @@ class CreditDetailView(Resource):
     def get(self, user_id):
         credit_schema = CreditSchema()
         user_credits = Credit.find_first(user_id=user_id)
-        user_credits_data, errors = credit_schema.dumps(user_credits)
+        user_credits_data, errors = credit_schema.dump(user_credits)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(credit=json.loads(user_credits_data))
+            data=dict(credit=user_credits_data)
         ), 200
 
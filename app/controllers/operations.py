@@ -0,0 +1,32 @@
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
+from app.helpers.role_search import has_role
+from app.models.operation import Operation
+from app.schemas import OperationSchema
+
+
+class OperationDetailView(Resource):
+
+    @jwt_required
+    def get(self, operation_id):
+        """
+        Status and per step progress of a long running operation
+        """
+        current_user_id = get_jwt_identity()
+        current_user_roles = get_jwt_claims()['roles']
+
+        operation = Operation.get_by_id(operation_id)
+
+        if not operation:
+            return dict(
+                status='fail',
+                message=f'Operation {operation_id} not found'
+            ), 404
+
+        if str(operation.user_id) != str(current_user_id) and \
+                not has_role(current_user_roles, 'administrator'):
+            return dict(status='fail', message='Unauthorised'), 403
+
+        operation_data, _ = OperationSchema().dump(operation)
+
+        return dict(status='success', data=dict(operation=operation_data)), 200
@@ -1,12 +1,16 @@
 import datetime
-import json
 from types import SimpleNamespace
 from app.helpers.cost_modal import CostModal
 from app.helpers.alias import create_alias
 from app.helpers.admin import is_authorised_project_user, is_owner_or_admin, is_current_or_admin, is_admin
 from app.helpers.role_search import has_role
 from app.helpers.activity_logger import log_activity
-from app.helpers.kube import create_kube_clients, delete_cluster_app, disable_project, enable_project, check_kube_error_code
+from app.helpers.search import ranked_search
+from app.helpers.kube import get_kube_clients, disable_project, enable_project, check_kube_error_code
+from app.helpers.project_deletion import delete_project_namespace, set_project_deleting
+from app.helpers.project_preload import preload_projects
+from app.helpers.platform_stats import get_platform_stats
+from app.tasks import finalise_project_delete
 from app.models.billing_invoice import BillingInvoice
 from app.models.project_users import ProjectUser
 from app.models.user import User
@@ -20,11 +24,11 @@ from kubernetes import client
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
 from app.schemas.monitoring_metrics import BillingMetricsSchema, ProjectGraphSchema
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import or_, func
+from sqlalchemy import or_
 from app.helpers.crane_app_logger import logger
 from flask import current_app, render_template
 from app.helpers.email import send_email
-from app.helpers.pagination import paginate
+from app.helpers.pagination import paginate, paginate_query
 
 
 class ProjectsView(Resource):
@@ -70,10 +74,7 @@ class ProjectsView(Resource):
                     message=f'cluster {cluster_id} not found'
                 ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             # create namespace in cluster
             cluster_namespace = kube_client.kube.create_namespace(
@@ -215,6 +216,9 @@ class ProjectsView(Resource):
             'set_by': request.args.get('set_by', 'month')
         }
         series = request.args.get('series', 'false').lower() == 'true'
+        # ?cursor= opts into keyset paging, ?count=exact adds a total to it
+        cursor = request.args.get('cursor', None)
+        count = request.args.get('count', None)
 
         project_schema = ProjectSchema(many=True)
         projects = []
@@ -226,93 +230,50 @@ class ProjectsView(Resource):
         }
 
         # count items per project category
-        project_metadata = {}
-        for category in filter_mapping.keys():
-            distinct_counts = Project.query.with_entities(getattr(Project, category), func.count(
-                getattr(Project, category))).group_by(getattr(Project, category)).all()
-            if category == 'disabled':
-                project_metadata[category] = distinct_counts[0][1] if distinct_counts else 0
-            else:
-                project_metadata[category] = dict(distinct_counts)
+        project_stats = get_platform_stats('projects')
+        project_metadata = {
+            'disabled': project_stats['disabled'],
+            'project_type': project_stats['project_type']
+        }
 
         # Identify which attribute to filter on
         attribute, attribute_value = next(
             ((k, v) for k, v in filter_mapping.items() if v), (None, None))
 
-        if has_role(current_user_roles, 'administrator'):
-
-            if (keywords == ''):
+        try:
+            if has_role(current_user_roles, 'administrator'):
+                query = Project.query
                 if attribute:
-                    paginated = (Project.query.filter(getattr(Project, attribute) == attribute_value).order_by(
-                        Project.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False))
-                    projects = paginated.items
-                    pagination_data = {
-                        'total': paginated.total,
-                        'pages': paginated.pages,
-                        'page': paginated.page,
-                        'per_page': paginated.per_page,
-                        'next': paginated.next_num,
-                        'prev': paginated.prev_num
-                    }
-
+                    query = query.filter(getattr(Project, attribute) == attribute_value)
                 else:
-                    paginated = Project.find_all(
-                        paginate=True, page=page, per_page=per_page)
-                    projects = paginated.items
-                    pagination_data = paginated.pagination
+                    count = count or 'estimate'
             else:
-                paginated = Project.query.filter(Project.name.ilike('%'+keywords+'%')).order_by(Project.date_created.desc()).paginate(
-                    page=page, per_page=per_page, error_out=False)
-                projects = paginated.items
-                pagination_data = {
-                    'total': paginated.total,
-                    'pages': paginated.pages,
-                    'page': paginated.page,
-                    'per_page': paginated.per_page,
-                    'next': paginated.next_num,
-                    'prev': paginated.prev_num
-                }
-        else:
-            try:
-
                 if (keywords == ''):
                     if attribute:
-                        paginated = (Project.query.filter(getattr(Project, attribute) == attribute_value).order_by(
-                            Project.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False))
-                        projects = paginated.items
-                        pagination = {
-                            'total': paginated.total,
-                            'pages': paginated.pages,
-                            'page': paginated.page,
-                            'per_page': paginated.per_page,
-                            'next': paginated.next_num,
-                            'prev': paginated.prev_num
-                        }
+                        query = Project.query.filter(getattr(Project, attribute) == attribute_value)
                     else:
-                        pagination = Project.query.filter(or_(Project.owner_id == current_user_id, Project.users.any(
-                            ProjectUser.user_id == current_user_id))).order_by(Project.date_created.desc()).paginate(
-                            page=page, per_page=per_page, error_out=False)
+                        query = Project.query.filter(or_(Project.owner_id == current_user_id, Project.users.any(
+                            ProjectUser.user_id == current_user_id)))
                 else:
+                    query = Project.query.filter(Project.owner_id == current_user_id, Project.users.any(
+                        ProjectUser.user_id == current_user_id))
+
+            if keywords:
+                # ranked matches are paged by offset
+                pagination_data, projects = paginate_query(ranked_search(
+                    query, Project, keywords, Project.name
+                ), Project, page, per_page)
+            else:
+                pagination_data, projects = paginate_query(
+                    query.order_by(Project.date_created.desc()), Project,
+                    page, per_page, cursor=cursor, count=count)
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
+        except SQLAlchemyError:
+            return dict(status='fail', message='Internal Server Error'), 500
 
-                    pagination = Project.query.filter(Project.owner_id == current_user_id, Project.name.ilike('%'+keywords+'%'), Project.users.any(
-                        ProjectUser.user_id == current_user_id)).order_by(Project.date_created.desc()).paginate(
-                        page=page, per_page=per_page, error_out=False)
-
-                projects = pagination.items
-                if pagination:
-                    pagination_data = {
-                        'total': pagination.total,
-                        'pages': pagination.pages,
-                        'page': pagination.page,
-                        'per_page': pagination.per_page,
-                        'next': pagination.next_num,
-                        'prev': pagination.prev_num
-                    }
-            except SQLAlchemyError:
-                pagination = None
-                return dict(status='fail', message='Internal Server Error'), 500
-
-        project_data, errors = project_schema.dumps(projects)
+        project_schema.context = preload_projects(projects, current_user_id)
+        project_data, errors = project_schema.dump(projects)
 
         if errors:
             return dict(status='fail', message=errors), 500
@@ -350,7 +311,7 @@ class ProjectsView(Resource):
             data=dict(
                 metadata=project_metadata,
                 pagination=pagination_data,
-                projects=json.loads(project_data)
+                projects=project_data
             )
         ), 200
 
@@ -377,31 +338,31 @@ class ProjectDetailView(Resource):
             if not is_authorised_project_user(project, current_user_id, 'member'):
                 return dict(status='fail', message='unauthorised'), 403
 
-        project_data, errors = project_schema.dumps(project)
+        project_data, errors = project_schema.dump(project)
         if errors:
             return dict(status='fail', message=errors), 500
 
         # return cluster information
         cluster_schema = ClusterSchema()
         project_cluster = project.cluster
-        cluster_data, errors = cluster_schema.dumps(project_cluster)
+        cluster_data, errors = cluster_schema.dump(project_cluster)
 
         # if user not an admin
         if not is_admin(current_user_roles):
             return dict(status='success', data=dict(
-                project=dict(**json.loads(project_data)), cluster=json.loads(cluster_data))), 200
+                project=dict(**project_data), cluster=cluster_data)), 200
         else:
             apps_schema = AppSchema(many=True)
             users_schema = ProjectUserSchema(many=True)
             apps = project.apps
             users = project.users
-            apps_data, errors = apps_schema.dumps(apps)
-            users_data, errors = users_schema.dumps(users)
+            apps_data, errors = apps_schema.dump(apps)
+            users_data, errors = users_schema.dump(users)
             return dict(status='success', data=dict(
-                project=dict(**json.loads(project_data),
-                             apps=json.loads(apps_data),
-                             users=json.loads(users_data),
-                             cluster=json.loads(cluster_data)
+                project=dict(**project_data,
+                             apps=apps_data,
+                             users=users_data,
+                             cluster=cluster_data
                              ))), 200
 
     @jwt_required
@@ -422,95 +383,49 @@ class ProjectDetailView(Resource):
         if not is_owner_or_admin(project, current_user_id, current_user_roles):
             return dict(status='fail', message='unauthorised'), 403
 
-        try:
-            # get cluster for the project
-            cluster = Cluster.get_by_id(project.cluster_id)
+        if project.deleting:
+            return dict(
+                status='fail',
+                message=f'project {project_id} is already being deleted'
+            ), 409
 
-            if not cluster:
-                return dict(status='fail', message='cluster not found'), 500
-
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            # check and delete apps within a project
-            apps_list = project.apps
-            if apps_list:
-                for app in apps_list:
-                    delete_cluster_app(kube_client, project.alias, app)
-                    # delete the app from the database
-                    deleted = app.soft_delete()
-
-            # get corresponding namespace
-            try:
-                namespace = kube_client.kube.read_namespace(project.alias)
-                # delete namespace if it exists
-                if namespace:
-                    kube_client.kube.delete_namespace(project.alias)
-            except Exception as e:
-                # if unable to get namespace, it means it is already deleted
-                pass
-
-            deleted = project.soft_delete()
-
-            if not deleted:
-                log_activity('Project', status='Failed',
-                             operation='Delete',
-                             description='Internal server error',
-                             a_project_id=project_id,
-                             a_cluster_id=project.cluster_id)
-                return dict(status='fail', message='deletion failed'), 500
+        # get cluster for the project
+        cluster = Cluster.get_by_id(project.cluster_id)
 
-            log_activity('Project', status='Success',
-                         operation='Delete',
-                         description='Deleted project Successfully',
-                         a_project_id=project.id,
-                         a_cluster_id=project.cluster_id)
-            return dict(
-                status='success',
-                message=f'project {project_id} deleted successfully'
-            ), 200
+        if not cluster:
+            return dict(status='fail', message='cluster not found'), 500
 
-        except client.rest.ApiException as e:
-            if e.status == 404:
-                """
-                deletes apps and project from db if not found on the cluster
-                """
-                apps_list = project.apps
-                if apps_list:
-                    for app in apps_list:
-                        # delete the app from the database
-                        deleted = app.soft_delete()
-
-                deleted = project.soft_delete()
-
-                if not deleted:
-                    return dict(status='fail', message='deletion failed'), 500
-                log_activity('Project', status='Success',
-                             operation='Delete',
-                             description='Deleted project Successfully',
-                             a_project_id=project.id,
-                             a_cluster_id=project.cluster_id)
-                return dict(
-                    status='success',
-                    message=f'project {project_id} deleted successfully'
-                ), 200
-            log_activity('Project', status='Failed',
-                         operation='Delete',
-                         description=e.reason,
-                         a_project_id=project_id,
-                         a_cluster_id=project.cluster_id)
-            return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
+        if not set_project_deleting(project.id):
+            return dict(status='fail', message='deletion failed'), 500
 
+        try:
+            # deleting the namespace deletes every app in it, the project
+            # is soft deleted once the namespace is gone
+            delete_project_namespace(get_kube_clients(cluster), project.alias)
         except Exception as e:
+            set_project_deleting(project.id, False)
             log_activity('Project', status='Failed',
                          operation='Delete',
-                         description=str(e),
-                         a_project_id=project_id,
+                         description=getattr(e, 'reason', None) or str(e),
+                         a_project=project,
                          a_cluster_id=project.cluster_id)
+            if isinstance(e, client.rest.ApiException):
+                return dict(status='fail', message=e.reason), check_kube_error_code(e.status)
             return dict(status='fail', message=str(e)), 500
 
+        try:
+            finalise_project_delete.delay(str(project.id), current_user_id)
+        except Exception:
+            # nothing would finalise the deletion, let it be asked for again
+            logger.exception('Exception occurred')
+            set_project_deleting(project.id, False)
+            return dict(status='fail', message='deletion could not be queued, try again later'), 503
+
+        return dict(
+            status='success',
+            message=f'project {project_id} is being deleted'
+        ), 202
+
     @jwt_required
     def patch(self, project_id):
         """
@@ -610,26 +525,20 @@ class UserProjectsView(Resource):
         # pagination_meta_data, projects = paginate(
         #     user.projects, per_page, page)
 
-        pagination = Project.query.filter(or_(Project.owner_id == current_user_id, Project.users.any(
-                            ProjectUser.user_id == current_user_id))).order_by(Project.date_created.desc()).paginate(
-                            page=page, per_page=per_page, error_out=False)
-        
-        projects = pagination.items
-        if pagination:
-            pagination_data = {
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'next': pagination.next_num,
-                'prev': pagination.prev_num
-            }
-
-        user_projects, errors = project_schema.dumps(projects)
+        try:
+            pagination_data, projects = paginate_query(
+                Project.query.filter(or_(Project.owner_id == current_user_id, Project.users.any(
+                    ProjectUser.user_id == current_user_id))).order_by(Project.date_created.desc()),
+                Project, page, per_page, cursor=request.args.get('cursor', None),
+                count=request.args.get('count', None))
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
+
+        project_schema.context = preload_projects(
+            list(projects) + pinned_projects, current_user_id)
+        user_projects, errors = project_schema.dump(projects)
  
-        pinned_projects, errs = project_schema.dumps(pinned_projects)
-
-        parsed_pinned_projects = json.loads(pinned_projects)
+        parsed_pinned_projects, errs = project_schema.dump(pinned_projects)
 
         if errors or errs:
             return dict(status='fail', message='Internal server error'), 500
@@ -640,7 +549,7 @@ class UserProjectsView(Resource):
                 pagination={**pagination_data,
                             'pinned_count': len(parsed_pinned_projects)},
                 pinned=parsed_pinned_projects,
-                projects=json.loads(user_projects),
+                projects=user_projects,
             )
         ), 200
 
@@ -666,11 +575,17 @@ class ClusterProjectsView(Resource):
         if not cluster:
             return dict(status='fail', message=f'Cluster with id {cluster_id} not found'), 404
 
-        projects = cluster.projects
-        projects = Project.find_all(
-            cluster_id=cluster_id, paginate=True, page=page, per_page=per_page)
+        try:
+            projects = Project.find_all(
+                cluster_id=cluster_id, paginate=True, page=page, per_page=per_page,
+                cursor=request.args.get('cursor', None),
+                count=request.args.get('count', None))
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
 
-        projects_json, errors = project_schema.dumps(projects.items)
+        project_schema.context = preload_projects(
+            projects.items, get_jwt_identity())
+        projects_data, errors = project_schema.dump(projects.items)
 
         if errors:
             return dict(status='fail', message='Internal server error'), 500
@@ -679,7 +594,7 @@ class ClusterProjectsView(Resource):
             status='success',
             data=dict(
                 pagination=projects.pagination,
-                projects=json.loads(projects_json))
+                projects=projects_data)
         ), 200
 
 
@@ -1,4 +1,3 @@
-import json
 from app.models.project_users import ProjectUser
 from flask_restful import Resource, request
 from app.schemas import ProjectUserSchema, AnonymousUsersSchema, UserIndexSchema
@@ -148,12 +147,12 @@ class ProjectUsersView(Resource):
             success)
 
         user_schema = ProjectUserSchema()
-        new_project_user_data, errors = user_schema.dumps(user)
+        new_project_user_data, errors = user_schema.dump(user)
 
         return dict(
             status='success',
             message='User added to project successfully',
-            data=dict(project_user=json.loads(new_project_user_data))
+            data=dict(project_user=new_project_user_data)
         ), 201
 
     @jwt_required
@@ -193,21 +192,21 @@ class ProjectUsersView(Resource):
 
         project_users = project.users
 
-        project_user_data, errors = project_user_schema.dumps(project_users)
+        project_user_data, errors = project_user_schema.dump(project_users)
         if errors:
             return dict(status="fail", message="Internal Server Error"), 500
 
         project_anonymous_users = project.anonymoususers
 
-        project_anonymous_user_data, errors = anonymous_user_schema.dumps(
+        project_anonymous_user_data, errors = anonymous_user_schema.dump(
             project_anonymous_users)
         if errors:
             return dict(status="fail", message="Internal Server Error"), 500
 
         return dict(
             status="success",
-            data=dict(project_users=json.loads(project_user_data),
-                      project_anonymous_users=json.loads(project_anonymous_user_data))
+            data=dict(project_users=project_user_data,
+                      project_anonymous_users=project_anonymous_user_data)
         ), 200
 
     @jwt_required
@@ -291,12 +290,12 @@ class ProjectUsersView(Resource):
             success)
 
         user_schema = ProjectUserSchema()
-        updated_project_user_data, errors = user_schema.dumps(existing_user)
+        updated_project_user_data, errors = user_schema.dump(existing_user)
 
         return dict(
             status='success',
             message='User role updated successfully',
-            data=dict(project_user=json.loads(updated_project_user_data))
+            data=dict(project_user=updated_project_user_data)
         ), 200
 
     # delete user from project
@@ -551,14 +550,14 @@ class ProjectFollowingView(Resource):
         follower_schema = UserIndexSchema(many=True)
 
         followers = project.followers
-        users_data, errors = follower_schema.dumps(followers)
+        users_data, errors = follower_schema.dump(followers)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(followers=json.loads(users_data))
+            data=dict(followers=users_data)
         ), 200
 
     @ jwt_required
@@ -1,6 +1,5 @@
 
 
-import json
 from flask_restful import Resource, request
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
 from app.helpers.admin import is_owner_or_admin
@@ -41,13 +40,13 @@ class BillingReceiptsView(Resource):
                 message=f'billing receipt records not found'
             ), 404
 
-        billing_receipts_data, errors = billing_receipt_schema.dumps(billing_receipts.items)
+        billing_receipts_data, errors = billing_receipt_schema.dump(billing_receipts.items)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
         return dict(status='success', data=dict(
-            pagination=billing_receipts.pagination, billing_receipts=json.loads(billing_receipts_data))), 200
+            pagination=billing_receipts.pagination, billing_receipts=billing_receipts_data)), 200
 
 
 class BillingReceiptsDetailView(Resource):
@@ -75,10 +74,10 @@ class BillingReceiptsDetailView(Resource):
                 message=f'billing receipt with invoice id {receipt_id} not found'
             ), 404
 
-        billing_receipt_data, errors = billing_invoice_schema.dumps(billing_receipt)
+        billing_receipt_data, errors = billing_invoice_schema.dump(billing_receipt)
         
         if errors:
             return dict(status='fail', message=errors), 500
 
         return dict(status='success', data=dict(
-            billing_receipt=json.loads(billing_receipt_data))), 200
+            billing_receipt=billing_receipt_data)), 200
@@ -1,4 +1,3 @@
-import json
 from flask_restful import Resource, request
 from flask_jwt_extended import jwt_required
 from app.models.registry import Registry
@@ -15,10 +14,10 @@ class RegistriesView(Resource):
 
         registries = Registry.find_all()
 
-        validated_reg_data, errors = registery_schema.dumps(registries)
+        validated_reg_data, errors = registery_schema.dump(registries)
 
         if errors:
             return dict(status='fail', message='Internal Server Error'), 500
 
         return dict(status='success',
-                    data=dict(registries=json.loads(validated_reg_data))), 200
+                    data=dict(registries=validated_reg_data)), 200
@@ -1,4 +1,3 @@
-import json
 from flask import current_app
 from flask_restful import Resource, request
 from app.schemas import RoleSchema
@@ -37,11 +36,11 @@ class RolesView(Resource):
         if not saved_role:
             return dict(status='fail', message=f'Internal Server Error'), 500
 
-        new_role_data, errors = roles_schema.dumps(role)
+        new_role_data, errors = roles_schema.dump(role)
 
         return dict(
             status='success',
-            data=dict(role=json.loads(new_role_data))
+            data=dict(role=new_role_data)
         ), 201
 
     @admin_required
@@ -52,14 +51,14 @@ class RolesView(Resource):
 
         roles = Role.find_all()
 
-        roles_data, errors = role_schema.dumps(roles)
+        roles_data, errors = role_schema.dump(roles)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(roles=json.loads(roles_data))
+            data=dict(roles=roles_data)
         ), 200
 
 
@@ -79,14 +78,14 @@ class RolesDetailView(Resource):
                 message=f"Role with id {role_id} not found"
             ), 404
 
-        role_data, errors = role_schema.dumps(role)
+        role_data, errors = role_schema.dump(role)
 
         if errors:
             return dict(status="fail", message=errors), 500
 
         return dict(
             status='success',
-            data=dict(role=json.loads(role_data))
+            data=dict(role=role_data)
         ), 200
 
     @admin_required
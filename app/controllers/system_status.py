@@ -4,35 +4,27 @@ from sqlalchemy import null
 from app.models.clusters import Cluster
 from flask import request
 from app.helpers.decorators import admin_required
-from app.models.user import User
-from app.models.project import Project
-from app.models.app import App
+from app.helpers.platform_stats import get_platform_stats
 
 class SystemSummaryView(Resource):
     @admin_required
     def get(self):
-        # Users
-        user_count = User.query.count()
-        verified_users = User.query.filter(User.verified==True).count()
-        beta_users = User.query.filter(User.is_beta_user==True).count()
-        #Projects
-        project_count = Project.query.count()
-        disabled_projects = Project.query.filter(Project.disabled == True).count()
-        #apps
-        app_count = App.query.count()
+        user_stats = get_platform_stats('users')
+        project_stats = get_platform_stats('projects')
+        app_stats = get_platform_stats('apps')
 
         return dict(status='success' , data={
             'Users' : {
-                'total_count' : user_count,
-                'verified' : verified_users,
-                'beta_users' : beta_users
+                'total_count' : user_stats['total'],
+                'verified' : user_stats['verified'],
+                'beta_users' : user_stats['beta']
             },
             'Projects' : {
-                'total_count' : project_count,
-                'disabled' : disabled_projects
+                'total_count' : project_stats['total'],
+                'disabled' : project_stats['disabled']
             },
             'Apps' : {
-                'total_count' : app_count,
+                'total_count' : app_stats['total'],
             },
             
         }) , 200
@@ -1,5 +1,4 @@
 
-import json
 from app.schemas.project_users import UserIndexSchema
 from app.schemas.tags import TagSchema, TagsDetailSchema
 from flask_restful import Resource, request
@@ -128,14 +127,14 @@ class TagFollowingView(Resource):
         follower_schema = UserIndexSchema(many=True)
 
         followers = tag.followers
-        users_data, errors = follower_schema.dumps(followers)
+        users_data, errors = follower_schema.dump(followers)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(followers=json.loads(users_data))
+            data=dict(followers=users_data)
         ), 200
 
     @ jwt_required
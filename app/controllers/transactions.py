@@ -5,7 +5,6 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
 import sqlalchemy
 from app.helpers.admin import is_owner_or_admin
 from app.helpers.role_search import has_role
-import json
 from app.models import billing_invoice
 from app.models.billing_invoice import BillingInvoice
 from app.models.project import Project
@@ -151,13 +150,13 @@ class TransactionRecordView(Resource):
         if not is_owner_or_admin(project, current_user_id, current_user_roles):
                 return dict(status='fail', message='Unauthorised'), 403
 
-        transaction_data, errors = transaction_schema.dumps(transaction.items)
+        transaction_data, errors = transaction_schema.dump(transaction.items)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
         return dict(status='success', data=dict(
-           pagination=transaction.pagination, transaction=json.loads(transaction_data))), 200
+           pagination=transaction.pagination, transaction=transaction_data)), 200
 
 
 class TransactionRecordDetailView(Resource):
@@ -182,13 +181,13 @@ class TransactionRecordDetailView(Resource):
         if not is_owner_or_admin(project, current_user_id, current_user_roles):
                 return dict(status='fail', message='Unauthorised'), 403
 
-        transaction_data, errors = transaction_schema.dumps(transaction)
+        transaction_data, errors = transaction_schema.dump(transaction)
         
         if errors:
             return dict(status='fail', message=errors), 500
 
         return dict(status='success', data=dict(
-            transaction=json.loads(transaction_data))), 200
+            transaction=transaction_data)), 200
 
 
 
@@ -394,9 +393,7 @@ class CreditTransactionRecordView(Resource):
                         transaction={**new_transaction_data, 
                         "billing_invoice_id":str(transaction.billing_invoice_id)})), 201
 
-            user_credit_exp_date_json, errors = transaction_schema.dumps(user_credit_exp_date)
-        
-            arr= json.loads(user_credit_exp_date_json)
+            arr, errors = transaction_schema.dump(user_credit_exp_date)
 
             assignment_expire = CreditAssignment.get_by_id(arr["id"])
             if not assignment_expire:
@@ -542,9 +539,7 @@ class CreditPurchaseTransactionRecordView(Resource):
                         transaction={**new_transaction_data, 
                         "billing_invoice_id":str(transaction.billing_invoice_id)})), 201
             
-            user_credit_exp_date_json, errors = transaction_schema.dumps(user_credit_exp_date)
-            
-            arr= json.loads(user_credit_exp_date_json)
+            arr, errors = transaction_schema.dump(user_credit_exp_date)
             
             assignment_expire = CreditAssignment.get_by_id(arr["id"])
             
@@ -1,4 +1,3 @@
-import json
 from flask import current_app
 from flask_restful import Resource, request
 from app.schemas import UserRoleSchema, UserSchema
@@ -54,11 +53,11 @@ class UserRolesView(Resource):
         if not saved_user_role:
             return dict(status='fail', message='Internal Server Error'), 500
 
-        new_user_role_data, errors = user_schema.dumps(user)
+        new_user_role_data, errors = user_schema.dump(user)
 
         return dict(
             status='success',
-            data=dict(user_role=json.loads(new_user_role_data))
+            data=dict(user_role=new_user_role_data)
         ), 201
 
     @admin_required
@@ -74,14 +73,14 @@ class UserRolesView(Resource):
 
         user_roles = user.roles
 
-        user_role_data, errors = role_schema.dumps(user_roles)
+        user_role_data, errors = role_schema.dump(user_roles)
 
         if errors:
             return dict(status="fail", message="Internal Server Error"), 500
 
         return dict(
             status="success",
-            data=dict(user_roles=json.loads(user_role_data))
+            data=dict(user_roles=user_role_data)
         ), 200
 
     # delete user role
@@ -125,9 +124,9 @@ class UserRolesView(Resource):
         if not saved_user_role:
             return dict(status='fail', message='Internal Server Error'), 500
 
-        new_user_role_data, errors = user_schema.dumps(user)
+        new_user_role_data, errors = user_schema.dump(user)
 
         return dict(
             status='success',
-            data=dict(user_role=json.loads(new_user_role_data))
+            data=dict(user_role=new_user_role_data)
         ), 201
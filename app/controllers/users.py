@@ -1,27 +1,27 @@
-import json
 from math import ceil
 import os
-from types import SimpleNamespace
 from app.helpers.activity_logger import log_activity
+from app.helpers.search import ranked_search, search_filter
 from app.helpers.inactiveUser_notification import send_inactive_notification_to_user
-from app.helpers.kube import disable_project, enable_project
-from flask import current_app, render_template
+from app.helpers.bulk_operations import queue_bulk_operation
+from app.helpers.user_profile import profile_counters
+from app.helpers.platform_stats import get_platform_stats
+from app.helpers.creation_rollup import creation_graph_data
+from flask import current_app
 from flask_restful import Resource, request,reqparse
 from flask_bcrypt import Bcrypt
-from app.schemas import UserSchema, UserGraphSchema, ActivityLogSchema
+from app.schemas import UserSchema, UserGraphSchema, ActivityLogSchema, OperationSchema
 from app.models.user import User
-from app.models.project_users import ProjectFollowers
 from app.models.role import Role
 from app.helpers.confirmation import send_verification
-from app.helpers.email import send_email
 from app.helpers.token import validate_token
 from app.helpers.decorators import admin_required
-from app.helpers.pagination import paginate
+from app.helpers.pagination import paginate, paginate_query
 from app.helpers.admin import is_admin
 import requests
 import secrets
 import string
-from sqlalchemy import Date, func, column, cast, and_, or_
+from sqlalchemy import Date, cast
 from app.models import db
 from datetime import datetime, timedelta
 from app.models.anonymous_users import AnonymousUser
@@ -122,11 +122,11 @@ class UsersView(Resource):
             if not deleted_anonymous_user:
                 return dict(status='fail', message=f'Internal Server Error'), 500
 
-        new_user_data, errors = user_schema.dumps(user)
+        new_user_data, errors = user_schema.dump(user)
 
         return dict(
             status='success',
-            data=dict(user=json.loads(new_user_data))
+            data=dict(user=new_user_data)
         ), 201
 
     @jwt_required
@@ -143,6 +143,9 @@ class UsersView(Resource):
         verified = request.args.get('verified', None)
         is_beta = request.args.get('is_beta', None)
         series = request.args.get('series', 'false').lower() == 'true'
+        # ?cursor= opts into keyset paging, ?count=exact adds a total to it
+        cursor = request.args.get('cursor', None)
+        count = request.args.get('count', None)
 
     # Graph filter data
         graph_filter_data = {
@@ -150,106 +153,64 @@ class UsersView(Resource):
         'end': request.args.get('end', datetime.now().strftime('%Y-%m-%d')), 
         'set_by': request.args.get('set_by', 'month')
     }
-        total_users = len(User.find_all())
-
         users = []
         # check if user is admin
         admin_role = Role.find_first(name='administrator')
 
         if admin_role not in current_user.roles:
-            query = User.query
-            if keywords:
-                keyword_filter = or_(
-                    User.name.ilike(f'%{keywords}%'),
-                    User.email.ilike(f'%{keywords}%')
-                )
-                query = query.filter(keyword_filter)
-
-            paginated = query.filter(User.verified == True).order_by(
-                User.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
-            users = paginated.items
-            pagination = {
-                'total': paginated.total,
-                'pages': paginated.pages,
-                'page': paginated.page,
-                'per_page': paginated.per_page,
-                'next': paginated.next_num,
-                'prev': paginated.prev_num
-            }
-            users_data, errors = user_schema.dumps(users)
+            query = User.query.filter(User.verified == True)
+            try:
+                if keywords:
+                    # ranked matches are paged by offset
+                    pagination, users = paginate_query(ranked_search(
+                        query, User, keywords, User.name, User.email
+                    ), User, page, per_page)
+                else:
+                    pagination, users = paginate_query(
+                        query.order_by(User.date_created.desc()), User,
+                        page, per_page, cursor=cursor, count=count)
+            except ValueError as e:
+                return dict(status='fail', message=str(e)), 400
+
+            users_data, errors = user_schema.dump(users)
             if errors:
                 return dict(status='fail', message=errors), 400
 
             return dict(
                 status='success',
                 data=dict(pagination=pagination,
-                          users=json.loads(users_data))
+                          users=users_data)
             ), 200
 
+        user_stats = get_platform_stats('users')
         meta_data = dict()
-        meta_data['total_users'] = total_users
-        meta_data['beta_users'] = User.query.filter_by(
-            is_beta_user=True).count()
-        meta_data['none_verified'] = User.query.filter_by(
-            verified=False).count()
-        meta_data['disabled'] = User.query.filter_by(
-            disabled=True).count()
-
-        if (keywords == ''):
-            if (verified != None or is_beta != None):
-                if (verified != None and is_beta != None):
-                    paginated = User.query.filter(User.verified == verified, User.is_beta_user == is_beta).order_by(
-                        User.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
-                else:
-                    if (verified != None):
-                        paginated = User.query.filter(User.verified == verified).order_by(
-                            User.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
-                    else:
-                        paginated = User.query.filter(User.is_beta_user == is_beta).order_by(
-                            User.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
-
-                users = paginated.items
-                pagination = {
-                    'total': paginated.total,
-                    'pages': paginated.pages,
-                    'page': paginated.page,
-                    'per_page': paginated.per_page,
-                    'next': paginated.next_num,
-                    'prev': paginated.prev_num
-                }
+        meta_data['total_users'] = user_stats['total']
+        meta_data['beta_users'] = user_stats['beta']
+        meta_data['none_verified'] = user_stats['unverified']
+        meta_data['disabled'] = user_stats['disabled']
 
-            else:
-                paginated = User.find_all(
-                    paginate=True, page=page, per_page=per_page)
-                users = paginated.items
-                pagination = paginated.pagination
-        else:
-            if (verified != None or is_beta != None):
-                if (verified != None and is_beta != None):
-                    paginated = User.query.filter((User.name.ilike('%'+keywords+'%') | User.email.ilike('%'+keywords+'%')), User.verified == verified,
-                                                  User.is_beta_user == is_beta).order_by(User.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
-                else:
-                    if (verified != None):
-                        paginated = User.query.filter((User.name.ilike('%'+keywords+'%') | User.email.ilike('%'+keywords+'%')), User.verified == verified).order_by(
-                            User.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
-                    else:
-                        paginated = User.query.filter((User.name.ilike('%'+keywords+'%') | User.email.ilike('%'+keywords+'%')), User.is_beta_user == is_beta).order_by(
-                            User.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        query = User.query
+        if verified != None:
+            query = query.filter(User.verified == verified)
+        if is_beta != None:
+            query = query.filter(User.is_beta_user == is_beta)
 
+        try:
+            if keywords:
+                # ranked matches are paged by offset
+                pagination, users = paginate_query(ranked_search(
+                    query, User, keywords, User.name, User.email
+                ), User, page, per_page)
             else:
-                paginated = User.query.filter(User.name.ilike('%'+keywords+'%') | User.email.ilike('%'+keywords+'%')).order_by(
-                    User.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
-            users = paginated.items
-            pagination = {
-                'total': paginated.total,
-                'pages': paginated.pages,
-                'page': paginated.page,
-                'per_page': paginated.per_page,
-                'next': paginated.next_num,
-                'prev': paginated.prev_num
-            }
+                if verified == None and is_beta == None:
+                    count = count or 'estimate'
+                pagination, users = paginate_query(
+                    query.order_by(User.date_created.desc()), User,
+                    page, per_page, cursor=cursor, count=count)
+        except ValueError as e:
+            return dict(status='fail', message=str(e)), 400
 
-        users_data, errors = user_schema.dumps(users)
+        users_data, errors = user_schema.dump(users)
 
         if errors:
             return dict(status='fail', message=errors), 400
@@ -280,7 +241,7 @@ class UsersView(Resource):
         return dict(
             status='success',
             data=dict(meta_data=meta_data, pagination=pagination,
-                      users=json.loads(users_data))
+                      users=users_data)
         ), 200
 
 
@@ -403,7 +364,6 @@ class UserDetailView(Resource):
         """
         user_schema = UserSchema()
         current_user_id = get_jwt_identity()
-        current_user = User.get_by_id(current_user_id)
 
         user = User.get_by_id(user_id)
 
@@ -413,29 +373,11 @@ class UserDetailView(Resource):
                 message=f'user {user_id} not found'
             ), 404
 
-        user_data, errors = user_schema.dumps(user)
-
-        # A count of the project records that they own in the ProjectFollowers' table is the count of users that follow their projects
-        count_of_projects_followers = (
-            db.session.query(func.count(ProjectFollowers.user_id))
-            .join(Project, ProjectFollowers.project_id == Project.id)
-            .filter(Project.owner_id == user_id)
-            .scalar()
-        )
-
-        user_data = json.loads(user_data)
+        user_data, errors = user_schema.dump(user)
 
-        user_data['projects_count'] = len(user.projects)
-        user_data['following_count'] = user.followed.count()
-        user_data['follower_count'] = user.followers.count()
-        user_data['followed_projects_count'] = len(user.followed_projects)
-        user_data['projects_followers_count'] = count_of_projects_followers
-
-        # Identify if the person making the details request follows the user or not
-        user_data['requesting_user_follows'] = user.is_followed_by(
-            current_user)
-        user_data['apps_count'] = sum(
-            len(project.apps) for project in user.projects)
+        # projects, apps, follows both ways, followers of their projects and
+        # whether the person making the request follows them, in one query
+        user_data.update(profile_counters(user.id, current_user_id))
 
         if errors:
             return dict(status='fail', message=errors), 500
@@ -923,25 +865,12 @@ class UserDataSummaryView(Resource):
 
         verified = request.args.get('verified', None)
         is_beta = request.args.get('is_beta', None)
-        total_users = len(User.find_all())
-
-        meta_data = {'total_users': total_users}
-        beta_count = User.query.with_entities(User.is_beta_user, func.count(
-            User.is_beta_user)).group_by(User.is_beta_user).all()
-        verified_count = User.query.with_entities(
-            User.verified, func.count(User.verified)).group_by(User.verified).all()
-        meta_data['is_beta_user'] = 0
-        meta_data['verified'] = 0
-
-        for key, value in beta_count:
-            if key:
-                meta_data['is_beta_user'] = value
-                break
-
-        for key, value in verified_count:
-            if key:
-                meta_data['verified'] = value
-                break
+        user_stats = get_platform_stats('users')
+        meta_data = {
+            'total_users': user_stats['total'],
+            'is_beta_user': user_stats['beta'],
+            'verified': user_stats['verified']
+        }
 
         filter_schema = UserGraphSchema()
 
@@ -954,69 +883,15 @@ class UserDataSummaryView(Resource):
         end = validated_query_data.get('end', datetime.now())
         set_by = validated_query_data.get('set_by', 'month')
 
-        if set_by == 'month':
-            date_list = func.generate_series(
-                start, end, '1 month').alias('month')
-            month = column('month')
-            if (verified != None or is_beta != None):
-                if (verified != None):
-                    user_data = db.session.query(month, func.count(User.id)).\
-                        select_from(date_list).\
-                        outerjoin(User, and_(func.date_trunc('month', User.date_created) == month, User.verified == verified)).\
-                        group_by(month).\
-                        order_by(month).\
-                        all()
-                else:
-                    user_data = db.session.query(month, func.count(User.id)).\
-                        select_from(date_list).\
-                        outerjoin(User, and_(func.date_trunc('month', User.date_created) == month, User.is_beta_user == is_beta)).\
-                        group_by(month).\
-                        order_by(month).\
-                        all()
-
-            else:
-                user_data = db.session.query(month, func.count(User.id)).\
-                    select_from(date_list).\
-                    outerjoin(User, func.date_trunc('month', User.date_created) == month).\
-                    group_by(month).\
-                    order_by(month).\
-                    all()
-
+        # counted from the daily rollup of new users
+        if verified != None:
+            value = 'verified' if verified.lower() == 'true' else 'unverified'
+        elif is_beta != None:
+            value = 'beta' if is_beta.lower() == 'true' else 'not_beta'
         else:
-            date_list = func.generate_series(
-                start, end, '1 year').alias('year')
-            year = column('year')
-
-            if (verified != None or is_beta != None):
-                if (verified != None):
-                    user_data = db.session.query(year, func.count(User.id)).\
-                        select_from(date_list).\
-                        outerjoin(User, and_(func.date_trunc('year', User.date_created) == year, User.verified == verified)).\
-                        group_by(year).\
-                        order_by(year).\
-                        all()
-                else:
-                    user_data = db.session.query(year, func.count(User.id)).\
-                        select_from(date_list).\
-                        outerjoin(User, and_(func.date_trunc('year', User.date_created) == year, User.is_beta_user == is_beta)).\
-                        group_by(year).\
-                        order_by(year).\
-                        all()
-            else:
-                user_data = db.session.query(year, func.count(User.id)).\
-                    select_from(date_list).\
-                    outerjoin(User, func.date_trunc('year', User.date_created) == year).\
-                    group_by(year).\
-                    order_by(year).\
-                    all()
-
-        user_info = []
-
-        for item in user_data:
-            item_dict = {
-                'year': item[0].year, 'month': item[0].month, 'value': item[1]
-            }
-            user_info.append(item_dict)
+            value = 'created'
+        user_info = creation_graph_data('users', start, end, set_by, value)
+
         return dict(
             status='success',
             data=dict(
@@ -1084,9 +959,8 @@ class InActiveUsersView(Resource):
             )
 
             if keywords:
-                keyword_filter = (User.name.ilike(
-                    '%' + keywords + '%') | User.email.ilike('%' + keywords + '%'))
-                query = query.filter(keyword_filter)
+                query = query.filter(
+                    search_filter(keywords, User.name, User.email))
 
             if created_date:
                 date_created_filter = (
@@ -1109,14 +983,14 @@ class InActiveUsersView(Resource):
             'prev': paginated.prev_num
         }
 
-        users_data, errors = user_schema.dumps(users)
+        users_data, errors = user_schema.dump(users)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(pagination=pagination, users=json.loads(users_data))
+            data=dict(pagination=pagination, users=users_data)
         ), 200
 
 
@@ -1131,50 +1005,15 @@ class UserDisableView(Resource):
         if user.disabled:
             return dict(status='fail', message=f'User with id {user_id} is already disabled'), 409
 
-        for project in user.projects:
-            if not project.disabled:
-                disabled_project = disable_project(project)
-                if type(disabled_project) == SimpleNamespace:
-                    status_code = disabled_project.status_code if disabled_project.status_code else 500
-                    return dict(status='fail', message=disabled_project.message), status_code
-
-        try:
-            # save user
-            user.disabled = True
-            user.save()
-            log_activity('User', status='Success',
-                         operation='Disable',
-                         description='Disabled user Successfully',
-                         a_user_id=user.id
-                         )
-            # send email
-            html_layout = render_template(
-                'user/user_disable_enable.html',
-                email=user.email,
-                name=user.name,
-                status='disabled')
-            send_email(
-                user.email,
-                'Status of your account',
-                html_layout,
-                current_app.config["MAIL_DEFAULT_SENDER"],
-                current_app._get_current_object(),
-            )
+        # the projects are disabled by a background job, polled through
+        # the returned operation
+        operation = queue_bulk_operation(
+            'disable_user', get_jwt_identity(), user_id=str(user.id))
+        if not operation:
+            return dict(status='fail', message='Internal Server Error'), 500
 
-            return dict(
-                status='success',
-                message=f'user {user_id} disabled successfully'
-            ), 200
-        except Exception as err:
-            log_activity('User', status='Failed',
-                         operation='Disable',
-                         description=err.body,
-                         a_user_id=user.id
-                         )
-            return dict(
-                status='fail',
-                message=str(err)
-            ), 500
+        operation_data, _ = OperationSchema().dump(operation)
+        return dict(status='success', data=dict(operation=operation_data)), 202
 
 
 class UserEnableView(Resource):
@@ -1188,48 +1027,13 @@ class UserEnableView(Resource):
         if not user.disabled:
             return dict(status='fail', message=f'User with id {user_id} is not disabled'), 409
 
-        for project in user.projects:
-            if project.disabled:
-                enabled_project = enable_project(project)
-                if type(enabled_project) == SimpleNamespace:
-                    status_code = enabled_project.status_code if enabled_project.status_code else 500
-                    return dict(status='fail', message=enabled_project.message), status_code
-        try:
-            # save user
-            user.disabled = False
-            user.save()
-            log_activity('User', status='Success',
-                         operation='Enable',
-                         description='Enabled user Successfully',
-                         a_user_id=user.id
-                         )
-            html_layout = render_template(
-                'user/user_disable_enable.html',
-                email=user.email,
-                name=user.name,
-                status='enabled')
-            send_email(
-                user.email,
-                'Status of your account',
-                html_layout,
-                current_app.config["MAIL_DEFAULT_SENDER"],
-                current_app._get_current_object(),
-            )
-            return dict(
-                status='success',
-                message=f'user {user_id} Enabled successfully'
-            ), 200
+        operation = queue_bulk_operation(
+            'enable_user', get_jwt_identity(), user_id=str(user.id))
+        if not operation:
+            return dict(status='fail', message='Internal Server Error'), 500
 
-        except Exception as err:
-            log_activity('User', status='Failed',
-                         operation='Enable',
-                         description=err.body,
-                         a_user_id=user.id
-                         )
-            return dict(
-                status='fail',
-                message=str(err)
-            ), 500
+        operation_data, _ = OperationSchema().dump(operation)
+        return dict(status='success', data=dict(operation=operation_data)), 202
 
 
 class UserFollowView(Resource):
@@ -1275,14 +1079,14 @@ class UserFollowView(Resource):
         user_schema = UserSchema(many=True)
 
         followed = user.followed.all()
-        users_data, errors = user_schema.dumps(followed)
+        users_data, errors = user_schema.dump(followed)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(following=json.loads(users_data))
+            data=dict(following=users_data)
         ), 200
 
     @ jwt_required
@@ -1326,14 +1130,14 @@ class UserFollowersView(Resource):
         user_schema = UserSchema(many=True)
 
         followers = user.followers
-        users_data, errors = user_schema.dumps(followers)
+        users_data, errors = user_schema.dump(followers)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(followers=json.loads(users_data))
+            data=dict(followers=users_data)
         ), 200
 
 
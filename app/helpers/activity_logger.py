@@ -20,13 +20,15 @@ from flask import request
 
 
 
-def log_activity(model: str, status: str, operation: str, description: str, a_user_id=None, a_app=None, a_project=None, a_cluster_id=None):
+def log_activity(model: str, status: str, operation: str, description: str, a_user_id=None, a_app=None, a_project=None, a_cluster_id=None, user_id=None):
     LOGGER_APP_URL = current_app.config.get('LOGGER_APP_URL')
     if not LOGGER_APP_URL:
         return
 
     try:
-        user_id = get_jwt_identity()
+        # outside of a request, such as in a celery task, the caller
+        # passes the acting user
+        user_id = user_id or get_jwt_identity()
         user = User.get_by_id(user_id)
         user_email = user.email if user else None
         user_name = user.name if user else None
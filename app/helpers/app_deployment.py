@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+from app.helpers.activity_logger import log_activity
+from app.helpers.crane_app_logger import logger
+from app.helpers.deploy_credentials import claim_credentials
+from app.models.app import App
+from app.models.operation import Operation
+from app.models.project import Project
+from app.models.user import User
+from app.schemas import AppSchema
+
+
+def run_deployment_operation(operation_id, project_id, user_id, app_data=None,
+                             apps_data=None, app_id=None):
+    """
+    deploy one app, several apps or redeploy an existing app on behalf of a
+    celery worker, recording the progress of every step on the operation
+    """
+    from app.helpers.kube import get_kube_clients, deploy_user_app, sort_apps_for_deployment
+
+    operation = Operation.get_by_id(operation_id)
+    if not operation:
+        logger.warning(f'operation {operation_id} not found')
+        return False
+
+    operation.set_status(Operation.RUNNING)
+    app_schema = AppSchema()
+
+    def progress(step, status, message=None):
+        operation.set_step(step, status, message)
+
+    try:
+        project = Project.get_by_id(project_id)
+        user = User.get_by_id(user_id)
+        if not project or not project.cluster:
+            return operation.set_status(
+                Operation.FAILED, message=f'project {project_id} not found')
+
+        # registry credentials were stashed rather than sent with the task
+        if app_data:
+            app_data = claim_credentials(operation_id, [app_data])[0]
+        if apps_data:
+            apps_data = claim_credentials(operation_id, apps_data)
+
+        kube_client = get_kube_clients(project.cluster)
+
+        if apps_data:
+            deployed_apps = sort_apps_for_deployment(
+                apps_data=apps_data, kube_client=kube_client, project=project,
+                user=user, app_schema=app_schema, progress=progress)
+            result = dict(failed_apps=deployed_apps.failed_apps_data,
+                          apps=deployed_apps.apps_data)
+            status = Operation.FAILED if deployed_apps.failed_apps_data and \
+                not deployed_apps.apps_data else Operation.SUCCEEDED
+            return operation.set_status(status, result=result)
+
+        app = App.get_by_id(app_id) if app_id else None
+        new_app = deploy_user_app(
+            kube_client=kube_client, project=project, user=user, app=app,
+            app_data=app_data or {}, progress=progress)
+
+        if type(new_app) == SimpleNamespace:
+            return operation.set_status(Operation.FAILED, message=new_app.message)
+
+        new_app_data, _ = app_schema.dump(new_app)
+        log_activity('App', status='Success',
+                     operation='Create',
+                     description='Redeployed app Successfully' if app else 'Deployed app Successfully',
+                     a_project=project,
+                     a_cluster_id=project.cluster_id,
+                     a_app=new_app,
+                     user_id=user_id)
+        return operation.set_status(
+            Operation.SUCCEEDED, result=dict(app=new_app_data))
+
+    except Exception as e:
+        logger.exception('Exception occurred')
+        return operation.set_status(Operation.FAILED, message=str(e))
+    finally:
+        # steps left running were cut short by the failure
+        for step in operation.steps or []:
+            if step.get('status') == 'running':
+                operation.set_step(step['name'], 'failed')
@@ -0,0 +1,98 @@
+from kubernetes import client
+
+from app.helpers.crane_app_logger import logger
+from app.helpers.kube_patch import patch_deployment
+from app.helpers.kube_raw import list_raw, load_raw
+
+# label deploy_user_app puts on an app's deployment and its pods
+APP_LABEL = 'app'
+
+
+def app_label_selector(*aliases):
+    """
+    label selector matching the objects of one or several apps
+    """
+    if len(aliases) == 1:
+        return f'{APP_LABEL}={aliases[0]}'
+    return f'{APP_LABEL} in ({",".join(sorted(aliases))})'
+
+
+def list_app_pods(kube_client, namespace, *aliases, prune=True):
+    """
+    raw pods of the given apps only, fetched by label so that the response
+    grows with the apps rather than the namespace
+    """
+    return list_raw(kube_client.kube.list_namespaced_pod,
+                    namespace=namespace, prune=prune,
+                    label_selector=app_label_selector(*aliases))['items']
+
+
+def list_app_replica_sets(kube_client, namespace, alias):
+    """
+    replica sets, and with them the revisions, of an app's deployment
+    """
+    return kube_client.appsv1_api.list_namespaced_replica_set(
+        namespace, label_selector=app_label_selector(alias))
+
+
+def pod_app_alias(pod):
+    return ((pod.get('metadata') or {}).get('labels') or {}).get(APP_LABEL)
+
+
+def label_legacy_app(kube_client, namespace, alias):
+    """
+    add the app label to the deployments of an app deployed before it was
+    set. The app deployment's pod template is labelled too and it rolls
+    out new pods that carry the label, the database deployment is only
+    labelled so it is found along with the app. Returns True when either
+    deployment had to be labelled.
+    """
+    labelled = False
+    for name, pod_template in ((f'{alias}-deployment', True),
+                               (f'{alias}-postgres-db', False)):
+        try:
+            deployment = load_raw(kube_client.appsv1_api.read_namespaced_deployment(
+                name, namespace, _preload_content=False))
+        except client.rest.ApiException as e:
+            # most apps have no database deployment
+            if pod_template or e.status != 404:
+                raise
+            continue
+
+        patch = {}
+        if (deployment['metadata'].get('labels') or {}).get(APP_LABEL) != alias:
+            patch['metadata'] = {'labels': {APP_LABEL: alias}}
+        template_labels = deployment['spec']['template']['metadata'].get('labels') or {}
+        if pod_template and template_labels.get(APP_LABEL) != alias:
+            patch['metadata'] = {'labels': {APP_LABEL: alias}}
+            patch['spec'] = {'template': {'metadata': {'labels': {APP_LABEL: alias}}}}
+        if patch:
+            patch_deployment(kube_client, name, namespace, patch)
+            labelled = True
+    return labelled
+
+
+def label_legacy_apps(projects):
+    """
+    label the deployments of every app of the given projects that predates
+    label based discovery. Returns (labelled, already labelled, failed).
+    """
+    from app.helpers.kube import get_kube_clients
+
+    labelled = unchanged = failed = 0
+    for project in projects:
+        if not project.cluster or not project.apps:
+            continue
+        kube_client = get_kube_clients(project.cluster)
+        for app in project.apps:
+            try:
+                if label_legacy_app(kube_client, project.alias, app.alias):
+                    labelled += 1
+                    logger.info(f'labelled app {app.alias} in {project.alias}')
+                else:
+                    unchanged += 1
+            except client.rest.ApiException as e:
+                failed += 1
+                logger.warning(
+                    f'failed to label app {app.alias} in {project.alias}: {e.reason}')
+    return labelled, unchanged, failed
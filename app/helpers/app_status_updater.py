@@ -1,145 +1,240 @@
+import time
+from datetime import datetime
 
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import contains_eager
 
+from app.models import db
 from app.models.app import AppState
-
 from app.models.clusters import Cluster
 from app.models.project import Project
 from app.models.app import App
-from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
+from app.helpers.app_discovery import app_label_selector, pod_app_alias
+from app.helpers.crane_app_logger import logger
+from app.helpers.kube_raw import list_raw
+from app.helpers.redis_client import get_redis
+
+# app states written per INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 500
+
+RECONCILER_STATS_KEY = 'app_status_reconciler:{cluster_id}'
+
+
+def bulk_upsert_app_states(app_status_messages):
+    """
+    write app states with one INSERT ... ON CONFLICT (app) DO UPDATE per
+    batch, relying on the unique constraint on app_state.app
+    """
+    rows = [dict(
+        app=message["app"],
+        failure_reason=message.get("failure_reason", None),
+        message=message["message"],
+        status=message["status"],
+        last_check=message.get("last_check", datetime.now())
+    ) for message in app_status_messages]
+
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = insert(AppState.__table__).values(
+            rows[start:start + UPSERT_BATCH_SIZE])
+        statement = statement.on_conflict_do_update(
+            index_elements=[AppState.__table__.c.app],
+            set_=dict(
+                failure_reason=statement.excluded.failure_reason,
+                message=statement.excluded.message,
+                status=statement.excluded.status,
+                last_check=statement.excluded.last_check
+            )
+        )
+        try:
+            db.session.execute(statement)
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            raise
 
 
 def update_or_create_app_state(app_status_message):
+    bulk_upsert_app_states([app_status_message])
+
+
+def app_state_status(running_status, pods_running):
+    """
+    app state status, one of the appstatuslist enum, of a status worked out
+    by the app detail view, which also has disabled and partially_running.
+    They are written as the reconciler would, see compute_app_status
+    """
+    if running_status == "disabled":
+        return "failed"
+    if running_status == "partially_running":
+        return "running" if pods_running else "failed"
+    return running_status
+
+
+def compute_app_status(app, pods, deployment, now):
+    """
+    status of one app from its pods and deployment, all fetched beforehand
+    """
+    app_message = {
+        "app": app.id,
+        "last_check": now,
+        "status": "failed",
+        "message": "",
+        "failure_reason": ""
+    }
+
+    if app.disabled:
+        app_message["message"] = "Application is disabled"
+        app_message["failure_reason"] = "Disabled"
+        return app_message
+
+    if not deployment and not pods:
+        app_message["status"] = "down"
+        app_message["message"] = "Application deployment not found"
+        app_message["failure_reason"] = "NotFound"
+        return app_message
+
+    for index, pod in enumerate(pods):
+        pod_status = pod.get("status", {})
+
+        if pod_status.get("phase") == "Running":
+            app_message["status"] = "running"
+            app_message["message"] += f"pod:{index} - is running.\n"
+            continue
+
+        container_statuses = pod_status.get("containerStatuses", [])
+        if not container_statuses:
+            app_message["message"] += f"Failed to access pod:{index} status. "
+            app_message["failure_reason"] += f"pod:{index} - Unknown. "
+            continue
+
+        for container_status in container_statuses:
+            state = container_status.get("state", {})
+            waiting = state.get("waiting") or state.get("terminated") or {}
+            reason = waiting.get("reason", "Unknown")
+            message = waiting.get("message", "")
+            app_message["message"] += f"pod:{index} - down, Message:{message}."
+            app_message["failure_reason"] += f"pod:{index} - {reason}."
+
+    return app_message
+
+
+def reconcile_namespace(kube_client, namespace, apps, now):
+    """
+    statuses of all the apps in a namespace from one pod list and one
+    deployment list, both limited to the apps by their label
+    """
+    aliases = {app.alias for app in apps}
+    selector = app_label_selector(*aliases)
+    pods = list_raw(kube_client.kube.list_namespaced_pod,
+                    namespace=namespace, prune=True, label_selector=selector)
+    deployments = list_raw(kube_client.appsv1_api.list_namespaced_deployment,
+                           namespace=namespace, prune=True, label_selector=selector)
+
+    app_pods = {alias: [] for alias in aliases}
+    for pod in pods.get("items", []):
+        alias = pod_app_alias(pod)
+        if alias in app_pods:
+            app_pods[alias].append(pod)
+
+    app_deployments = {
+        deployment["metadata"]["name"]: deployment
+        for deployment in deployments.get("items", [])
+    }
+
+    return [
+        compute_app_status(
+            app, app_pods.get(app.alias, []),
+            app_deployments.get(f"{app.alias}-deployment"), now)
+        for app in apps
+    ]
+
+
+def record_reconciler_stats(cluster_id, stats):
+    try:
+        get_redis().hset(
+            RECONCILER_STATS_KEY.format(cluster_id=cluster_id),
+            mapping={key: str(value) for key, value in stats.items()})
+    except Exception:
+        logger.exception('Exception occurred')
+
+
+def get_reconciler_stats():
+    stats = {}
+    for cluster in Cluster.find_all():
+        values = get_redis().hgetall(
+            RECONCILER_STATS_KEY.format(cluster_id=cluster.id))
+        stats[str(cluster.id)] = {
+            key.decode('utf-8'): value.decode('utf-8')
+            for key, value in values.items()
+        }
+    return stats
+
+
+def reconcile_cluster_app_statuses(cluster_id, scheduled_at=None):
+    """
+    reconcile the states of all apps on one cluster, one shard of the
+    periodic status check
+    """
+    from app.helpers.kube import get_kube_clients
+
+    started_at = time.time()
+    cluster = Cluster.get_by_id(cluster_id)
+    if not cluster:
+        return 0
+
+    apps = App.query.join(Project, App.project_id == Project.id).filter(
+        Project.cluster_id == cluster.id,
+        Project.deleted.isnot(True),
+        Project.deleting.isnot(True)
+    ).options(contains_eager(App.project)).all()
+
+    namespaces = {}
+    for app in apps:
+        namespaces.setdefault(app.project.alias, []).append(app)
+
+    kube_client = get_kube_clients(cluster)
+    now = datetime.now()
+    app_states = []
+    failed_namespaces = 0
+
+    for namespace, namespace_apps in namespaces.items():
+        try:
+            app_states.extend(reconcile_namespace(
+                kube_client, namespace, namespace_apps, now))
+        except Exception as e:
+            failed_namespaces += 1
+            logger.warning(
+                f'status check of namespace {namespace} failed: {str(e)}')
+            app_states.extend({
+                "app": app.id,
+                "status": "unknown",
+                "message": "Failed to connect to cluster with the application",
+                "failure_reason": "Cluster Connection failed",
+                "last_check": now
+            } for app in namespace_apps)
+
+    bulk_upsert_app_states(app_states)
+
+    finished_at = time.time()
+    stats = dict(
+        apps=len(app_states),
+        namespaces=len(namespaces),
+        failed_namespaces=failed_namespaces,
+        duration_seconds=round(finished_at - started_at, 3),
+        lag_seconds=round(started_at - (scheduled_at or started_at), 3),
+        finished_at=finished_at
+    )
+    record_reconciler_stats(cluster.id, stats)
+    logger.info(f'app status reconcile of cluster {cluster.id}: {stats}')
+    return len(app_states)
 
-    app_id = app_status_message["app"]
-    existing_state = AppState.find_first(app=app_id)
-    if existing_state:
-        # Update existing entry
-        existing_state.failure_reason = app_status_message.get(
-            "failure_reason", None)
-        existing_state.message = app_status_message["message"]
-        existing_state.status = app_status_message["status"]
-        existing_state.last_check = app_status_message.get(
-            "last_check", datetime.now())
-        # update
-        AppState.update(existing_state)
-    else:
-        # Create new entry
-        new_state = AppState(
-            app=app_id,
-            failure_reason=app_status_message.get("failure_reason", None),
-            message=app_status_message["message"],
-            status=app_status_message["status"],
-            last_check=app_status_message.get("last_check", datetime.now())
-        )
-        new_state.save()
 
-# This is currently not being used 
 def check_app_statuses():
-    from app.helpers.kube import create_kube_clients
-    projects = Project.query.all()
-    db = SQLAlchemy()
-    db.create_all()
-    # Iterate over each project
-    for project in projects:
-        print(f"Project ID: {project.id}, Name: {project.name}")
-
-        apps = App.query.filter_by(project_id=project.id).all()
-
-        cluster = Cluster.get_by_id(str(project.cluster_id))
-
-        for app in apps:
-            print(f"App ID: {app.id}, Name: {app.name}")
-
-            if app.disabled:
-                update_or_create_app_state({
-                    "app": app.id,
-                    "status": "failed",
-                    "message": f"Application is disabled",
-                    "failure_reason": "Disabled",
-                    "last_check": datetime.now()
-                })
-                continue
-
-            if not cluster:
-                update_or_create_app_state({
-                    "app": app.id,
-                    "status": "failed",
-                    "message": f"Application not connected to cluster",
-                    "failure_reason": "Cluster Connection failed",
-                    "last_check": datetime.now()
-                })
-                continue
-
-            try:
-                kube_host = cluster.host
-                kube_token = cluster.token
-                kube_client = create_kube_clients(kube_host, kube_token)
-
-            except Exception as e:
-                print(e)
-                update_or_create_app_state({
-                    "app": app.id,
-                    "status": "failed",
-                    "message": f"Failed to connect to cluster with the application",
-                    "failure_reason": "Cluster Connection failed",
-                    "last_check": datetime.now()
-                })
-                continue
-
-            pods = kube_client.kube.list_namespaced_pod(project.alias).items
-
-            replicas = kube_client.appsv1_api.list_namespaced_replica_set(
-                project.alias).to_dict()
-            replicasList = []
-
-            for replica in replicas['items']:
-                name = replica['metadata']['name']
-                if name.startswith(app.alias):
-                    replicasList.append(name)
-
-            podsList = []
-            for item in pods:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                pod_name = item['metadata']['name']
-                # to avoid repetition
-                added = False
-                for replica in replicasList:
-                    if pod_name.startswith(replica):
-                        podsList.append(item)
-                        added = True
-                        continue
-                if pod_name.startswith(app.alias) and not added:
-                    podsList.append(item)
-                    continue
-
-            custom_app_message = {
-                "app": app.id,
-                "last_check": datetime.now(),
-                "status": "failed",
-                "message": "",
-                "failure_reason": ""
-            }
-            for index, pod_log in enumerate(podsList):
-                pod_name = pod_log["metadata"]["name"]
-                pod_status = pod_log["status"]["phase"]
-
-                if pod_status == "Running":
-                    custom_app_message["status"] = "running"
-                    custom_app_message["message"] += f"pod:{index} - is running.\n"
-                else:
-                    container_statuses = pod_log["status"].get(
-                        "containerStatuses", [])
-                    if container_statuses:
-                        for container_status in container_statuses:
-                            reason = container_status["state"]["waiting"]["reason"]
-                            message = container_status["state"]["waiting"]["message"]
-                            # Add message with newline
-                            custom_app_message["message"] += f"pod:{index} - down, Message:{message}."
-                            custom_app_message["failure_reason"] += f"pod:{index} - {reason}."
-                    else:
-                        custom_app_message["message"] += f"Failed to access pod:{index} status. "
-                        custom_app_message["failure_reason"] += f"pod:{index} - Unknown. "
-
-            update_or_create_app_state(custom_app_message)
+    """
+    reconcile every cluster in turn, the periodic task runs the clusters
+    as separate shards instead
+    """
+    for cluster in Cluster.find_all():
+        reconcile_cluster_app_statuses(cluster.id)
     return True
@@ -0,0 +1,302 @@
+import datetime
+import threading
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from flask import current_app, render_template
+from kubernetes import client
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.helpers.activity_logger import log_activity
+from app.helpers.crane_app_logger import logger
+from app.helpers.email import send_email
+from app.helpers.kube_patch import scale_deployment
+from app.helpers.metrics import ContextThreadPoolExecutor
+from app.models import db
+from app.models.app import App
+from app.models.operation import Operation
+from app.models.project import Project
+from app.models.user import User
+
+DISABLE_QUOTA_NAME = 'disable-quota'
+
+# operations run by run_bulk_operation
+BULK_OPERATION_TYPES = ('disable_user', 'enable_user')
+
+
+def disable_quota(namespace):
+    """
+    resource quota that keeps a disabled project's namespace from running pods
+    """
+    return client.V1ResourceQuota(
+        api_version="v1",
+        kind="ResourceQuota",
+        metadata=client.V1ObjectMeta(
+            name=DISABLE_QUOTA_NAME, namespace=namespace),
+        spec=client.V1ResourceQuotaSpec(
+            hard={
+                "requests.cpu": "0",
+                "requests.memory": "0",
+                "limits.cpu": "0",
+                "limits.memory": "0"
+            }
+        )
+    )
+
+
+def _ignoring(statuses, call):
+    """
+    call that succeeds when the kube call fails with one of statuses, so
+    that a resumed job can repeat work that was already done
+    """
+    def run(kube_client):
+        try:
+            call(kube_client)
+        except client.rest.ApiException as e:
+            if e.status not in statuses:
+                raise
+    return run
+
+
+def project_stages(project, disable):
+    """
+    kube calls that disable or enable a project, in stages that run one
+    after the other. The calls within a stage run concurrently.
+    """
+    namespace = project.alias
+    scale_calls = [
+        _ignoring((404,), lambda kube_client, name=f'{app.alias}-deployment',
+                  replicas=0 if disable else app.replicas:
+                  scale_deployment(kube_client, name, namespace, replicas))
+        for app in project.apps
+    ]
+
+    if disable:
+        create_quota = _ignoring((404, 409), lambda kube_client: (
+            kube_client.kube.create_namespaced_resource_quota(
+                namespace, disable_quota(namespace))))
+        return [scale_calls + [create_quota]]
+
+    # the quota goes first so the scaled up pods aren't turned away
+    delete_quota = _ignoring((404,), lambda kube_client: (
+        kube_client.kube.delete_namespaced_resource_quota(
+            name=DISABLE_QUOTA_NAME, namespace=namespace)))
+    return [[delete_quota], scale_calls]
+
+
+def commit_project_states(project_ids, disable, is_admin=False, user=None):
+    """
+    mark the projects, their apps and optionally their owner disabled or
+    enabled in a single transaction
+    """
+    values = dict(disabled=disable)
+    if not disable:
+        values['admin_disabled'] = False
+    elif is_admin:
+        values['admin_disabled'] = True
+
+    try:
+        if project_ids:
+            App.query.filter(App.project_id.in_(project_ids)).update(
+                values, synchronize_session=False)
+            Project.query.filter(Project.id.in_(project_ids)).update(
+                values, synchronize_session=False)
+        if user is not None:
+            user.disabled = disable
+            db.session.add(user)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+
+
+def set_projects_state(projects, disable, is_admin=False, user=None, progress=None,
+                       cluster_concurrency=None):
+    """
+    disable or enable projects by scaling all their apps, grouped by
+    cluster. Every cluster runs up to cluster_concurrency kube calls at a
+    time and the clusters are worked on at the same time. The projects
+    that succeed are then committed in one transaction, together with the
+    user when every project succeeded.
+
+    progress is called from this thread with (project, error) as each
+    project finishes. Returns (succeeded project ids, {project id: error}).
+    """
+    from app.helpers.kube import get_kube_clients
+
+    cluster_concurrency = cluster_concurrency or current_app.config.get(
+        'BULK_OPERATION_CLUSTER_CONCURRENCY', 10)
+
+    kube_clients = {}
+    semaphores = {}
+    for project in projects:
+        if project.cluster_id not in kube_clients:
+            kube_clients[project.cluster_id] = get_kube_clients(project.cluster)
+            semaphores[project.cluster_id] = threading.Semaphore(
+                cluster_concurrency)
+
+    def run_call(cluster_id, call):
+        with semaphores[cluster_id]:
+            call(kube_clients[cluster_id])
+
+    stages = {project.id: project_stages(project, disable) for project in projects}
+    pending_calls = {}
+    errors = {}
+    succeeded = []
+
+    workers = max(min(cluster_concurrency * len(kube_clients),
+                      sum(len(project.apps) + 1 for project in projects)), 1)
+    with ContextThreadPoolExecutor(max_workers=workers) as executor:
+        running = {}
+
+        def start_next_stage(project):
+            while stages[project.id]:
+                calls = stages[project.id].pop(0)
+                if calls:
+                    pending_calls[project.id] = len(calls)
+                    for call in calls:
+                        running[executor.submit(
+                            run_call, project.cluster_id, call)] = project
+                    return True
+            return False
+
+        def finish(project):
+            if project.id not in errors:
+                succeeded.append(project.id)
+            if progress:
+                progress(project, errors.get(project.id))
+
+        for project in projects:
+            if not start_next_stage(project):
+                finish(project)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                project = running.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.exception('Exception occurred')
+                    errors[project.id] = str(getattr(e, 'body', None) or e)
+
+                pending_calls[project.id] -= 1
+                if pending_calls[project.id]:
+                    continue
+                if project.id in errors or not start_next_stage(project):
+                    finish(project)
+
+    commit_project_states(
+        succeeded, disable, is_admin, user=None if errors else user)
+    return succeeded, errors
+
+
+def queue_bulk_operation(operation_type, user_id, **params):
+    """
+    record a bulk operation and leave it to a celery worker
+    """
+    from app.tasks import bulk_operation
+
+    operation = Operation(
+        operation_type=operation_type,
+        status=Operation.PENDING,
+        user_id=user_id,
+        params=params,
+        steps=[]
+    )
+    if not operation.save():
+        return None
+    bulk_operation.delay(str(operation.id))
+    return operation
+
+
+def run_bulk_operation(operation_id):
+    """
+    disable or enable a user together with all their projects. Projects
+    already in the wanted state are skipped, so a job that was cut short
+    resumes where it stopped when it is run again.
+    """
+    operation = Operation.get_by_id(operation_id)
+    if not operation or operation.status in (Operation.SUCCEEDED, Operation.FAILED):
+        return False
+
+    disable = operation.operation_type == 'disable_user'
+    action = 'disable' if disable else 'enable'
+    user = User.get_by_id(operation.params['user_id'])
+    if not user:
+        return operation.set_status(
+            Operation.FAILED, message=f'User with id {operation.params["user_id"]} not found')
+
+    operation.set_status(Operation.RUNNING)
+    projects = [project for project in user.projects
+                if bool(project.disabled) != disable]
+
+    for project in projects:
+        operation.set_step(f'project {project.name}', 'running',
+                           project_id=str(project.id))
+
+    def progress(project, error):
+        operation.set_step(f'project {project.name}',
+                           'failed' if error else 'succeeded', error)
+
+    try:
+        succeeded, errors = set_projects_state(
+            projects, disable, user=user, progress=progress)
+    except Exception as e:
+        logger.exception('Exception occurred')
+        return operation.set_status(Operation.FAILED, message=str(e))
+
+    for project in projects:
+        if project.id in succeeded:
+            log_activity('Project', status='Success',
+                         operation=action.capitalize(),
+                         description=f'{action.capitalize()}d project Successfully',
+                         a_project=project,
+                         a_cluster_id=project.cluster_id,
+                         user_id=operation.user_id)
+
+    result = dict(projects=len(projects), failed_projects=len(errors))
+    if errors:
+        log_activity('User', status='Failed',
+                     operation=action.capitalize(),
+                     description=f'Failed to {action} {len(errors)} projects',
+                     a_user_id=user.id,
+                     user_id=operation.user_id)
+        return operation.set_status(
+            Operation.FAILED, message=f'Failed to {action} {len(errors)} projects',
+            result=result)
+
+    log_activity('User', status='Success',
+                 operation=action.capitalize(),
+                 description=f'{action.capitalize()}d user Successfully',
+                 a_user_id=user.id,
+                 user_id=operation.user_id)
+    try:
+        html_layout = render_template(
+            'user/user_disable_enable.html',
+            email=user.email,
+            name=user.name,
+            status='disabled' if disable else 'enabled')
+        send_email(
+            user.email,
+            'Status of your account',
+            html_layout,
+            current_app.config["MAIL_DEFAULT_SENDER"],
+            current_app._get_current_object(),
+        )
+    except Exception:
+        logger.exception('Exception occurred')
+
+    return operation.set_status(Operation.SUCCEEDED, result=result)
+
+
+def find_stale_operations(stale_seconds):
+    """
+    bulk operations that haven't progressed in stale_seconds, their worker
+    went away before finishing them
+    """
+    cutoff = datetime.datetime.now() - datetime.timedelta(seconds=stale_seconds)
+    return Operation.query.filter(
+        Operation.operation_type.in_(BULK_OPERATION_TYPES),
+        Operation.status.in_([Operation.PENDING, Operation.RUNNING]),
+        Operation.date_updated < cutoff
+    ).all()
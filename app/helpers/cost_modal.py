@@ -1,6 +1,7 @@
 from logging import warning
 import string
 import requests
+from flask import current_app
 
 # Using kubecost allocation API
 # https://guide.kubecost.com/hc/en-us/articles/4407595916823-Allocation-API
@@ -14,9 +15,18 @@ def get_ug_currency(usd_amount):
     return round(rate * usd_amount, -2)
 
 
+def http_timeout():
+    """
+    (connect, read) timeout for calls to the services running on clusters
+    """
+    return (current_app.config.get('HTTP_CONNECT_TIMEOUT', 5),
+            current_app.config.get('HTTP_READ_TIMEOUT', 30))
+
+
 class CostModal:
-    def __init__(self, base_url):
+    def __init__(self, base_url, timeout=None):
         self.base_url = base_url
+        self.timeout = timeout or http_timeout()
 
     def set_respose(self, response, not_series, show_deployments, namespace):
         response.raise_for_status()
@@ -94,7 +104,7 @@ class CostModal:
 
             stripped_query = query.translate(
                 str.maketrans("", "", string.whitespace))
-            response = requests.get(stripped_query)
+            response = requests.get(stripped_query, timeout=self.timeout)
             return self.set_respose(response, not_series, show_deployments, namespace)
         except Exception as error:
             print(error)
@@ -110,7 +120,7 @@ class CostModal:
                 &filterDepoyments={deployment}"""
             stripped_query = query.translate(
                 str.maketrans("", "", string.whitespace))
-            response = requests.get(stripped_query)
+            response = requests.get(stripped_query, timeout=self.timeout)
             return self.set_respose(response)
         except requests.exceptions.HTTPError as error:
             print(error)
@@ -0,0 +1,213 @@
+from datetime import date, datetime, timedelta
+from itertools import chain
+
+from flask import current_app, has_app_context
+from sqlalchemy import Date, and_, cast, column, event, func, inspect, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.helpers.crane_app_logger import logger
+from app.helpers.redis_client import get_redis
+from app.models import db
+from app.models.app import App
+from app.models.creation_rollup import CreationRollup
+from app.models.project import Project
+from app.models.user import User
+
+# days whose user flags changed since the rollup last counted them
+STALE_DAYS_KEY = 'creation_rollup:stale_days'
+# set when bulk updates or deletes changed days that can't be told apart
+STALE_ALL_KEY = 'creation_rollup:stale_all'
+
+# user columns the rollup counts besides the creation day
+ROLLUP_FLAGS = ('verified', 'is_beta_user')
+
+ROLLUP_MODELS = {
+    'users': User,
+    'projects': Project,
+    'apps': App,
+}
+
+# what a chart can count on each day
+ROLLUP_VALUES = {
+    'created': CreationRollup.created,
+    'verified': CreationRollup.verified,
+    'unverified': CreationRollup.created - CreationRollup.verified,
+    'beta': CreationRollup.beta,
+    'not_beta': CreationRollup.created - CreationRollup.beta,
+}
+
+
+def rollup_entity(model):
+    """
+    name of a model in the rollup, None for models that aren't rolled up
+    """
+    return next((entity for entity, rolled_up in ROLLUP_MODELS.items()
+                 if rolled_up is model), None)
+
+
+def days_filter(day, since=None, days=()):
+    conditions = []
+    if since is not None:
+        conditions.append(day >= since)
+    if days:
+        conditions.append(day.in_(list(days)))
+    return or_(*conditions) if conditions else None
+
+
+def refresh_creation_rollup(since=None, days=()):
+    """
+    count again the users, projects and apps created on each day from since
+    on and on the given days, or on every day when given neither. Soft
+    deleted rows are counted, they were created all the same.
+    """
+    for entity, model in ROLLUP_MODELS.items():
+        day = cast(model.date_created, Date)
+        flags = [func.count().filter(User.verified == True),
+                 func.count().filter(User.is_beta_user == True)] \
+            if model is User else [literal(0), literal(0)]
+
+        counts = select([literal(entity), day, func.count()] + flags).where(
+            model.date_created.isnot(None)).group_by(day)
+        stale_rows = CreationRollup.__table__.delete().where(
+            CreationRollup.entity == entity)
+
+        source_days = days_filter(day, since, days)
+        if source_days is not None:
+            counts = counts.where(source_days)
+            stale_rows = stale_rows.where(
+                days_filter(CreationRollup.day, since, days))
+
+        db.session.execute(stale_rows)
+        db.session.execute(CreationRollup.__table__.insert().from_select(
+            ['entity', 'day', 'created', 'verified', 'beta'], counts))
+    db.session.commit()
+
+
+def parse_day(day):
+    return datetime.strptime(day, '%Y-%m-%d').date()
+
+
+def refresh_recent_creations():
+    """
+    count again the last few days, and older days whose users have been
+    verified, made beta users or deleted since. Every day is counted again
+    after bulk updates or deletes.
+    """
+    stale_days = set()
+    stale_all = False
+    try:
+        stale_all = bool(get_redis().delete(STALE_ALL_KEY))
+        while True:
+            popped = get_redis().spop(STALE_DAYS_KEY, 100)
+            if not popped:
+                break
+            stale_days.update(parse_day(day.decode('utf-8')) for day in popped)
+    except Exception:
+        logger.exception('Exception occurred')
+
+    since = None if stale_all else date.today() - timedelta(
+        days=current_app.config.get('CREATION_ROLLUP_REFRESH_DAYS', 2))
+    try:
+        if stale_all:
+            refresh_creation_rollup()
+        else:
+            refresh_creation_rollup(since=since, days=stale_days)
+    except Exception:
+        # counted again on the next run
+        db.session.rollback()
+        if stale_all:
+            get_redis().set(STALE_ALL_KEY, 1)
+        if stale_days:
+            get_redis().sadd(
+                STALE_DAYS_KEY, *[day.isoformat() for day in stale_days])
+        raise
+    return dict(since=since.isoformat() if since else None,
+                stale_days=len(stale_days))
+
+
+def creation_graph_data(entity, start, end, set_by, value='created'):
+    """
+    creations per month, or per year, between start and end read from the
+    rollup, so the cost grows with the days rather than the rows counted
+    """
+    unit = 'month' if set_by == 'month' else 'year'
+    point = column(unit)
+
+    rows = db.session.query(
+        point, func.coalesce(func.sum(ROLLUP_VALUES[value]), 0)
+    ).select_from(func.generate_series(start, end, f'1 {unit}').alias(unit)).\
+        outerjoin(CreationRollup, and_(
+            CreationRollup.entity == entity,
+            func.date_trunc(unit, CreationRollup.day) == point)).\
+        group_by(point).\
+        order_by(point).\
+        all()
+
+    return [{'year': item[0].year, 'month': item[0].month, 'value': item[1]}
+            for item in rows]
+
+
+def flags_changed(obj):
+    state = inspect(obj)
+    return any(state.attrs[flag].history.has_changes() for flag in ROLLUP_FLAGS)
+
+
+def track_rollup_changes(session, flush_context):
+    stale = session.info.setdefault('stale_rollup_days', set())
+    deleted = set(session.deleted)
+    for obj in chain(session.dirty, deleted):
+        if rollup_entity(type(obj)) is None:
+            continue
+        if obj not in deleted and not (isinstance(obj, User) and flags_changed(obj)):
+            continue
+        # the row may be gone, only its loaded day is read
+        date_created = inspect(obj).dict.get('date_created')
+        if date_created:
+            stale.add(date_created.date().isoformat())
+        elif obj in deleted:
+            session.info['stale_rollup_all'] = True
+
+
+def track_bulk_rollup_changes(context):
+    # Query.update and Query.delete skip the flush, and which rows they
+    # changed isn't known, so every day is counted again
+    model = context.mapper.class_
+    if rollup_entity(model) is None:
+        return
+    values = getattr(context, 'values', None)
+    if values is not None and not any(
+            getattr(column, 'key', column) in ROLLUP_FLAGS for column in values):
+        return
+    context.session.info['stale_rollup_all'] = True
+
+
+def record_stale_days(session):
+    stale = session.info.pop('stale_rollup_days', None)
+    stale_all = session.info.pop('stale_rollup_all', False)
+    if (stale or stale_all) and has_app_context():
+        try:
+            if stale_all:
+                get_redis().set(STALE_ALL_KEY, 1)
+            if stale:
+                get_redis().sadd(STALE_DAYS_KEY, *stale)
+        except Exception:
+            logger.exception('Exception occurred')
+
+
+def discard_stale_days(session):
+    session.info.pop('stale_rollup_days', None)
+    session.info.pop('stale_rollup_all', None)
+
+
+def init_creation_rollup(app):
+    """
+    note the days whose counts of verified and beta users change, or whose
+    rows are deleted, for the next refresh of the rollup
+    """
+    for name, listener in (('after_flush', track_rollup_changes),
+                           ('after_bulk_update', track_bulk_rollup_changes),
+                           ('after_bulk_delete', track_bulk_rollup_changes),
+                           ('after_commit', record_stale_days),
+                           ('after_rollback', discard_stale_days)):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
@@ -0,0 +1,72 @@
+import base64
+import hashlib
+
+import orjson
+from cryptography.fernet import Fernet, InvalidToken
+from flask import current_app
+
+from app.helpers.redis_client import get_redis
+
+DEPLOY_CREDENTIALS_KEY = 'deploy_credentials:{operation_id}'
+
+# registry credentials of an app payload, kept out of celery messages
+CREDENTIAL_FIELDS = ('docker_username', 'docker_password', 'docker_email')
+
+
+def credentials_cipher():
+    # a Fernet key derived from the app's secret key
+    secret = current_app.config.get('SECRET_KEY') or ''
+    return Fernet(base64.urlsafe_b64encode(
+        hashlib.sha256(secret.encode('utf-8')).digest()))
+
+
+def strip_credentials(app_data):
+    """
+    copy of an app payload without its registry credentials, and the
+    credentials taken out of it
+    """
+    stripped = {key: value for key, value in app_data.items()
+                if key not in CREDENTIAL_FIELDS}
+    credentials = {key: app_data[key] for key in CREDENTIAL_FIELDS
+                   if app_data.get(key) is not None}
+    return stripped, credentials
+
+
+def stash_credentials(operation_id, apps_data):
+    """
+    take the registry credentials out of the app payloads of an operation
+    and keep them encrypted in redis until a worker claims them. Returns
+    the payloads without them, raises if they can't be kept.
+    """
+    stripped_apps, credentials = [], []
+    for app_data in apps_data:
+        stripped, app_credentials = strip_credentials(app_data)
+        stripped_apps.append(stripped)
+        credentials.append(app_credentials)
+
+    if any(credentials):
+        get_redis().set(
+            DEPLOY_CREDENTIALS_KEY.format(operation_id=operation_id),
+            credentials_cipher().encrypt(orjson.dumps(credentials)),
+            ex=current_app.config.get('DEPLOY_CREDENTIALS_SECONDS', 86400))
+    return stripped_apps
+
+
+def claim_credentials(operation_id, apps_data):
+    """
+    put the credentials stashed for an operation back into its app
+    payloads, they are deleted from redis once claimed
+    """
+    key = DEPLOY_CREDENTIALS_KEY.format(operation_id=operation_id)
+    redis = get_redis()
+    stashed = redis.get(key)
+    if not stashed:
+        return apps_data
+    redis.delete(key)
+
+    try:
+        credentials = orjson.loads(credentials_cipher().decrypt(stashed))
+    except InvalidToken:
+        raise ValueError('registry credentials could not be read')
+    return [dict(app_data, **app_credentials)
+            for app_data, app_credentials in zip(apps_data, credentials)]
@@ -0,0 +1,53 @@
+def build_deployment_graph(apps_data):
+    """
+    dependencies of each app in a multi-app payload, the apps named as
+    values of its dependant_env_vars that are part of the same payload.
+    Raises ValueError for duplicate app names and dependency cycles.
+    """
+    names = [app['name'] for app in apps_data]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f'Duplicate app names: {", ".join(duplicates)}')
+
+    graph = {}
+    for app in apps_data:
+        dependencies = (app.get('dependant_env_vars') or {}).values()
+        graph[app['name']] = {
+            dependency for dependency in dependencies if dependency in names}
+
+    deployment_levels(graph)
+    return graph
+
+
+def deployment_levels(graph):
+    """
+    group the apps into levels that only depend on earlier levels, in
+    payload order within a level. Raises ValueError if the graph has a
+    cycle, naming the apps on it.
+    """
+    remaining = {name: set(dependencies)
+                 for name, dependencies in graph.items()}
+    levels = []
+    while remaining:
+        level = [name for name, dependencies in remaining.items()
+                 if not dependencies]
+        if not level:
+            raise ValueError(
+                f'Dependency cycle between apps: {", ".join(sorted(remaining))}')
+        levels.append(level)
+        for name in level:
+            del remaining[name]
+        for dependencies in remaining.values():
+            dependencies.difference_update(level)
+    return levels
+
+
+def dependants_of(graph):
+    """
+    reverse of the graph, the apps waiting on each app
+    """
+    dependants = {name: [] for name in graph}
+    for name, dependencies in graph.items():
+        for dependency in dependencies:
+            dependants[dependency].append(name)
+    return dependants
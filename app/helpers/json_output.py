@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+import orjson
+from flask import current_app, make_response
+
+# json.dumps, which flask-restful used, wrote non string keys as strings
+OUTPUT_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def default(obj):
+    # flask's encoder wrote decimals as strings, orjson doesn't know them
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+
+def output_json(data, code, headers=None):
+    """
+    flask-restful representation encoding the response data straight to
+    bytes with orjson, UUIDs and datetimes included, so views can return
+    what their schemas dump as it is
+    """
+    options = OUTPUT_OPTIONS
+    if current_app.debug:
+        options |= orjson.OPT_INDENT_2
+
+    resp = make_response(orjson.dumps(data, default=default, option=options), code)
+    resp.headers.extend(headers or {})
+    resp.mimetype = 'application/json'
+    return resp
@@ -9,47 +9,230 @@ from app.models.user import User
 from app.models.project import Project
 from kubernetes import client
 import base64
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
 import json
 from app.helpers.activity_logger import log_activity
 from app.helpers.clean_up import resource_clean_up
 from app.helpers.url import get_app_subdomain
 from app.helpers.crane_app_logger import logger
+from app.helpers.deployment_graph import build_deployment_graph, dependants_of
+from app.helpers.kube_registry import build_kube_clients, kube_client_registry
+from app.helpers.kube_health import circuit_breakers, ensure_cluster_reachable
+from app.helpers.metrics import ContextThreadPoolExecutor
+from app.helpers.kube_raw import list_raw, prune_object
+from app.helpers.app_discovery import app_label_selector
+from app.helpers.kube_patch import (add_ingress_rule, container_patch, env_vars_patch, patch_deployment,
+                                    patch_service, replace_list, scale_deployment)
+from app.helpers.kube_informer import INFORMER_KINDS, kube_informers, parse_label_selector
+from app.helpers.pagination import paginate, cursor_pagination, decode_cursor
 
 
 def create_kube_clients(kube_host=os.getenv('KUBE_HOST'), kube_token=os.getenv('KUBE_TOKEN')):
-    # configure client
-    config = client.Configuration()
-    config.host = kube_host
-    config.api_key['authorization'] = kube_token
-    config.api_key_prefix['authorization'] = 'Bearer'
-    config.verify_ssl = False
-    # config.assert_hostname = False
-
-    # create API instance
-    api_client = client.ApiClient()
-    kube = client.CoreV1Api(client.ApiClient(config))
-    # extension_api = client.ExtensionsV1beta1Api(client.ApiClient(config))
-    appsv1_api = client.AppsV1Api(client.ApiClient(config))
-    batchv1_api = client.BatchV1Api(client.ApiClient(config))
-    storageV1Api = client.StorageV1Api(client.ApiClient(config))
-    networking_api = client.NetworkingV1Api(client.ApiClient(config))
-
-    # return kube, extension_api, appsv1_api, api_client, batchv1_api, storageV1Api
-    return SimpleNamespace(
-        kube=kube,
-        # extension_api=extension_api,
-        networking_api=networking_api,
-        appsv1_api=appsv1_api,
-        api_client=api_client,
-        batchv1_api=batchv1_api,
-        storageV1Api=storageV1Api
+    """
+    create a one-off set of clients, prefer get_kube_clients for
+    registered clusters so that connections are reused across requests
+    """
+    return build_kube_clients(kube_host, kube_token, timeout=kube_timeout())
+
+
+def kube_timeout():
+    return (current_app.config.get('KUBE_CONNECT_TIMEOUT', 5),
+            current_app.config.get('KUBE_READ_TIMEOUT', 30))
+
+
+def get_kube_clients(cluster):
+    """
+    get the shared, pooled clients for a registered cluster. Raises
+    ClusterUnavailable, a 503 ApiException, when the health probe last
+    found the cluster down.
+    """
+    ensure_cluster_reachable(cluster.id)
+    breaker = circuit_breakers.get(
+        cluster.id,
+        failure_threshold=current_app.config.get('KUBE_CIRCUIT_FAILURE_THRESHOLD', 5),
+        reset_seconds=current_app.config.get('KUBE_CIRCUIT_RESET_SECONDS', 30))
+    return kube_client_registry.get(
+        cluster.id, cluster.host, cluster.token,
+        pool_maxsize=current_app.config.get('KUBE_CLIENT_POOL_MAXSIZE'),
+        breaker=breaker, timeout=kube_timeout())
+
+
+def get_cluster_objects_page(cluster, kube_client, kind, page, per_page,
+                             namespace=None, label_selector=None, cursor=None,
+                             prune=False):
+    """
+    get a page of one kind of cluster object as plain dicts, served from
+    the cluster's informer when it is enabled and synced, otherwise read
+    live from the API server. Passing a cursor (an empty one for the first
+    page) pages through the API server with limit/continue instead.
+    With prune, bulky metadata such as managedFields is left out.
+    """
+    list_kwargs = {}
+    # the same filters for the informer, namespaces and nodes aren't in one
+    store_filters = {}
+    if label_selector:
+        list_kwargs['label_selector'] = label_selector
+    if namespace:
+        if kind == 'namespaces':
+            list_kwargs['field_selector'] = f'metadata.name={namespace}'
+            store_filters['name'] = namespace
+        elif kind != 'nodes':
+            list_kwargs['field_selector'] = f'metadata.namespace={namespace}'
+            store_filters['namespace'] = namespace
+
+    api_name, function_name = INFORMER_KINDS[kind]
+    list_function = getattr(getattr(kube_client, api_name), function_name)
+
+    if cursor is not None:
+        return get_cluster_objects_cursor_page(
+            list_function, per_page, cursor, prune=prune, **list_kwargs)
+
+    labels = parse_label_selector(label_selector)
+
+    if current_app.config.get('KUBE_INFORMERS_ENABLED') and labels is not None:
+        informer = kube_informers.get(
+            cluster.id, cluster.host, cluster.token,
+            watch_timeout=current_app.config.get('KUBE_INFORMER_WATCH_TIMEOUT'))
+        store = informer.stores[kind]
+        if store.synced:
+            pagination, items = paginate(
+                store.list(labels=labels, **store_filters), per_page, page)
+            if prune:
+                items = [prune_object(item) for item in items]
+            freshness = dict(
+                source='informer',
+                synced_at=store.synced_at,
+                resource_version=store.resource_version
+            )
+            return pagination, items, freshness
+
+    body = list_raw(list_function, **list_kwargs)
+    pagination, items = paginate(body.get('items', []), per_page, page)
+    if prune:
+        items = [prune_object(item) for item in items]
+    freshness = dict(
+        source='live',
+        synced_at=time.time(),
+        resource_version=body.get('metadata', {}).get('resourceVersion')
     )
+    return pagination, items, freshness
 
 
-def deploy_user_app(kube_client, project: Project, user: User, app: App = None, app_data={}):
+def get_cluster_objects_cursor_page(list_function, per_page, cursor, prune=False,
+                                    **list_kwargs):
+    """
+    fetch a single page from the API server with limit/continue, only the
+    page is transferred and it is kept as the raw JSON dicts
+    """
+    cursor_data = decode_cursor(cursor)
+    if cursor_data.get('continue_token'):
+        list_kwargs['_continue'] = cursor_data['continue_token']
+
+    body = list_raw(list_function, prune=prune, limit=per_page, **list_kwargs)
+    metadata = body.get('metadata', {})
+    items = body.get('items', [])
+
+    pagination = cursor_pagination(
+        items, per_page, cursor_data.get('seen', 0),
+        metadata.get('continue'), metadata.get('remainingItemCount'))
+    freshness = dict(
+        source='live',
+        synced_at=time.time(),
+        resource_version=metadata.get('resourceVersion')
+    )
+    return pagination, items, freshness
+
+
+# (label in ClusterDetailView, informer kind)
+RESOURCE_COUNT_KINDS = [
+    ('nodes', 'nodes'),
+    ('PVCs', 'pvcs'),
+    ('pods', 'pods'),
+    ('services', 'services'),
+    ('deployments', 'deployments'),
+    ('namespaces', 'namespaces'),
+]
+
+_resource_count_cache = {}
+_resource_count_lock = threading.Lock()
+
+
+def count_cluster_objects(list_function):
+    """
+    count one kind of object with a limit=1 list, the API server reports
+    the rest in remainingItemCount so only a single item is transferred
+    """
+    body = list_raw(list_function, limit=1)
+    metadata = body.get('metadata', {})
+    count = len(body.get('items', []))
+    if not metadata.get('continue'):
+        return count
+    if metadata.get('remainingItemCount') is not None:
+        return count + metadata['remainingItemCount']
+
+    # no estimate from the server, page through in large chunks
+    continue_token = metadata['continue']
+    while continue_token:
+        body = list_raw(list_function, limit=500, _continue=continue_token)
+        count += len(body.get('items', []))
+        continue_token = body.get('metadata', {}).get('continue')
+    return count
+
+
+def get_cluster_resource_counts(cluster, kube_client):
+    """
+    counts of the main object kinds in a cluster, fetched concurrently
+    and cached per cluster for KUBE_RESOURCE_COUNT_TTL seconds
     """
-    deploy an application
+    ttl = current_app.config.get('KUBE_RESOURCE_COUNT_TTL', 0)
+    key = str(cluster.id)
+
+    with _resource_count_lock:
+        cached = _resource_count_cache.get(key)
+    if cached and time.time() - cached[0] < ttl:
+        return cached[1]
+
+    stores = {}
+    if current_app.config.get('KUBE_INFORMERS_ENABLED'):
+        stores = kube_informers.get(
+            cluster.id, cluster.host, cluster.token,
+            watch_timeout=current_app.config.get('KUBE_INFORMER_WATCH_TIMEOUT')).stores
+
+    def count_kind(kind):
+        store = stores.get(kind)
+        if store and store.synced:
+            return len(store.list())
+        api_name, function_name = INFORMER_KINDS[kind]
+        return count_cluster_objects(
+            getattr(getattr(kube_client, api_name), function_name))
+
+    with ContextThreadPoolExecutor(max_workers=len(RESOURCE_COUNT_KINDS)) as executor:
+        counts = list(executor.map(
+            count_kind, [kind for _, kind in RESOURCE_COUNT_KINDS]))
+
+    resource_count = [
+        dict(name=name, count=count)
+        for (name, _), count in zip(RESOURCE_COUNT_KINDS, counts)
+    ]
+
+    with _resource_count_lock:
+        _resource_count_cache[key] = (time.time(), resource_count)
+    return resource_count
+
+
+def deploy_user_app(kube_client, project: Project, user: User, app: App = None, app_data={},
+                    progress=None):
     """
+    deploy an application, progress is called with (step, status, message)
+    as each step of the deployment starts and finishes
+    """
+
+    def report_progress(step, status, message=None):
+        if progress:
+            progress(step, status, message)
 
     resource_registry = {
         'db_deployment': False,
@@ -84,13 +267,16 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
     docker_password = app_data.get('docker_password', None)
     # should be a docker hub image
     if 'gcr' not in docker_server:
+        report_progress('image_check', 'running')
         validate_docker_image = docker_image_checker(
             app_image, docker_password, project)
         if validate_docker_image != True:
+            report_progress('image_check', 'failed', validate_docker_image)
             return SimpleNamespace(
                 message=validate_docker_image,
                 status_code=404
             )
+        report_progress('image_check', 'succeeded')
 
     app_alias = create_alias(app_name)
     command_string = app_data.get('command', None)
@@ -137,20 +323,25 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
                 private_image=private_repo
             )
 
-        if private_repo:
-            image_pull_secret = create_docker_pull_secret(
-                kube_client=kube_client,
-                app_alias=app_alias,
-                namespace=namespace,
-                docker_username=docker_username,
-                docker_password=docker_password,
-                docker_email=docker_email,
-                docker_server=docker_server
-            )
-            # update registry
-            resource_registry['image_pull_secret'] = True
+        # the pull secret, the PVC and the service don't depend on each
+        # other or on the deployment, so they are created concurrently
+        system_docker_email = current_app.config['SYSTEM_DOCKER_EMAIL']
+        system_docker_password = current_app.config['SYSTEM_DOCKER_PASSWORD']
+        system_docker_server = current_app.config['SYSTEM_DOCKER_SERVER']
+        kube_service_port = int(current_app.config['KUBE_SERVICE_PORT'])
+
+        def create_pull_secret():
+            if private_repo:
+                return create_docker_pull_secret(
+                    kube_client=kube_client,
+                    app_alias=app_alias,
+                    namespace=namespace,
+                    docker_username=docker_username,
+                    docker_password=docker_password,
+                    docker_email=docker_email,
+                    docker_server=docker_server
+                )
 
-        elif current_app.config['SYSTEM_DOCKER_EMAIL'] and current_app.config['SYSTEM_DOCKER_PASSWORD']:
             DEFAULT_NAMESPACE = namespace
             DEFAULT_APP_NAME = 'cranecloud-app'
             try:
@@ -158,23 +349,56 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
                     DEFAULT_APP_NAME, DEFAULT_NAMESPACE)
             except client.rest.ApiException as e:
                 if e.status == 404:
-                    image_pull_secret = create_docker_pull_secret(
+                    return create_docker_pull_secret(
                         kube_client=kube_client,
                         app_alias=DEFAULT_APP_NAME,
                         namespace=DEFAULT_NAMESPACE,
-                        docker_username=current_app.config['SYSTEM_DOCKER_EMAIL'],
-                        docker_password=current_app.config['SYSTEM_DOCKER_PASSWORD'],
-                        docker_email=current_app.config['SYSTEM_DOCKER_EMAIL'],
-                        docker_server=current_app.config['SYSTEM_DOCKER_SERVER']
+                        docker_username=system_docker_email,
+                        docker_password=system_docker_password,
+                        docker_email=system_docker_email,
+                        docker_server=system_docker_server
                     )
-                else:
-                    raise
+                raise
+            return None
 
-            # update registry
-            resource_registry['image_pull_secret'] = True
+        # create service in the cluster
+        service_name = f'{app_alias}-service'
 
-         # create deployment
-        dep_name = f'{app_alias}-deployment'
+        def create_app_service():
+            service_meta = client.V1ObjectMeta(
+                name=service_name,
+                labels={'app': app_alias}
+            )
+
+            service_spec = client.V1ServiceSpec(
+                type='ClusterIP',
+                ports=[client.V1ServicePort(
+                    port=kube_service_port, target_port=app_port)],
+                selector={'app': app_alias}
+            )
+
+            service = client.V1Service(
+                metadata=service_meta,
+                spec=service_spec)
+
+            try:
+                kube_client.kube.create_namespaced_service(
+                    namespace=namespace,
+                    body=service,
+                    _preload_content=False
+                )
+            except client.rest.ApiException as e:
+                if e.status != 409:
+                    raise
+                # left over from an earlier deployment of the app
+                patch_service(kube_client, service_name, namespace, {
+                    'metadata': {'labels': {'app': app_alias}},
+                    'spec': {
+                        'ports': replace_list([dict(
+                            port=kube_service_port, targetPort=app_port)]),
+                        'selector': {'app': app_alias}
+                    }
+                })
 
         mount_path = '/data'
 
@@ -186,8 +410,47 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
             if is_notebook:
                 mount_path = '/home/jovyan/work'
                 new_app.is_notebook = True
-            volumes, volume_mount = create_pvc(
-                kube_client, pvc_name, namespace, mount_path=mount_path)
+
+        # (step, registry entry, function)
+        independent_resources = [('service', 'app_service', create_app_service)]
+        if private_repo or (system_docker_email and system_docker_password):
+            independent_resources.append(
+                ('pull_secret', 'image_pull_secret', create_pull_secret))
+        if is_ai:
+            independent_resources.append(('pvc', None, lambda: create_pvc(
+                kube_client, pvc_name, namespace, mount_path=mount_path)))
+
+        for step, _, _ in independent_resources:
+            report_progress(step, 'running')
+
+        results = {}
+        errors = []
+        with ContextThreadPoolExecutor(max_workers=len(independent_resources)) as executor:
+            futures = [
+                (step, registry_entry, executor.submit(create_resource))
+                for step, registry_entry, create_resource in independent_resources
+            ]
+            for step, registry_entry, future in futures:
+                try:
+                    results[step] = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    report_progress(step, 'failed', e)
+                    continue
+                if registry_entry:
+                    # update registry
+                    resource_registry[registry_entry] = True
+                report_progress(step, 'succeeded')
+
+        if errors:
+            raise errors[0]
+
+        image_pull_secret = results.get('pull_secret')
+        if is_ai:
+            volumes, volume_mount = results['pvc']
+
+         # create deployment
+        dep_name = f'{app_alias}-deployment'
 
         # EnvVar
         env = []
@@ -230,11 +493,13 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
         deployment = client.V1Deployment(
             api_version="apps/v1",
             kind="Deployment",
-            metadata=client.V1ObjectMeta(name=dep_name),
+            metadata=client.V1ObjectMeta(
+                name=dep_name, labels={'app': app_alias}),
             spec=spec
         )
 
         # create deployment in  cluster
+        report_progress('deployment', 'running')
 
         kube_client.appsv1_api.create_namespaced_deployment(
             body=deployment,
@@ -244,44 +509,7 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
 
         # update registry
         resource_registry['app_deployment'] = True
-
-        # create service in the cluster
-        service_name = f'{app_alias}-service'
-
-        service_meta = client.V1ObjectMeta(
-            name=service_name,
-            labels={'app': app_alias}
-        )
-
-        service_spec = client.V1ServiceSpec(
-            type='ClusterIP',
-            ports=[client.V1ServicePort(
-                port=int(current_app.config['KUBE_SERVICE_PORT']), target_port=app_port)],
-            selector={'app': app_alias}
-        )
-
-        service = client.V1Service(
-            metadata=service_meta,
-            spec=service_spec)
-
-        try:
-            # Check if service exists in the cluster
-            kube_client.kube.read_namespaced_service(
-                service_name, project.alias)
-            # Delete service
-            kube_client.kube.delete_namespaced_service(
-                service_name, project.alias)
-        except:
-            pass
-
-        kube_client.kube.create_namespaced_service(
-            namespace=namespace,
-            body=service,
-            _preload_content=False
-        )
-
-        # update resource registry
-        resource_registry['app_service'] = True
+        report_progress('deployment', 'succeeded')
 
         if custom_domain and user.is_beta_user:
             sub_domain = custom_domain
@@ -314,46 +542,15 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
 
         ingress_name = f'{project.alias}-ingress'
 
-        # Check if there is an ingress resource in the namespace, create if not
-
-        ingress_list = kube_client.networking_api.list_namespaced_ingress(
-            namespace=namespace).items
+        # add the app's rule to the namespace's ingress, created if missing
+        report_progress('ingress', 'running')
 
-        if not ingress_list:
+        add_ingress_rule(kube_client, ingress_name, namespace, new_ingress_rule)
 
-            ingress_meta = client.V1ObjectMeta(
-                name=ingress_name
-            )
-
-            ingress_spec = {
-                'rules': [new_ingress_rule]
-            }
-
-            ingress_body = {
-                "apiVersion": "networking.k8s.io/v1",
-                "kind": "Ingress",
-                "metadata": ingress_meta,
-                "spec": ingress_spec
-            }
-
-            kube_client.networking_api.create_namespaced_ingress(
-                namespace=namespace,
-                body=ingress_body
-            )
-
-            # update registry
-            resource_registry['ingress_entry'] = True
-        else:
-            # Update ingress with new entry
-            ingress = ingress_list[0]
+        # update registry
+        resource_registry['ingress_entry'] = True
 
-            ingress.spec.rules.append(new_ingress_rule)
-
-            kube_client.networking_api.patch_namespaced_ingress(
-                name=ingress_name,
-                namespace=namespace,
-                body=ingress
-            )
+        report_progress('ingress', 'succeeded')
 
         service_url = f'https://{sub_domain}'
 
@@ -362,16 +559,20 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
         saved = new_app.save()
 
         if not saved:
+            report_progress('save', 'failed', 'Internal Server Error')
             log_activity('App', status='Failed',
                          operation='Create',
                          description='Internal Server Error',
                          a_project=project,
-                         a_cluster_id=project.cluster_id)
+                         a_cluster_id=project.cluster_id,
+                         user_id=user.id)
             return SimpleNamespace(
                 message='Internal Server Error',
                 status_code=500
             )
 
+        report_progress('save', 'succeeded')
+
         # log_activity('App', status='Success',
         #              operation='Create',
         #              description='Created app Successfully',
@@ -394,7 +595,7 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
                      description=json.loads(e.body),
                      a_project=project,
                      a_cluster_id=project.cluster_id,
-                     )
+                     user_id=user.id)
 
         return SimpleNamespace(
             message=json.loads(e.body),
@@ -414,7 +615,7 @@ def deploy_user_app(kube_client, project: Project, user: User, app: App = None,
                      description=str(e),
                      a_project=project,
                      a_cluster_id=project.cluster_id,
-                     )
+                     user_id=user.id)
 
         return SimpleNamespace(
             message=str(e),
@@ -501,31 +702,13 @@ def create_docker_pull_secret(kube_client, app_alias, namespace, docker_username
     return image_pull_secret
 
 
-def update_app_env_vars(client, cluster_deployment, env_vars, delete_env_vars=[]):
-    container = cluster_deployment.spec.template.spec.containers[0]
-
-    if env_vars:
-        env = []
-        env_list = container.env or []
-
-        # Filter out environment variables to be deleted
-        env_list = [
-            env_var for env_var in env_list if env_var.name not in delete_env_vars]
-
-        # Add new environment variables
-        for key, value in env_vars.items():
-            env.append(client.V1EnvVar(
-                name=str(key), value=str(value)
-            ))
-
-        # Add existing app variables
-        env.extend(env_list)
-
-        container.env = env
-    else:
-        # Handle case where no new environment variables are provided
-        container.env = [
-            env_var for env_var in container.env if env_var.name not in delete_env_vars]
+def update_app_env_vars(kube_client, app, namespace, env_vars, delete_env_vars=[]):
+    """
+    set and remove env vars of an app's container with a single patch
+    """
+    return patch_deployment(
+        kube_client, f'{app.alias}-deployment', namespace,
+        container_patch(app.alias, env=env_vars_patch(env_vars, delete_env_vars)))
 
 
 def delete_cluster_app(kube_client, namespace, app):
@@ -589,26 +772,12 @@ def delete_cluster_app(kube_client, namespace, app):
 
 def disable_user_app(app: App, is_admin=False):
     try:
-        kube_host = app.project.cluster.host
-        kube_token = app.project.cluster.token
-
-        kube_client = create_kube_clients(kube_host, kube_token)
+        kube_client = get_kube_clients(app.project.cluster)
 
         # scale apps down to 0
         try:
-            app_name = f'{app.alias}-deployment'
-            deployment = kube_client.appsv1_api.read_namespaced_deployment(
-                name=app_name,
-                namespace=app.project.alias
-            )
-            deployment.spec.replicas = 0
-
-            # Apply the updated Deployment spec
-            kube_client.appsv1_api.replace_namespaced_deployment(
-                name=app_name,
-                namespace=app.project.alias,
-                body=deployment
-            )
+            scale_deployment(
+                kube_client, f'{app.alias}-deployment', app.project.alias, 0)
         except:
             pass
         # save app
@@ -646,25 +815,12 @@ def disable_user_app(app: App, is_admin=False):
 
 def enable_user_app(app: App):
     try:
-        kube_host = app.project.cluster.host
-        kube_token = app.project.cluster.token
-
-        kube_client = create_kube_clients(kube_host, kube_token)
+        kube_client = get_kube_clients(app.project.cluster)
 
         try:
-            app_name = f'{app.alias}-deployment'
-            deployment = kube_client.appsv1_api.read_namespaced_deployment(
-                name=app_name,
-                namespace=app.project.alias
-            )
-            deployment.spec.replicas = app.replicas
-
-            # Apply the updated Deployment spec
-            kube_client.appsv1_api.replace_namespaced_deployment(
-                name=app_name,
-                namespace=app.project.alias,
-                body=deployment
-            )
+            scale_deployment(
+                kube_client, f'{app.alias}-deployment', app.project.alias,
+                app.replicas)
         except:
             pass
         # save app
@@ -700,174 +856,166 @@ def enable_user_app(app: App):
 
 
 def disable_project(project: Project, is_admin=False):
+    from app.helpers.bulk_operations import set_projects_state
 
-    # Disable apps
+    # scale the apps down to 0 and add the disable resource quota
     try:
-        kube_host = project.cluster.host
-        kube_token = project.cluster.token
-
-        kube_client = create_kube_clients(kube_host, kube_token)
-
-        # scale apps down to 0
-        for app in project.apps:
-            disable_user_app(app, is_admin)
-
-        # Add resource quota
-        quota = client.V1ResourceQuota(
-            api_version="v1",
-            kind="ResourceQuota",
-            metadata=client.V1ObjectMeta(
-                name="disable-quota", namespace=project.alias),
-            spec=client.V1ResourceQuotaSpec(
-                hard={
-                    "requests.cpu": "0",
-                    "requests.memory": "0",
-                    "limits.cpu": "0",
-                    "limits.memory": "0"
-                }
-            )
-        )
-
-        kube_client.kube.create_namespaced_resource_quota(
-            project.alias, quota)
-
-        # save project
-        project.disabled = True
-        if is_admin:
-            project.admin_disabled = True
-        project.save()
-
-        log_activity('Project', status='Success',
-                     operation='Disable',
-                     description='Disabled project Successfully',
-                     a_project=project,
-                     a_cluster_id=project.cluster_id)
-        return True
-    except client.rest.ApiException as e:
+        _, errors = set_projects_state([project], True, is_admin=is_admin)
+    except Exception as err:
         logger.exception('Exception occurred')
-        if e.status == 404:
-            # save project
-            project.disabled = True
-            if is_admin:
-                project.admin_disabled = True
-            project.save()
-            log_activity('Project', status='Success',
-                         operation='Disable',
-                         description='Disabled project but doesnt exist in the cluster',
-                         a_project=project,
-                         a_cluster_id=project.cluster_id)
-            return True
         log_activity('Project', status='Failed',
                      operation='Disable',
-                     description='Error disabling application',
+                     description=str(err),
                      a_project=project,
                      a_cluster_id=project.cluster_id)
         return SimpleNamespace(
-            message=str(e.body),
+            message=str(err),
             status_code=500
         )
 
-    except Exception as err:
-        logger.exception('Exception occurred')
+    if errors:
         log_activity('Project', status='Failed',
                      operation='Disable',
-                     description=err.body,
+                     description='Error disabling application',
                      a_project=project,
                      a_cluster_id=project.cluster_id)
         return SimpleNamespace(
-            message=str(err),
+            message=errors[project.id],
             status_code=500
         )
 
+    log_activity('Project', status='Success',
+                 operation='Disable',
+                 description='Disabled project Successfully',
+                 a_project=project,
+                 a_cluster_id=project.cluster_id)
+    return True
 
-def enable_project(project: Project):
-    # Enable apps
-    try:
-        kube_host = project.cluster.host
-        kube_token = project.cluster.token
-
-        kube_client = create_kube_clients(kube_host, kube_token)
-        try:
-            for app in project.apps:
-                enable_user_app(app)
 
-            # Delete the ResourceQuota
-            kube_client.kube.delete_namespaced_resource_quota(
-                name='disable-quota', namespace=project.alias
-            )
-        except client.rest.ApiException as e:
-            logger.exception('Exception occurred')
-            if e.status != 404:
-                log_activity('Project', status='Failed',
-                             operation='Enable',
-                             description=f'''Error enabling the project. {
-                                 e.body}''',
-                             a_project=project,
-                             a_cluster_id=project.cluster_id)
-                return SimpleNamespace(
-                    message=str(e.body),
-                    status_code=check_kube_error_code(e.status)
-                )
-
-        # save project
-        project.disabled = False
-        project.admin_disabled = False
-        project.save()
+def enable_project(project: Project):
+    from app.helpers.bulk_operations import set_projects_state
 
-        log_activity('Project', status='Success',
+    # remove the disable resource quota and scale the apps back up
+    try:
+        _, errors = set_projects_state([project], False)
+    except Exception as err:
+        logger.exception('Exception occurred')
+        log_activity('Project', status='Failed',
                      operation='Enable',
-                     description='Enabled project Successfully',
+                     description=str(err),
                      a_project=project,
                      a_cluster_id=project.cluster_id)
-        return True
+        return SimpleNamespace(
+            message=str(err),
+            status_code=500
+        )
 
-    except Exception as err:
-        logger.exception('Exception occurred')
+    if errors:
         log_activity('Project', status='Failed',
                      operation='Enable',
-                     description=err.body,
+                     description=f'Error enabling the project. {errors[project.id]}',
                      a_project=project,
                      a_cluster_id=project.cluster_id)
         return SimpleNamespace(
-            message=str(err),
+            message=errors[project.id],
             status_code=500
         )
 
+    log_activity('Project', status='Success',
+                 operation='Enable',
+                 description='Enabled project Successfully',
+                 a_project=project,
+                 a_cluster_id=project.cluster_id)
+    return True
 
-def sort_apps_for_deployment(apps_data, project, kube_client, user, app_schema):
-    failed_apps_data = []
-    apps_with_dependencies = []
-    apps_list = []
-    apps_without_dependencies = []
-    results = []
-
-    for app in apps_data:
-        if "dependant_env_vars" in app:
-            apps_with_dependencies.append(app)
-        else:
-            apps_without_dependencies.append(app)
 
-    # Create a list of all dependent environment variables
-    dependent_env_vars = [
-        dep for a in apps_with_dependencies for dep in a["dependant_env_vars"].values()]
+def sort_apps_for_deployment(apps_data, project, kube_client, user, app_schema, progress=None):
+    """
+    deploy the apps of a multi-app payload following their dependency
+    graph. An app starts as soon as every app it depends on is created, so
+    independent apps deploy concurrently and a stack takes about the depth
+    of its graph rather than its size. The dependant_env_vars of an app are
+    filled with the internal urls of the apps they name. Apps of the
+    payload that already exist aren't deployed again, their dependants use
+    the existing apps.
+    """
+    graph = build_deployment_graph(apps_data)
+    dependants = dependants_of(graph)
+    apps_by_name = {app_item['name']: app_item for app_item in apps_data}
+    waiting = {name: set(dependencies) for name, dependencies in graph.items()}
 
-    for app in apps_data:
-        # Check if the app's name is in the list of dependent environment variables
-        if app["name"] in dependent_env_vars:
-            try:
-                apps_with_dependencies.remove(app)
-            except ValueError:
-                pass
+    failed_apps_data = []
+    failed = set()
+    existing = set()
+    results = {}
+    internal_urls = {}
+
+    flask_app = current_app._get_current_object()
+    max_workers = current_app.config.get('APP_DEPLOY_MAX_WORKERS', 4)
+    project_id, user_id = project.id, user.id
+    # progress is reported from this thread, the one the caller's session
+    # belongs to, so the deploying threads hand it over through a queue
+    events = queue.Queue()
+    dump_lock = threading.Lock()
+
+    def report_events():
+        while True:
             try:
-                apps_without_dependencies.remove(app)
-            except ValueError:
-                pass
-            apps_list.insert(0, app)
-
-    apps_list.extend(apps_without_dependencies)
-    apps_list.extend(apps_with_dependencies)
-
-    for app_item in apps_list:
+                event = events.get_nowait()
+            except queue.Empty:
+                return
+            if progress:
+                progress(*event)
+
+    def fail(name, message):
+        failed.add(name)
+        failed_apps_data.append(dict(status='fail', message=message))
+        for dependant in dependants[name]:
+            if dependant not in failed:
+                fail(dependant,
+                     f'App {dependant} not deployed, its dependency {name} failed')
+
+    def resolve_env_vars(app_item):
+        if "dependant_env_vars" not in app_item:
+            return
+        app_item.setdefault("env_vars", {})
+        for key, value in app_item["dependant_env_vars"].items():
+            new_value = internal_urls.get(value)
+            if new_value is None and value not in apps_by_name:
+                # an app deployed to the project earlier
+                existing_app = App.find_first(name=value, project_id=project.id)
+                if existing_app:
+                    new_value = app_schema.get_service(existing_app)
+            app_item["env_vars"].update({key: new_value})
+
+    def deploy(name, app_item):
+        def app_progress(step, status, message=None):
+            events.put((f'{name}.{step}', status, message))
+
+        with flask_app.app_context():
+            # the caller's session and objects stay with the caller's thread
+            thread_project = Project.get_by_id(project_id)
+            thread_user = User.get_by_id(user_id)
+
+            new_app = deploy_user_app(
+                kube_client=kube_client, project=thread_project, user=thread_user,
+                app_data=app_item, progress=app_progress)
+
+            if type(new_app) == SimpleNamespace:
+                return None, new_app.message
+
+            with dump_lock:
+                new_app_data, _ = app_schema.dump(new_app)
+            log_activity('App', status='Success',
+                         operation='Create',
+                         description='Deployed app Successfully',
+                         a_project=thread_project,
+                         a_cluster_id=thread_project.cluster_id,
+                         a_app=new_app,
+                         user_id=user_id)
+            return new_app_data, None
+
+    for app_item in apps_data:
         existing_app = App.find_first(
             name=app_item['name'],
             project_id=project.id)
@@ -877,46 +1025,119 @@ def sort_apps_for_deployment(apps_data, project, kube_client, user, app_schema):
                          operation='Create',
                          description=f'App {app_item["name"]} already exists',
                          a_project=project,
-                         a_cluster_id=project.cluster_id)
+                         a_cluster_id=project.cluster_id,
+                         user_id=user.id)
             failed_apps_data.append(dict(
                 status='fail',
-                message=f'App with name {app_item["name"]} already exists'
-            ))
-            continue
-
-        if "dependant_env_vars" in app_item:
-            app_item.setdefault("env_vars", {})
-            for key, value in app_item["dependant_env_vars"].items():
-                new_value = next(
-                    (app['internal_url'] for app in results if app['name'] == value), None)
-                app_item["env_vars"].update(
-                    {key: new_value}
-                )
-        new_app = deploy_user_app(
-            kube_client=kube_client, project=project, user=user, app_data=app_item)
-
-        if type(new_app) == SimpleNamespace:
-            failed_apps_data.append(dict(
-                status='fail',
-                message=new_app.message
-            ))
-            continue
-
-        new_app_data, _ = app_schema.dump(new_app)
-        log_activity('App', status='Success',
-                     operation='Create',
-                     description='Deployed app Successfully',
-                     a_project=project,
-                     a_cluster_id=project.cluster_id,
-                     a_app=new_app)
-        results.append(new_app_data)
+                message=f'App with name {app_item["name"]} already exists'))
+            existing.add(app_item['name'])
+            internal_urls[app_item['name']] = app_schema.get_service(existing_app)
+            for dependant in dependants[app_item['name']]:
+                waiting[dependant].discard(app_item['name'])
+
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+
+        def start(name):
+            app_item = apps_by_name[name]
+            resolve_env_vars(app_item)
+            running[executor.submit(deploy, name, app_item)] = name
+
+        for name in graph:
+            if name not in failed and name not in existing and not waiting[name]:
+                start(name)
+
+        while running:
+            done, _ = wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+            report_events()
+            for future in done:
+                name = running.pop(future)
+                try:
+                    new_app_data, error = future.result()
+                except Exception as e:
+                    logger.exception('Exception occurred')
+                    new_app_data, error = None, str(e)
+
+                if error:
+                    fail(name, error)
+                    continue
+
+                results[name] = new_app_data
+                internal_urls[name] = new_app_data.get('internal_url')
+                for dependant in dependants[name]:
+                    waiting[dependant].discard(name)
+                    if dependant not in failed and dependant not in existing \
+                            and not waiting[dependant]:
+                        start(dependant)
+
+    report_events()
 
     return SimpleNamespace(
-        apps_data=results,
+        apps_data=[results[app_item['name']] for app_item in apps_data
+                   if app_item['name'] in results],
         failed_apps_data=failed_apps_data
     )
 
 
+def get_available_condition(deployment):
+    """
+    status of a deployment's Available condition, None if it is missing
+    """
+    if not deployment or not deployment.status or not deployment.status.conditions:
+        return None
+    return next((condition.status for condition in deployment.status.conditions
+                 if condition.type == "Available"), None)
+
+
+def get_app_deployments(kube_client, namespace, app_aliases):
+    """
+    fetch the app and database deployments of several apps with a single
+    list call by their app label and join them to the apps by alias. Apps
+    deployed before they were labelled are read by name.
+    """
+    deployment_names = {}
+    app_deployments = {}
+    for alias in app_aliases:
+        deployment_names[f'{alias}-deployment'] = (alias, 'deployment')
+        deployment_names[f'{alias}-postgres-db'] = (alias, 'db_deployment')
+        app_deployments[alias] = SimpleNamespace(
+            deployment=None, db_deployment=None)
+
+    if not app_deployments:
+        return app_deployments
+
+    def join(deployment):
+        alias, kind = deployment_names[deployment.metadata.name]
+        setattr(app_deployments[alias], kind, deployment)
+
+    def read(name):
+        try:
+            return kube_client.appsv1_api.read_namespaced_deployment(
+                name, namespace)
+        except client.rest.ApiException as e:
+            if e.status != 404:
+                raise
+            return None
+
+    deployments = kube_client.appsv1_api.list_namespaced_deployment(
+        namespace, label_selector=app_label_selector(*app_deployments))
+    for deployment in deployments.items:
+        if deployment.metadata.name in deployment_names:
+            join(deployment)
+
+    for alias, deployments in app_deployments.items():
+        if deployments.deployment is not None:
+            continue
+        # not labelled yet, see label_apps in manage.py
+        for name in (f'{alias}-deployment', f'{alias}-postgres-db'):
+            deployment = read(name)
+            if deployment is None:
+                break
+            join(deployment)
+
+    return app_deployments
+
+
 def check_kube_error_code(error):
     # prevent a 401 from being sent to the frontend
     return 511 if error == 401 else error
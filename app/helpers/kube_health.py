@@ -0,0 +1,309 @@
+import threading
+import time
+
+import orjson
+from flask import current_app
+from kubernetes import client
+from werkzeug.exceptions import ServiceUnavailable
+
+from app.helpers.crane_app_logger import logger
+from app.helpers.metrics import ContextThreadPoolExecutor, observe_kube_request
+from app.helpers.redis_client import get_redis
+
+CLUSTER_HEALTH_KEY = 'cluster_health:{cluster_id}'
+
+
+class ClusterUnavailable(client.rest.ApiException, ServiceUnavailable):
+    """
+    raised instead of calling a cluster that is known to be down. It is a
+    503 ApiException so existing kube error handling passes it on, and a
+    503 HTTPException so that views that don't catch it answer with 503
+    too instead of a 500.
+    """
+
+    def __init__(self, cluster_id, reason, retry_after=None):
+        client.rest.ApiException.__init__(self, status=503, reason=reason)
+        # sent as the Retry-After header
+        ServiceUnavailable.__init__(
+            self, description=reason, retry_after=retry_after)
+        self.cluster_id = cluster_id
+        self.body = orjson.dumps(dict(message=reason)).decode('utf-8')
+        self.data = dict(status='fail', message=reason)
+
+
+class CircuitBreaker:
+    """
+    Counts consecutive failed calls to a cluster. After failure_threshold
+    of them the breaker opens and calls are refused for reset_seconds, then
+    a single trial call is let through: it closes the breaker again if it
+    succeeds and reopens it if it fails.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                return 'open'
+            return 'half_open'
+
+    def retry_after(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+            return max(self.reset_seconds - (time.monotonic() - self.opened_at), 0)
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            if self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return dict(state=self.state, failures=self.failures,
+                    retry_after=round(self.retry_after(), 1))
+
+
+def is_cluster_failure(error):
+    """
+    whether a failed call says something about the cluster rather than the
+    request, connection errors, timeouts and 5xx responses count
+    """
+    if isinstance(error, client.rest.ApiException):
+        return not error.status or error.status >= 500
+    return True
+
+
+class ClusterApiClient(client.ApiClient):
+    """
+    ApiClient that gives every request a default connect/read timeout,
+    goes through the cluster's circuit breaker and is timed and counted
+    """
+
+    def __init__(self, configuration, cluster_id=None, breaker=None,
+                 connect_timeout=None, read_timeout=None):
+        super().__init__(configuration)
+        self.cluster_id = cluster_id
+        self.breaker = breaker
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    @property
+    def stream_timeout(self):
+        """
+        timeout for watches and followed logs, which can stay quiet for a
+        long time, so only the connection is timed
+        """
+        return (self.connect_timeout, None)
+
+    def request(self, method, url, *args, **kwargs):
+        if self.breaker and not self.breaker.allow():
+            retry_after = int(self.breaker.retry_after()) + 1
+            raise ClusterUnavailable(
+                self.cluster_id,
+                f'Cluster is not responding, try again in {retry_after} seconds',
+                retry_after=retry_after)
+
+        if kwargs.get('_request_timeout') is None and (
+                self.connect_timeout or self.read_timeout):
+            kwargs['_request_timeout'] = (
+                self.connect_timeout, self.read_timeout)
+
+        started = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception as e:
+            observe_kube_request(
+                self.cluster_id, method, url, kwargs.get('query_params'),
+                started, getattr(e, 'status', None) or 'error')
+            if self.breaker:
+                if is_cluster_failure(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+            raise
+
+        observe_kube_request(
+            self.cluster_id, method, url, kwargs.get('query_params'),
+            started, response.status)
+        if self.breaker:
+            self.breaker.record_success()
+        return response
+
+
+class CircuitBreakerRegistry:
+    """
+    Process wide circuit breakers, one per cluster. They outlive the
+    cluster's clients so a credential change doesn't close an open breaker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def get(self, cluster_id, failure_threshold=5, reset_seconds=30):
+        key = str(cluster_id)
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(
+                    failure_threshold, reset_seconds)
+            return self._breakers[key]
+
+    def stats(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {key: breaker.stats() for key, breaker in breakers.items()}
+
+
+circuit_breakers = CircuitBreakerRegistry()
+
+
+def probe_cluster(kube_client, timeout):
+    """
+    time a call to the cluster's version endpoint
+    """
+    started = time.monotonic()
+    try:
+        client.VersionApi(kube_client.api_client).get_code(
+            _request_timeout=timeout, _preload_content=False)
+        error = None
+    except Exception as e:
+        error = str(getattr(e, 'reason', None) or e)
+    return dict(
+        reachable=error is None,
+        latency_ms=round((time.monotonic() - started) * 1000, 1),
+        checked_at=time.time(),
+        error=error
+    )
+
+
+def record_cluster_health(cluster_id, health, ttl):
+    get_redis().set(
+        CLUSTER_HEALTH_KEY.format(cluster_id=cluster_id),
+        orjson.dumps(health), ex=ttl)
+
+
+def probe_clusters(clusters, max_workers=8):
+    """
+    probe every cluster at the same time and record the results, they are
+    kept for a few probe intervals so that a stopped prober doesn't leave
+    clusters marked down. The probes use their own clients, outside the
+    circuit breakers, so an open breaker can't hide a recovered cluster.
+    """
+    from app.helpers.kube_registry import build_kube_clients
+
+    interval = current_app.config.get('KUBE_HEALTH_PROBE_SECONDS', 30)
+    timeout = current_app.config.get('KUBE_HEALTH_PROBE_TIMEOUT', 3)
+    if not clusters:
+        return {}
+
+    # read here so the workers don't touch the session
+    targets = [(str(cluster.id), cluster.host, cluster.token)
+               for cluster in clusters]
+
+    def probe(target):
+        _, host, token = target
+        kube_client = build_kube_clients(host, token, pool_maxsize=1)
+        try:
+            return probe_cluster(kube_client, timeout)
+        finally:
+            kube_client.api_client.rest_client.pool_manager.clear()
+
+    with ContextThreadPoolExecutor(max_workers=min(len(targets), max_workers)) as executor:
+        results = dict(zip([target[0] for target in targets],
+                           executor.map(probe, targets)))
+
+    for cluster_id, health in results.items():
+        if not health['reachable']:
+            logger.warning(
+                f'cluster {cluster_id} unreachable: {health["error"]}')
+        try:
+            record_cluster_health(cluster_id, health, interval * 3)
+        except Exception:
+            logger.exception('Exception occurred')
+    return results
+
+
+class ClusterHealthCache:
+    """
+    Short lived copy of the probe results in this process, so that
+    handlers can check a cluster's health without a redis round trip on
+    every request
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, cluster_id, ttl):
+        key = str(cluster_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] < ttl:
+                return entry[1]
+
+        try:
+            value = get_redis().get(CLUSTER_HEALTH_KEY.format(cluster_id=key))
+            health = orjson.loads(value) if value else None
+        except Exception:
+            # without redis every cluster is assumed to be up
+            logger.exception('Exception occurred')
+            health = None
+
+        with self._lock:
+            self._entries[key] = (now, health)
+        return health
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+
+cluster_health_cache = ClusterHealthCache()
+
+
+def get_cluster_health(cluster_id):
+    """
+    last probe result of a cluster, None when it hasn't been probed lately
+    """
+    return cluster_health_cache.get(
+        cluster_id, current_app.config.get('KUBE_HEALTH_CACHE_SECONDS', 5))
+
+
+def ensure_cluster_reachable(cluster_id):
+    """
+    raise ClusterUnavailable for a cluster that the probe found down
+    """
+    health = get_cluster_health(cluster_id)
+    if health and not health.get('reachable'):
+        raise ClusterUnavailable(
+            cluster_id, f'Cluster is unreachable: {health.get("error")}',
+            retry_after=current_app.config.get('KUBE_HEALTH_PROBE_SECONDS', 30))
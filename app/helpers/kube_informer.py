@@ -0,0 +1,255 @@
+import threading
+import time
+
+import orjson
+from kubernetes import client
+from kubernetes.watch.watch import iter_resp_lines
+
+from app.helpers.crane_app_logger import logger
+from app.helpers.kube_raw import list_raw
+from app.helpers.kube_registry import build_kube_clients, credential_fingerprint
+
+
+# kind -> (api group attribute on the kube clients, list function)
+INFORMER_KINDS = {
+    'pods': ('kube', 'list_pod_for_all_namespaces'),
+    'deployments': ('appsv1_api', 'list_deployment_for_all_namespaces'),
+    'services': ('kube', 'list_service_for_all_namespaces'),
+    'pvcs': ('kube', 'list_persistent_volume_claim_for_all_namespaces'),
+    'namespaces': ('kube', 'list_namespace'),
+    'nodes': ('kube', 'list_node'),
+}
+
+HTTP_STATUS_GONE = 410
+
+# seconds allowed to open a list or watch connection
+INFORMER_CONNECT_TIMEOUT = 10
+
+
+def parse_label_selector(label_selector):
+    """
+    turn an equality based selector such as "app=web,tier=db" into a dict,
+    None for set based, negated or existence ("app") selectors the label
+    index can't serve
+    """
+    labels = {}
+    if not label_selector:
+        return labels
+    if '!' in label_selector or '(' in label_selector:
+        return None
+    for requirement in label_selector.split(','):
+        key, equals, value = requirement.partition('=')
+        if not equals:
+            return None
+        labels[key.strip()] = value.lstrip('=').strip()
+    return labels
+
+
+class ResourceStore:
+    """
+    In-memory copy of one kind of cluster object, indexed by namespace
+    and by label. Objects are kept as the plain dicts the API returns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._objects = {}
+        self._namespace_index = {}
+        self._label_index = {}
+        self.resource_version = None
+        self.synced = False
+        self.synced_at = None
+
+    @staticmethod
+    def _key(obj):
+        metadata = obj.get('metadata', {})
+        return (metadata.get('namespace') or '', metadata.get('name'))
+
+    def _index(self, key, obj):
+        self._namespace_index.setdefault(key[0], set()).add(key)
+        for label in (obj.get('metadata', {}).get('labels') or {}).items():
+            self._label_index.setdefault(label, set()).add(key)
+
+    def _unindex(self, key, obj):
+        self._namespace_index.get(key[0], set()).discard(key)
+        for label in (obj.get('metadata', {}).get('labels') or {}).items():
+            self._label_index.get(label, set()).discard(key)
+
+    def replace(self, objects, resource_version):
+        with self._lock:
+            self._objects = {}
+            self._namespace_index = {}
+            self._label_index = {}
+            for obj in objects:
+                key = self._key(obj)
+                self._objects[key] = obj
+                self._index(key, obj)
+            self.resource_version = resource_version
+            self.synced = True
+            self.synced_at = time.time()
+
+    def apply(self, event_type, obj):
+        key = self._key(obj)
+        with self._lock:
+            previous = self._objects.pop(key, None)
+            if previous:
+                self._unindex(key, previous)
+            if event_type != 'DELETED':
+                self._objects[key] = obj
+                self._index(key, obj)
+            self.resource_version = obj['metadata'].get('resourceVersion')
+            self.synced_at = time.time()
+
+    def bookmark(self, resource_version):
+        with self._lock:
+            self.resource_version = resource_version
+            self.synced_at = time.time()
+
+    def mark_unsynced(self):
+        with self._lock:
+            self.synced = False
+
+    def list(self, namespace=None, labels=None, name=None):
+        with self._lock:
+            keys = None
+            if namespace:
+                keys = set(self._namespace_index.get(namespace, set()))
+            for label in (labels or {}).items():
+                matches = self._label_index.get(label, set())
+                keys = set(matches) if keys is None else keys & matches
+            if keys is None:
+                keys = self._objects.keys()
+            if name:
+                keys = [key for key in keys if key[1] == name]
+            return [self._objects[key] for key in sorted(keys)]
+
+
+class ClusterInformer:
+    """
+    Keeps a ResourceStore per kind in step with one cluster using
+    list+watch, one daemon thread per kind.
+    """
+
+    def __init__(self, cluster_id, kube_host, kube_token, watch_timeout=300):
+        self.cluster_id = str(cluster_id)
+        self.fingerprint = credential_fingerprint(kube_host, kube_token)
+        self.watch_timeout = watch_timeout
+        self.stores = {kind: ResourceStore() for kind in INFORMER_KINDS}
+        self._stop_event = threading.Event()
+        self._threads = []
+        # watches hold their connection open, keep them off the shared pool.
+        # The server ends a watch after watch_timeout, reads taking longer
+        # than that are on a dead connection.
+        self._kube_client = build_kube_clients(
+            kube_host, kube_token, pool_maxsize=len(INFORMER_KINDS),
+            timeout=(INFORMER_CONNECT_TIMEOUT, watch_timeout + 30))
+
+    def start(self):
+        for kind in INFORMER_KINDS:
+            thread = threading.Thread(
+                target=self._run, args=(kind,), daemon=True,
+                name=f'informer-{self.cluster_id}-{kind}')
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop_event.set()
+        for store in self.stores.values():
+            store.mark_unsynced()
+
+    def is_synced(self, kind):
+        return self.stores[kind].synced
+
+    def _list_function(self, kind):
+        api_name, function_name = INFORMER_KINDS[kind]
+        return getattr(getattr(self._kube_client, api_name), function_name)
+
+    def _list(self, kind):
+        body = list_raw(self._list_function(kind))
+        self.stores[kind].replace(
+            body.get('items', []), body['metadata'].get('resourceVersion'))
+
+    def _watch(self, kind):
+        store = self.stores[kind]
+        response = self._list_function(kind)(
+            watch=True,
+            allow_watch_bookmarks=True,
+            resource_version=store.resource_version,
+            timeout_seconds=self.watch_timeout,
+            _preload_content=False)
+        try:
+            for line in iter_resp_lines(response):
+                if self._stop_event.is_set():
+                    return
+                event = orjson.loads(line)
+                obj = event['object']
+                if event['type'] == 'ERROR':
+                    raise client.rest.ApiException(
+                        status=obj.get('code'), reason=obj.get('message'))
+                if event['type'] == 'BOOKMARK':
+                    store.bookmark(obj['metadata'].get('resourceVersion'))
+                    continue
+                store.apply(event['type'], obj)
+        finally:
+            response.close()
+            response.release_conn()
+
+    def _run(self, kind):
+        store = self.stores[kind]
+        backoff = 1
+        while not self._stop_event.is_set():
+            try:
+                if not store.synced:
+                    self._list(kind)
+                self._watch(kind)
+                backoff = 1
+            except client.rest.ApiException as e:
+                # resourceVersion too old, relist to get back in step
+                store.mark_unsynced()
+                if e.status != HTTP_STATUS_GONE:
+                    logger.warning(
+                        f'informer {self.cluster_id}/{kind} failed: {e.reason}')
+                    self._stop_event.wait(backoff)
+                    backoff = min(backoff * 2, 60)
+            except Exception as e:
+                store.mark_unsynced()
+                logger.warning(
+                    f'informer {self.cluster_id}/{kind} failed: {str(e)}')
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+
+class InformerRegistry:
+    """
+    Process wide set of cluster informers, started on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._informers = {}
+
+    def get(self, cluster_id, kube_host, kube_token, watch_timeout=300):
+        key = str(cluster_id)
+        fingerprint = credential_fingerprint(kube_host, kube_token)
+
+        with self._lock:
+            informer = self._informers.get(key)
+            if informer and informer.fingerprint == fingerprint:
+                return informer
+            if informer:
+                informer.stop()
+
+            informer = ClusterInformer(
+                cluster_id, kube_host, kube_token, watch_timeout)
+            informer.start()
+            self._informers[key] = informer
+            return informer
+
+    def invalidate(self, cluster_id):
+        with self._lock:
+            informer = self._informers.pop(str(cluster_id), None)
+        if informer:
+            informer.stop()
+
+
+kube_informers = InformerRegistry()
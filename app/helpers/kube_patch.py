@@ -0,0 +1,135 @@
+import time
+
+from kubernetes import client
+
+from app.helpers.kube_raw import load_raw
+
+# attempts made at a mutation that keeps failing with 409 Conflict
+CONFLICT_RETRIES = 5
+
+
+def retry_on_conflict(mutation, retries=CONFLICT_RETRIES, backoff=0.05):
+    """
+    call mutation until it stops failing with 409 Conflict. Mutations that
+    depend on the current state of an object read it again on each attempt
+    """
+    for attempt in range(retries):
+        try:
+            return mutation()
+        except client.rest.ApiException as e:
+            if e.status != 409 or attempt == retries - 1:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+
+def scale_deployment(kube_client, name, namespace, replicas):
+    """
+    set the replicas of a deployment through its scale subresource
+    """
+    return retry_on_conflict(
+        lambda: kube_client.appsv1_api.patch_namespaced_deployment_scale(
+            name, namespace, {'spec': {'replicas': replicas}},
+            _preload_content=False))
+
+
+def patch_deployment(kube_client, name, namespace, patch):
+    """
+    apply a strategic merge patch (a dict) or a JSON patch (a list) to a
+    deployment in a single request
+    """
+    return retry_on_conflict(
+        lambda: kube_client.appsv1_api.patch_namespaced_deployment(
+            name, namespace, patch, _preload_content=False))
+
+
+def container_patch(container_name, replicas=None, pod_spec=None, **container):
+    """
+    strategic merge patch of a deployment's container, containers are
+    merged by name so the rest of the pod template is left alone
+    """
+    pod_spec = dict(pod_spec or {})
+    if container:
+        pod_spec['containers'] = [dict(name=container_name, **container)]
+
+    patch = {}
+    if pod_spec:
+        patch['spec'] = {'template': {'spec': pod_spec}}
+    if replicas is not None:
+        patch.setdefault('spec', {})['replicas'] = replicas
+    return patch
+
+
+def env_vars_patch(env_vars=None, delete_env_vars=None):
+    """
+    container env entries setting env_vars and removing delete_env_vars,
+    env entries are merged by name
+    """
+    env = [dict(name=str(key), value=str(value))
+           for key, value in (env_vars or {}).items()]
+    env.extend(dict(name=str(key), **{'$patch': 'delete'})
+               for key in (delete_env_vars or [])
+               if key not in (env_vars or {}))
+    return env
+
+
+def replace_list(items):
+    """
+    list of a strategic merge patch that replaces the whole list instead of
+    merging into it
+    """
+    return list(items) + [{'$patch': 'replace'}]
+
+
+def patch_service(kube_client, name, namespace, patch):
+    return retry_on_conflict(
+        lambda: kube_client.kube.patch_namespaced_service(
+            name, namespace, patch, _preload_content=False))
+
+
+def update_ingress_rules(kube_client, name, namespace, update_rules, create=True):
+    """
+    read an ingress and replace its rules with update_rules(rules), guarded
+    by the resourceVersion that was read so that concurrent updates are
+    retried instead of overwriting each other. The ingress is created when
+    it doesn't exist yet.
+    """
+    def mutation():
+        try:
+            ingress = load_raw(kube_client.networking_api.read_namespaced_ingress(
+                name, namespace, _preload_content=False))
+        except client.rest.ApiException as e:
+            if e.status != 404 or not create:
+                raise
+            # a concurrent create fails with 409 and is retried as an update
+            return kube_client.networking_api.create_namespaced_ingress(
+                namespace=namespace,
+                body={
+                    'apiVersion': 'networking.k8s.io/v1',
+                    'kind': 'Ingress',
+                    'metadata': {'name': name},
+                    'spec': {'rules': update_rules([])}
+                },
+                _preload_content=False)
+
+        rules = update_rules(list(ingress.get('spec', {}).get('rules') or []))
+        return kube_client.networking_api.patch_namespaced_ingress(
+            name, namespace, {
+                'metadata': {
+                    'resourceVersion': ingress['metadata']['resourceVersion']},
+                'spec': {'rules': rules}
+            }, _preload_content=False)
+
+    return retry_on_conflict(mutation)
+
+
+def add_ingress_rule(kube_client, name, namespace, rule):
+    """
+    add a rule to an ingress, replacing any rule for the same host
+    """
+    rule = kube_client.api_client.sanitize_for_serialization(rule)
+
+    def update_rules(rules):
+        return [item for item in rules
+                if item.get('host') != rule.get('host')] + [rule]
+
+    return update_ingress_rules(kube_client, name, namespace, update_rules)
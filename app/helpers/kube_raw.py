@@ -0,0 +1,37 @@
+import orjson
+
+
+# metadata that is large and of no use to the dashboard
+PRUNED_METADATA_FIELDS = ('managedFields', 'annotations')
+
+
+def load_raw(resp):
+    """
+    parse an API server response fetched with _preload_content=False
+    """
+    return orjson.loads(resp.data)
+
+
+def prune_object(obj, fields=PRUNED_METADATA_FIELDS):
+    """
+    copy of a raw kubernetes object without the given metadata fields,
+    the original is left untouched so cached objects can be pruned
+    """
+    metadata = obj.get('metadata')
+    if not metadata or not any(field in metadata for field in fields):
+        return obj
+    pruned = dict(obj)
+    pruned['metadata'] = {
+        key: value for key, value in metadata.items() if key not in fields}
+    return pruned
+
+
+def list_raw(list_function, prune=False, **list_kwargs):
+    """
+    call a kubernetes list function and return the response body as plain
+    dicts, skipping the generated model classes entirely
+    """
+    body = load_raw(list_function(_preload_content=False, **list_kwargs))
+    if prune:
+        body['items'] = [prune_object(item) for item in body.get('items', [])]
+    return body
@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import time
+from types import SimpleNamespace
+
+from kubernetes import client
+
+from app.helpers.crane_app_logger import logger
+from app.helpers.kube_health import ClusterApiClient
+
+
+def build_kube_clients(kube_host, kube_token, pool_maxsize=None, cluster_id=None,
+                       breaker=None, timeout=(None, None)):
+    """
+    build the kubernetes API objects for a cluster on top of a single
+    ApiClient so that they share one keep-alive connection pool. Requests
+    get the (connect, read) timeout unless they set their own and go
+    through the breaker when one is given.
+    """
+    config = client.Configuration()
+    config.host = kube_host
+    config.api_key['authorization'] = kube_token
+    config.api_key_prefix['authorization'] = 'Bearer'
+    config.verify_ssl = False
+    if pool_maxsize:
+        config.connection_pool_maxsize = pool_maxsize
+
+    connect_timeout, read_timeout = timeout
+    api_client = ClusterApiClient(
+        config, cluster_id=cluster_id, breaker=breaker,
+        connect_timeout=connect_timeout, read_timeout=read_timeout)
+
+    return SimpleNamespace(
+        kube=client.CoreV1Api(api_client),
+        networking_api=client.NetworkingV1Api(api_client),
+        appsv1_api=client.AppsV1Api(api_client),
+        api_client=api_client,
+        batchv1_api=client.BatchV1Api(api_client),
+        storageV1Api=client.StorageV1Api(api_client)
+    )
+
+
+def credential_fingerprint(kube_host, kube_token):
+    return hashlib.sha256(
+        f'{kube_host}\n{kube_token}'.encode('utf-8')).hexdigest()
+
+
+class KubeClientRegistry:
+    """
+    Process wide cache of kubernetes clients, one entry per cluster.
+
+    Entries are keyed by cluster id and checked against a fingerprint of
+    the cluster's host and token, so a credential change made in another
+    worker is picked up as a miss here and the stale pool is dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saturation_events = 0
+
+    def get(self, cluster_id, kube_host, kube_token, pool_maxsize=None,
+            breaker=None, timeout=(None, None)):
+        key = str(cluster_id)
+        fingerprint = credential_fingerprint(kube_host, kube_token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.fingerprint == fingerprint:
+                self.hits += 1
+                if self._is_saturated(entry):
+                    self.saturation_events += 1
+                return entry.clients
+
+            self.misses += 1
+            if entry:
+                self._close(entry)
+
+            entry = SimpleNamespace(
+                fingerprint=fingerprint,
+                clients=build_kube_clients(
+                    kube_host, kube_token, pool_maxsize, cluster_id=key,
+                    breaker=breaker, timeout=timeout),
+                created_at=time.time()
+            )
+            self._entries[key] = entry
+            return entry.clients
+
+    def invalidate(self, cluster_id):
+        with self._lock:
+            entry = self._entries.pop(str(cluster_id), None)
+            if entry:
+                self.invalidations += 1
+                self._close(entry)
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries.values():
+                self._close(entry)
+            self._entries = {}
+
+    def stats(self):
+        with self._lock:
+            clusters = {
+                cluster_id: dict(
+                    created_at=entry.created_at,
+                    pools=self._pool_stats(entry)
+                )
+                for cluster_id, entry in self._entries.items()
+            }
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                invalidations=self.invalidations,
+                saturation_events=self.saturation_events,
+                clusters=clusters
+            )
+
+    @staticmethod
+    def _connection_pools(entry):
+        pools = entry.clients.api_client.rest_client.pool_manager.pools
+        return [pools[key] for key in pools.keys()]
+
+    def _pool_stats(self, entry):
+        stats = []
+        for pool in self._connection_pools(entry):
+            if pool.pool is None:
+                continue
+            max_size = pool.pool.maxsize
+            in_use = max_size - pool.pool.qsize()
+            stats.append(dict(
+                host=pool.host,
+                max_size=max_size,
+                in_use=in_use,
+                connections_opened=pool.num_connections,
+                requests=pool.num_requests,
+                saturated=in_use >= max_size
+            ))
+        return stats
+
+    def _is_saturated(self, entry):
+        return any(pool['saturated'] for pool in self._pool_stats(entry))
+
+    @staticmethod
+    def _close(entry):
+        try:
+            entry.clients.api_client.rest_client.pool_manager.clear()
+        except Exception:
+            logger.exception('Exception occurred')
+
+
+kube_client_registry = KubeClientRegistry()
@@ -0,0 +1,160 @@
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from flask import Response, current_app, g, has_request_context, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# gunicorn workers each write their samples to files in this directory,
+# the /metrics endpoint of any worker merges all of them
+MULTIPROCESS_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+KUBE_API_REQUESTS = Counter(
+    'kube_api_requests_total',
+    'Requests made to cluster API servers',
+    ['cluster', 'verb', 'resource', 'endpoint', 'code'])
+KUBE_API_REQUEST_SECONDS = Histogram(
+    'kube_api_request_duration_seconds',
+    'Time taken by requests to cluster API servers',
+    ['cluster', 'verb', 'resource', 'endpoint'],
+    buckets=(.01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30))
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'Time taken to answer API requests',
+    ['method', 'endpoint', 'status'],
+    buckets=(.01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60))
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries made while answering an API request',
+    ['method', 'endpoint'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500))
+
+
+# endpoint a worker thread of a ContextThreadPoolExecutor works for
+submitted_endpoint = contextvars.ContextVar('submitted_endpoint', default=None)
+
+
+def current_endpoint():
+    """
+    endpoint a kube call is made for, the celery task outside requests
+    """
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    if submitted_endpoint.get():
+        return submitted_endpoint.get()
+    from celery import current_task
+    if current_task and current_task.name:
+        return f'task:{current_task.name.rsplit(".", 1)[-1]}'
+    return 'background'
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor running each call in a copy of the submitting
+    thread's context, so that the kube calls of its workers are labelled
+    with the endpoint or task they are made for
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        context = contextvars.copy_context()
+        endpoint = current_endpoint()
+
+        def run():
+            submitted_endpoint.set(endpoint)
+            return fn(*args, **kwargs)
+
+        return super().submit(context.run, run)
+
+
+def kube_request_labels(method, url, query_params=None):
+    """
+    kubernetes verb and resource of an API server request, e.g. list pods
+    or get deployments/scale
+    """
+    parts = [part for part in urlsplit(url).path.split('/') if part]
+    if parts[:1] == ['api']:
+        parts = parts[2:]
+    elif parts[:1] == ['apis']:
+        parts = parts[3:]
+    if parts[:1] == ['namespaces'] and len(parts) > 2:
+        parts = parts[2:]
+
+    resource = '/'.join(parts[:1] + parts[2:3]) or 'unknown'
+    has_name = len(parts) > 1 or parts[:1] == ['version']
+
+    query = dict(query_params or [])
+    query.update({key: values[-1]
+                  for key, values in parse_qs(urlsplit(url).query).items()})
+    method = method.upper()
+    if method == 'GET':
+        if str(query.get('watch')).lower() == 'true':
+            verb = 'watch'
+        else:
+            verb = 'get' if has_name else 'list'
+    elif method == 'DELETE':
+        verb = 'delete' if has_name else 'deletecollection'
+    else:
+        verb = dict(POST='create', PUT='update', PATCH='patch').get(
+            method, method.lower())
+    return verb, resource
+
+
+def observe_kube_request(cluster_id, method, url, query_params, started, code):
+    verb, resource = kube_request_labels(method, url, query_params)
+    labels = dict(cluster=str(cluster_id or 'unregistered'), verb=verb,
+                  resource=resource, endpoint=current_endpoint())
+    KUBE_API_REQUEST_SECONDS.labels(**labels).observe(
+        time.monotonic() - started)
+    KUBE_API_REQUESTS.labels(code=str(code), **labels).inc()
+
+
+def count_db_query(*args, **kwargs):
+    if has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+
+
+def start_request_timer():
+    g.request_started = time.monotonic()
+    g.db_queries = 0
+
+
+def observe_request(response):
+    if 'request_started' in g:
+        endpoint = request.endpoint or 'unmatched'
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method, endpoint=endpoint,
+            status=str(response.status_code)
+        ).observe(time.monotonic() - g.request_started)
+        HTTP_REQUEST_DB_QUERIES.labels(
+            method=request.method, endpoint=endpoint).observe(g.db_queries)
+    return response
+
+
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('unauthorised', status=401)
+
+    if os.getenv(MULTIPROCESS_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        from prometheus_client import REGISTRY as registry
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """
+    time and count every request and its database queries, and serve all
+    the metrics at /metrics in prometheus text format
+    """
+    app.before_request(start_request_timer)
+    app.after_request(observe_request)
+    if not event.contains(Engine, 'before_cursor_execute', count_db_query):
+        event.listen(Engine, 'before_cursor_execute', count_db_query)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -1,4 +1,10 @@
+import base64
+import json
 import math
+import uuid
+
+from dateutil.parser import isoparse
+from sqlalchemy import and_, or_, text, tuple_
 
 def paginate(items,per_page,page):
 
@@ -17,4 +23,146 @@ def paginate(items,per_page,page):
     return pagination , paginated_items
 
 
+def encode_cursor(cursor_data):
+    return base64.urlsafe_b64encode(
+        json.dumps(cursor_data).encode('utf-8')).decode('utf-8')
+
+
+def decode_cursor(cursor):
+    """
+    decode a cursor handed out by encode_cursor, an empty cursor is the
+    first page
+    """
+    if not cursor:
+        return {}
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid pagination cursor')
+
+
+def cursor_pagination(items, per_page, seen, continue_token, remaining_item_count):
+    """
+    pagination block for a page fetched with kubernetes limit/continue,
+    the total is approximate as remainingItemCount is only an estimate
+    """
+    next_cursor = None
+    if continue_token:
+        next_cursor = encode_cursor(
+            dict(continue_token=continue_token, seen=seen + len(items)))
+
+    approximate_total = None
+    if remaining_item_count is not None:
+        approximate_total = seen + len(items) + remaining_item_count
+    elif not continue_token:
+        approximate_total = seen + len(items)
+
+    return {
+        'per_page': per_page,
+        'count': len(items),
+        'approximate_total_count': approximate_total,
+        'next_cursor': next_cursor
+    }
+
+
+def offset_pagination(paginated):
+    """
+    pagination block of a flask-sqlalchemy Pagination
+    """
+    return {
+        'total': paginated.total,
+        'pages': paginated.pages,
+        'page': paginated.page,
+        'per_page': paginated.per_page,
+        'next': paginated.next_num,
+        'prev': paginated.prev_num
+    }
+
+
+def estimated_count(model):
+    """
+    the planner's row estimate for a model's table, kept current by
+    autovacuum/ANALYZE, instead of a COUNT over the whole table. It counts
+    soft deleted rows too, so it is only ever an approximate total.
+    """
+    from app.models import db
+
+    table = db.session.bind.dialect.identifier_preparer.format_table(
+        model.__table__)
+    estimate = db.session.execute(
+        text('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)'),
+        dict(table=table)).scalar()
+    if estimate is None or estimate < 0:
+        # never analysed, the table is new and small enough to count
+        return model.query.order_by(None).count()
+    return estimate
+
+
+def keyset_paginate(query, model, per_page, cursor, count=None):
+    """
+    page through a query newest first by (date_created, id), seeking past
+    the last row of the previous page instead of skipping an OFFSET, so
+    every page costs the same as the first. count is 'exact' to COUNT the
+    query, 'estimate' for the table's row estimate, None for no total.
+    Rows without a date_created come first, as postgres sorts NULLs.
+    """
+    if count not in (None, 'exact', 'estimate'):
+        raise ValueError('count should be exact or estimate')
+
+    cursor_data = decode_cursor(cursor)
+    page_query = query
+    if cursor_data:
+        try:
+            last_id = cursor_data['id']
+            if getattr(model.id.type, 'as_uuid', False):
+                last_id = uuid.UUID(last_id)
+            last_created = cursor_data['date_created']
+            if last_created is not None:
+                last_created = isoparse(last_created)
+        except (KeyError, TypeError, ValueError, AttributeError, OverflowError):
+            raise ValueError('Invalid pagination cursor')
+        if last_created is None:
+            # the rest of the undated rows, then every dated one
+            page_query = query.filter(or_(
+                and_(model.date_created.is_(None), model.id < last_id),
+                model.date_created.isnot(None)))
+        else:
+            page_query = query.filter(
+                tuple_(model.date_created, model.id) < (last_created, last_id))
+
+    # one extra row tells whether there is a next page
+    rows = page_query.order_by(None).order_by(
+        model.date_created.desc(), model.id.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(dict(
+            date_created=last.date_created.isoformat()
+            if last.date_created else None,
+            id=last.id if isinstance(last.id, int) else str(last.id)))
+
+    approximate_total = None
+    if count == 'exact':
+        approximate_total = query.order_by(None).count()
+    elif count == 'estimate':
+        approximate_total = estimated_count(model)
+
+    return {
+        'per_page': per_page,
+        'count': len(items),
+        'approximate_total_count': approximate_total,
+        'next_cursor': next_cursor
+    }, items
+
 
+def paginate_query(query, model, page, per_page, cursor=None, count=None):
+    """
+    a page of an ordered query, by OFFSET with an exact total, or with a
+    cursor (an empty one for the first page) by keyset, see keyset_paginate
+    """
+    if cursor is not None:
+        return keyset_paginate(query, model, per_page, cursor, count=count)
+    paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+    return offset_pagination(paginated), paginated.items
@@ -0,0 +1,151 @@
+from itertools import chain
+
+import orjson
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.helpers.crane_app_logger import logger
+from app.helpers.redis_client import get_redis
+from app.models import db
+from app.models.app import App
+from app.models.project import Project
+from app.models.user import User
+
+PLATFORM_STATS_KEY = 'platform_stats:{name}'
+
+# columns the statistics of each model are computed from, changing any of
+# them clears the model's cached statistics
+STATS_COLUMNS = {
+    User: ('users', {'verified', 'is_beta_user', 'disabled'}),
+    Project: ('projects', {'deleted', 'disabled', 'project_type'}),
+    App: ('apps', {'deleted', 'disabled', 'is_notebook'}),
+}
+
+
+def compute_user_stats():
+    total, verified, unverified, beta, disabled = db.session.query(
+        func.count(User.id),
+        func.count(User.id).filter(User.verified == True),
+        # counted like the filter_by(verified=False) it replaces
+        func.count(User.id).filter(User.verified == False),
+        func.count(User.id).filter(User.is_beta_user == True),
+        func.count(User.id).filter(User.disabled == True)
+    ).one()
+    return dict(total=total, verified=verified, unverified=unverified,
+                beta=beta, disabled=disabled)
+
+
+def compute_project_stats():
+    rows = Project.query.with_entities(
+        Project.project_type,
+        func.count(Project.id),
+        func.count(Project.id).filter(Project.disabled == True)
+    ).group_by(Project.project_type).all()
+    return dict(
+        total=sum(count for _, count, _ in rows),
+        disabled=sum(disabled for _, _, disabled in rows),
+        # untyped projects aren't counted by type
+        project_type={project_type: count for project_type, count, _ in rows
+                      if project_type is not None}
+    )
+
+
+def compute_app_stats():
+    total, disabled, notebooks = App.query.with_entities(
+        func.count(App.id),
+        func.count(App.id).filter(App.disabled == True),
+        func.count(App.id).filter(App.is_notebook == True)
+    ).one()
+    return dict(total=total, disabled=disabled, is_notebook=notebooks)
+
+
+STATS = {
+    'users': compute_user_stats,
+    'projects': compute_project_stats,
+    'apps': compute_app_stats,
+}
+
+
+def get_platform_stats(name):
+    """
+    statistics of all users, projects or apps, each computed in a single
+    query and shared by every worker through redis for a short while.
+    Without redis they are computed on every call.
+    """
+    key = PLATFORM_STATS_KEY.format(name=name)
+    try:
+        cached = get_redis().get(key)
+        if cached:
+            return orjson.loads(cached)
+    except Exception:
+        logger.exception('Exception occurred')
+        return STATS[name]()
+
+    stats = STATS[name]()
+    try:
+        get_redis().set(key, orjson.dumps(stats),
+                        ex=current_app.config.get('PLATFORM_STATS_CACHE_SECONDS', 60))
+    except Exception:
+        logger.exception('Exception occurred')
+    return stats
+
+
+def invalidate_platform_stats(*names):
+    try:
+        get_redis().delete(
+            *[PLATFORM_STATS_KEY.format(name=name) for name in names])
+    except Exception:
+        logger.exception('Exception occurred')
+
+
+def stats_changed(obj):
+    _, columns = STATS_COLUMNS[type(obj)]
+    state = inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in columns)
+
+
+def track_stats_changes(session, flush_context):
+    """
+    note the statistics made stale by a flush, they are cleared once the
+    transaction commits
+    """
+    stale = session.info.setdefault('stale_platform_stats', set())
+    for obj in chain(session.new, session.deleted):
+        if type(obj) in STATS_COLUMNS:
+            stale.add(STATS_COLUMNS[type(obj)][0])
+    for obj in session.dirty:
+        if type(obj) in STATS_COLUMNS and stats_changed(obj):
+            stale.add(STATS_COLUMNS[type(obj)][0])
+
+
+def track_bulk_stats_changes(context):
+    # Query.update and Query.delete skip the flush
+    model = context.mapper.class_
+    if model in STATS_COLUMNS:
+        context.session.info.setdefault(
+            'stale_platform_stats', set()).add(STATS_COLUMNS[model][0])
+
+
+def clear_stale_stats(session):
+    stale = session.info.pop('stale_platform_stats', None)
+    if stale and has_app_context():
+        invalidate_platform_stats(*stale)
+
+
+def discard_stale_stats(session):
+    session.info.pop('stale_platform_stats', None)
+
+
+def init_platform_stats(app):
+    """
+    clear the cached statistics when users, projects or apps are created,
+    disabled or deleted, in the API as well as in the celery workers
+    """
+    for name, listener in (('after_flush', track_stats_changes),
+                           ('after_bulk_update', track_bulk_stats_changes),
+                           ('after_bulk_delete', track_bulk_stats_changes),
+                           ('after_commit', clear_stale_stats),
+                           ('after_rollback', discard_stale_stats)):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
@@ -0,0 +1,334 @@
+import codecs
+import datetime
+import queue
+import threading
+import time
+import uuid
+
+import orjson
+
+from app.helpers.crane_app_logger import logger
+from app.helpers.metrics import ContextThreadPoolExecutor
+
+
+def describe_failed_pod(state):
+    """
+    short table describing why a pod's container is waiting, None when
+    there is nothing to report
+    """
+    if type(state) != dict:
+        return None
+    waiting = state.get('waiting')
+    if not waiting:
+        return None
+    try:
+        stop = waiting['message'].index('container')
+        message = waiting['message'][:stop]
+    except:
+        message = waiting.get('message')
+
+    reason = waiting['reason']
+    return f'''type\tstatus\treason\t\t\tmessage\n----\t------\t------\t\t\t------\nwaiting\tfailed\t{
+        reason}\t{message}'''
+
+
+def fetch_pod_log(kube_client, namespace, pod, tail_lines=100, timestamps=False,
+                  since_seconds=86400):
+    """
+    read a pod's log, falling back to the last tail_lines when nothing was
+    logged within since_seconds
+    """
+    pod_log = kube_client.kube.read_namespaced_pod_log(
+        pod, namespace, pretty=True, tail_lines=tail_lines or 100,
+        timestamps=timestamps or False,
+        since_seconds=since_seconds or 86400
+    )
+
+    if pod_log == '':
+        pod_log = kube_client.kube.read_namespaced_pod_log(
+            pod, namespace, pretty=True, tail_lines=tail_lines or 100,
+            timestamps=timestamps or False
+        )
+    return pod_log
+
+
+def fetch_pod_logs(kube_client, namespace, pods, max_workers=8, **log_options):
+    """
+    read the logs of several pods concurrently, in the order of pods
+    """
+    if not pods:
+        return []
+    with ContextThreadPoolExecutor(max_workers=min(len(pods), max_workers)) as executor:
+        return list(executor.map(
+            lambda pod: fetch_pod_log(kube_client, namespace, pod, **log_options),
+            pods))
+
+
+def iter_pod_log(kube_client, namespace, pod, chunk_size=16384, **log_kwargs):
+    """
+    read a pod's log as text chunks without holding the whole log in memory
+    """
+    resp = kube_client.kube.read_namespaced_pod_log(
+        pod, namespace, _preload_content=False, **log_kwargs)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    try:
+        for chunk in resp.stream(chunk_size):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        text = decoder.decode(b'', final=True)
+        if text:
+            yield text
+    finally:
+        resp.release_conn()
+
+
+def stream_pod_logs(kube_client, namespace, pods, max_workers=8, failed_pods=None,
+                    tail_lines=100, timestamps=False, since_seconds=86400):
+    """
+    generate NDJSON records of pod logs as they arrive. Each pod is read by
+    a bounded pool of workers that hand chunks over through a bounded
+    queue, so a slow pod holds back neither the others nor worker memory.
+
+    records: {"pod", "log"} for each chunk, {"pod", "done"} once a pod is
+    read in full, {"pod", "error"} if reading it failed and
+    {"pod": null, "log"} for pods that are not running.
+    """
+    records = queue.Queue(maxsize=max_workers * 4)
+    stop = threading.Event()
+
+    def put(record):
+        while not stop.is_set():
+            try:
+                records.put(record, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_pod(pod):
+        try:
+            received = False
+            for text in iter_pod_log(
+                    kube_client, namespace, pod, pretty=True,
+                    tail_lines=tail_lines or 100, timestamps=timestamps or False,
+                    since_seconds=since_seconds or 86400):
+                received = True
+                if not put(dict(pod=pod, log=text)):
+                    return
+            if not received:
+                for text in iter_pod_log(
+                        kube_client, namespace, pod, pretty=True,
+                        tail_lines=tail_lines or 100, timestamps=timestamps or False):
+                    if not put(dict(pod=pod, log=text)):
+                        return
+            put(dict(pod=pod, done=True))
+        except Exception as e:
+            logger.exception('Exception occurred')
+            put(dict(pod=pod, error=str(e)))
+
+    for state in failed_pods or []:
+        pod_infor = describe_failed_pod(state)
+        if pod_infor:
+            yield orjson.dumps(dict(pod=None, log=pod_infor)) + b'\n'
+
+    if not pods:
+        return
+
+    executor = ContextThreadPoolExecutor(max_workers=min(len(pods), max_workers))
+    for pod in pods:
+        executor.submit(read_pod, pod)
+
+    remaining = len(pods)
+    try:
+        while remaining:
+            record = records.get()
+            if 'done' in record or 'error' in record:
+                remaining -= 1
+            yield orjson.dumps(record) + b'\n'
+    finally:
+        # client went away or we are done, let blocked workers exit
+        stop.set()
+        executor.shutdown(wait=False)
+
+
+LOG_FOLLOWERS_KEY = 'log_followers:{scope}'
+
+
+class LogFollowerLimiter:
+    """
+    Keeps the live log followers in redis, in total and per app, so that
+    the limits hold across every worker and followers can be turned away
+    before they open streams. Each follower is a member of a sorted set
+    scored by when its place expires, ttl seconds after it joined, so the
+    places of streams that were never released, say of a worker that
+    died, are dropped on their own.
+    """
+
+    def __init__(self, redis, ttl):
+        self.redis = redis
+        self.ttl = ttl
+
+    def keys(self, app_id):
+        return (LOG_FOLLOWERS_KEY.format(scope=f'app:{app_id}'),
+                LOG_FOLLOWERS_KEY.format(scope='total'))
+
+    def acquire(self, app_id, per_app_limit, total_limit):
+        """
+        take a place for a follower of the app, returns the follower to
+        release, None when either limit is reached or redis can't be read
+        """
+        follower = uuid.uuid4().hex
+        now = time.time()
+        app_key, total_key = self.keys(app_id)
+        try:
+            pipeline = self.redis.pipeline()
+            for key in (app_key, total_key):
+                pipeline.zremrangebyscore(key, '-inf', now)
+                pipeline.zadd(key, {follower: now + self.ttl})
+                pipeline.zcard(key)
+                pipeline.expire(key, self.ttl)
+            results = pipeline.execute()
+            app_count, total_count = results[2], results[6]
+            if app_count > per_app_limit or total_count > total_limit:
+                self.release(app_id, follower)
+                return None
+            return follower
+        except Exception:
+            # without the counts every worker could end up following logs
+            logger.exception('Exception occurred')
+            return None
+
+    def release(self, app_id, follower):
+        try:
+            for key in self.keys(app_id):
+                self.redis.zrem(key, follower)
+        except Exception:
+            logger.exception('Exception occurred')
+
+
+def normalize_log_timestamp(timestamp):
+    """
+    pad an RFC3339 timestamp to nanoseconds so that timestamps compare
+    correctly as strings, kubelet trims trailing zeros from them
+    """
+    seconds, _, fraction = timestamp.rstrip('Z').partition('.')
+    return f'{seconds}.{fraction.ljust(9, "0")[:9]}Z'
+
+
+def since_seconds_for(since):
+    """
+    since_seconds covering an RFC3339 timestamp, the log API has no
+    sinceTime so lines up to the timestamp are dropped by the reader
+    """
+    started = datetime.datetime.strptime(
+        since.rstrip('Z').split('.')[0], '%Y-%m-%dT%H:%M:%S')
+    elapsed = (datetime.datetime.utcnow() - started).total_seconds()
+    return max(int(elapsed) + 1, 1)
+
+
+def iter_log_lines(chunks):
+    """
+    split a stream of text chunks into complete lines
+    """
+    pending = ''
+    for text in chunks:
+        pending += text
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def sse_event(data, event=None, event_id=None):
+    message = ''
+    if event_id:
+        message += f'id: {event_id}\n'
+    if event:
+        message += f'event: {event}\n'
+    for line in data.split('\n'):
+        message += f'data: {line}\n'
+    return (message + '\n').encode('utf-8')
+
+
+def follow_pod_logs(kube_client, namespace, pods, since=None, tail_lines=100,
+                    max_seconds=200, heartbeat_seconds=15):
+    """
+    generate Server-Sent Events following the logs of all the given pods
+    at once. Every line is prefixed with its pod and carries its timestamp
+    as the event id, so a reconnecting EventSource resumes after the last
+    line it saw. The stream ends after max_seconds, before the worker
+    timeout, and the client reconnects.
+    """
+    records = queue.Queue(maxsize=1000)
+    stop = threading.Event()
+    responses = []
+    responses_lock = threading.Lock()
+    since = normalize_log_timestamp(since) if since else None
+
+    log_kwargs = dict(follow=True, timestamps=True)
+    if since:
+        log_kwargs['since_seconds'] = since_seconds_for(since)
+    else:
+        log_kwargs['tail_lines'] = tail_lines or 100
+
+    def put(record):
+        while not stop.is_set():
+            try:
+                records.put(record, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_pod(pod):
+        try:
+            resp = kube_client.kube.read_namespaced_pod_log(
+                pod, namespace, _preload_content=False,
+                _request_timeout=kube_client.api_client.stream_timeout,
+                **log_kwargs)
+            with responses_lock:
+                responses.append(resp)
+            if stop.is_set():
+                return
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            chunks = (decoder.decode(chunk) for chunk in resp.stream(4096))
+            for line in iter_log_lines(chunks):
+                timestamp, _, text = line.partition(' ')
+                timestamp = normalize_log_timestamp(timestamp)
+                if since and timestamp <= since:
+                    continue
+                if not put((timestamp, f'[{pod}] {text}')):
+                    return
+        except Exception as e:
+            if not stop.is_set():
+                logger.exception('Exception occurred')
+                put((None, f'[{pod}] log stream closed: {str(e)}'))
+
+    executor = ContextThreadPoolExecutor(max_workers=max(len(pods), 1))
+    for pod in pods:
+        executor.submit(read_pod, pod)
+
+    deadline = time.time() + max_seconds
+    try:
+        # ask EventSource to reconnect quickly once the stream ends
+        yield b'retry: 1000\n\n'
+        while time.time() < deadline:
+            try:
+                timestamp, line = records.get(
+                    timeout=min(heartbeat_seconds, max(deadline - time.time(), 0.1)))
+            except queue.Empty:
+                yield b': keep-alive\n\n'
+                continue
+            yield sse_event(line, event='log', event_id=timestamp)
+    finally:
+        stop.set()
+        with responses_lock:
+            for resp in responses:
+                try:
+                    resp.close()
+                except Exception:
+                    pass
+        executor.shutdown(wait=False)
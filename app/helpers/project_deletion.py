@@ -0,0 +1,126 @@
+import time
+
+from kubernetes import client
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.helpers.activity_logger import log_activity
+from app.helpers.crane_app_logger import logger
+from app.models import db
+from app.models.app import App
+from app.models.project import Project
+
+
+class NamespaceTerminating(Exception):
+    """
+    A deleted project's namespace is still being garbage collected.
+    """
+
+
+def set_project_deleting(project_id, deleting=True):
+    """
+    flag a project and all its apps as being deleted, one UPDATE each
+    """
+    try:
+        App.query.filter(App.project_id == project_id).update(
+            {App.deleting: deleting}, synchronize_session=False)
+        Project.query.filter(Project.id == project_id).update(
+            {Project.deleting: deleting}, synchronize_session=False)
+        db.session.commit()
+        return True
+    except SQLAlchemyError:
+        db.session.rollback()
+        return False
+
+
+def delete_project_namespace(kube_client, namespace):
+    """
+    delete a project's namespace, the cluster garbage collects everything
+    in it in the background
+    """
+    try:
+        kube_client.kube.delete_namespace(
+            namespace, propagation_policy='Background',
+            _preload_content=False)
+    except client.rest.ApiException as e:
+        if e.status != 404:
+            raise
+
+
+def namespace_exists(kube_client, namespace):
+    try:
+        kube_client.kube.read_namespace(namespace, _preload_content=False)
+        return True
+    except client.rest.ApiException as e:
+        if e.status == 404:
+            return False
+        raise
+
+
+def soft_delete_project(project_id):
+    """
+    soft delete a project and all its apps in one transaction, renaming
+    them the way soft_delete does
+    """
+    suffix = f'_deleted_{int(time.time())}'
+    try:
+        App.query.filter(App.project_id == project_id).update({
+            App.deleted: True,
+            App.deleting: False,
+            App.name: App.name + suffix
+        }, synchronize_session=False)
+        Project.query.filter(Project.id == project_id).update({
+            Project.deleted: True,
+            Project.deleting: False,
+            Project.name: Project.name + suffix
+        }, synchronize_session=False)
+        db.session.commit()
+        return True
+    except SQLAlchemyError:
+        db.session.rollback()
+        return False
+
+
+def finalise_project_deletion(project_id, user_id=None):
+    """
+    soft delete a project once its namespace is gone. Raises
+    NamespaceTerminating while it is still there, the caller tries again
+    later.
+    """
+    from app.helpers.kube import get_kube_clients
+
+    project = Project.get_by_id(project_id)
+    if not project:
+        # already finalised
+        return True
+
+    if namespace_exists(get_kube_clients(project.cluster), project.alias):
+        raise NamespaceTerminating(f'namespace {project.alias} is terminating')
+
+    if not soft_delete_project(project.id):
+        raise SQLAlchemyError(f'failed to soft delete project {project_id}')
+
+    logger.info(f'project {project_id} deleted with its namespace')
+    log_activity('Project', status='Success',
+                 operation='Delete',
+                 description='Deleted project Successfully',
+                 a_project=project,
+                 a_cluster_id=project.cluster_id,
+                 user_id=user_id)
+    return True
+
+
+def abandon_project_deletion(project_id, reason, user_id=None):
+    """
+    give up finalising a project's deletion, clearing its deleting flag so
+    that it can be deleted again
+    """
+    set_project_deleting(project_id, False)
+
+    project = Project.get_by_id(project_id)
+    if project:
+        log_activity('Project', status='Failed',
+                     operation='Delete',
+                     description=reason,
+                     a_project=project,
+                     a_cluster_id=project.cluster_id,
+                     user_id=user_id)
@@ -0,0 +1,58 @@
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.orm import joinedload
+
+from app.models import db
+from app.models.app import App
+from app.models.project import Project
+from app.models.project_users import ProjectFollowers
+from app.models.tags import ProjectTag, TagFollowers
+
+
+def preload_projects(projects, current_user_id=None):
+    """
+    compute the per project fields of ProjectSchema for a whole page of
+    projects in a constant number of queries, instead of a few queries for
+    every project as the schema dumps it. Returns the schema context:
+
+        project_schema.context = preload_projects(projects, user_id)
+
+    The clusters, tags and tag names of the projects are loaded along the
+    way, so dumping them doesn't lazy load either.
+    """
+    ids = list({project.id for project in projects})
+    if not ids:
+        return {}
+
+    apps_count = select([func.count(App.id)]).where(and_(
+        App.project_id == Project.id, App.deleted.isnot(True))).as_scalar()
+    followers_count = select([func.count(ProjectFollowers.id)]).where(
+        ProjectFollowers.project_id == Project.id).as_scalar()
+    is_following = exists().where(and_(
+        ProjectFollowers.project_id == Project.id,
+        ProjectFollowers.user_id == current_user_id))
+
+    counters = db.session.query(
+        Project.id, apps_count, followers_count, is_following
+    ).filter(Project.id.in_(ids)).all()
+
+    # fills in the relationships of the projects already in the session
+    Project.query.options(
+        joinedload(Project.cluster),
+        joinedload(Project.tags).joinedload(ProjectTag.tag)
+    ).populate_existing().filter(Project.id.in_(ids)).all()
+
+    tag_ids = {project_tag.tag_id
+               for project in projects for project_tag in project.tags}
+    followed_tags = set()
+    if tag_ids and current_user_id:
+        followed_tags = {tag_id for tag_id, in db.session.query(
+            TagFollowers.tag_id).filter(
+                TagFollowers.user_id == current_user_id,
+                TagFollowers.tag_id.in_(tag_ids)).distinct()}
+
+    return dict(
+        apps_count={id: count for id, count, _, _ in counters},
+        followers_count={id: count for id, _, count, _ in counters},
+        followed_projects={id for id, _, _, following in counters if following},
+        followed_tags=followed_tags
+    )
@@ -0,0 +1,15 @@
+import requests
+
+from app.helpers.cost_modal import http_timeout
+
+
+def prometheus_query(prometheus_url, query, timeout=None):
+    """
+    run an instant query against a cluster's prometheus and return the
+    data of the response
+    """
+    response = requests.get(
+        f'{prometheus_url.rstrip("/")}/api/v1/query',
+        params=dict(query=query), timeout=timeout or http_timeout())
+    response.raise_for_status()
+    return response.json()['data']
@@ -0,0 +1,19 @@
+import threading
+
+import redis
+from flask import current_app
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    shared redis client for the configured REDIS_URL
+    """
+    url = current_app.config['REDIS_URL']
+    with _lock:
+        if url not in _clients:
+            _clients[url] = redis.Redis.from_url(
+                url, socket_timeout=2, socket_connect_timeout=2)
+        return _clients[url]
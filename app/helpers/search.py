@@ -0,0 +1,115 @@
+import math
+
+from sqlalchemy import String, and_, cast, func, literal, or_, union_all
+
+from app.models import db
+from app.models.app import App
+from app.models.project import Project
+from app.models.tags import Tag
+from app.models.user import User
+
+# keywords <% column: the keywords are close to some word of the column.
+# Served by the gin_trgm_ops indexes, the percent is doubled for psycopg2
+WORD_SIMILAR = '%%>'
+
+# searchable models and the columns their keywords are matched against
+SEARCH_TYPES = {
+    'projects': (Project, (Project.name,)),
+    'apps': (App, (App.name,)),
+    'tags': (Tag, (Tag.name,)),
+    'users': (User, (User.name, User.email)),
+}
+
+
+def search_filter(keywords, *columns):
+    """
+    rows whose columns contain the keywords, or a word close enough to
+    them to be a typo
+    """
+    return or_(*[condition for column in columns for condition in (
+        column.ilike(f'%{keywords}%'),
+        column.op(WORD_SIMILAR)(keywords)
+    )])
+
+
+def search_rank(keywords, *columns):
+    """
+    how well the best of the columns matches the keywords, 1 for exact words
+    """
+    ranks = [func.word_similarity(keywords, column) for column in columns]
+    return ranks[0] if len(ranks) == 1 else func.greatest(*ranks)
+
+
+def ranked_search(query, model, keywords, *columns):
+    """
+    filter a query down to the keyword matches, best matches first and
+    newest first among equal matches
+    """
+    return query.filter(search_filter(keywords, *columns)).order_by(
+        search_rank(keywords, *columns).desc(), model.date_created.desc())
+
+
+def search_pagination(total, page, per_page):
+    pages = math.ceil(total / per_page) if per_page else 0
+    return {
+        'total': total,
+        'pages': pages,
+        'page': page,
+        'per_page': per_page,
+        'next': page + 1 if page < pages else None,
+        'prev': page - 1 if page > 1 else None
+    }
+
+
+def search_all(keywords, types, page=1, per_page=10):
+    """
+    rank the matches of several types in one query, counting each type's
+    matches with a window function instead of a COUNT per type. Returns
+    {type: (pagination, page of objects)} for the types with matches.
+    """
+    # model.query keeps soft deleted rows out
+    matches = union_all(*[
+        model.query.with_entities(
+            literal(search_type).label('type'),
+            cast(model.id, String).label('id'),
+            search_rank(keywords, *columns).label('rank'),
+            model.date_created.label('date_created')
+        ).filter(search_filter(keywords, *columns)).statement
+        for search_type, (model, columns) in SEARCH_TYPES.items()
+        if search_type in types
+    ]).alias('matches')
+
+    ranked = db.session.query(
+        matches.c.type,
+        matches.c.id,
+        func.count().over(partition_by=matches.c.type).label('total'),
+        func.row_number().over(
+            partition_by=matches.c.type,
+            order_by=(matches.c.rank.desc(), matches.c.date_created.desc())
+        ).label('position')
+    ).subquery()
+
+    offset = (page - 1) * per_page
+    # the first match of every type is always returned for its total
+    rows = db.session.query(ranked).filter(or_(
+        and_(ranked.c.position > offset, ranked.c.position <= offset + per_page),
+        ranked.c.position == 1
+    )).order_by(ranked.c.type, ranked.c.position).all()
+
+    totals = {}
+    page_ids = {}
+    for row in rows:
+        totals[row.type] = row.total
+        if row.position > offset:
+            page_ids.setdefault(row.type, []).append(row.id)
+
+    results = {}
+    for search_type, total in totals.items():
+        model = SEARCH_TYPES[search_type][0]
+        ids = page_ids.get(search_type, [])
+        objects = {str(item.id): item for item in model.query.filter(
+            model.id.in_(ids)).all()} if ids else {}
+        results[search_type] = (
+            search_pagination(total, page, per_page),
+            [objects[id] for id in ids if id in objects])
+    return results
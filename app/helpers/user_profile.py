@@ -0,0 +1,45 @@
+from sqlalchemy import and_, exists, func, select
+
+from app.models import db
+from app.models.app import App
+from app.models.project import Project
+from app.models.project_users import ProjectFollowers
+from app.models.user import Followers
+
+
+def profile_counters(user_id, viewer_id=None):
+    """
+    every counter of a user's profile in a single query, each one a count
+    over an index rather than a load of the user's projects and apps.
+    requesting_user_follows says whether viewer_id follows the user.
+    """
+    live_projects = and_(
+        Project.owner_id == user_id, Project.deleted.isnot(True))
+
+    counters = dict(
+        projects_count=select([func.count(Project.id)]).where(live_projects),
+        apps_count=select([func.count(App.id)]).select_from(
+            App.__table__.join(Project.__table__, App.project_id == Project.id)
+        ).where(and_(live_projects, App.deleted.isnot(True))),
+        following_count=select([func.count()]).select_from(
+            Followers.__table__).where(Followers.follower_id == user_id),
+        follower_count=select([func.count()]).select_from(
+            Followers.__table__).where(Followers.followed_id == user_id),
+        followed_projects_count=select([func.count(ProjectFollowers.id)]).select_from(
+            ProjectFollowers.__table__.join(
+                Project.__table__, ProjectFollowers.project_id == Project.id)
+        ).where(and_(ProjectFollowers.user_id == user_id,
+                     Project.deleted.isnot(True))),
+        projects_followers_count=select([func.count(ProjectFollowers.id)]).select_from(
+            ProjectFollowers.__table__.join(
+                Project.__table__, ProjectFollowers.project_id == Project.id)
+        ).where(live_projects),
+    )
+
+    columns = [counter.as_scalar().label(name)
+               for name, counter in counters.items()]
+    columns.append(exists().where(and_(
+        Followers.followed_id == user_id,
+        Followers.follower_id == viewer_id)).label('requesting_user_follows'))
+
+    return db.session.query(*columns).one()._asdict()
@@ -1,5 +1,5 @@
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import text as sa_text
+from sqlalchemy import Date, cast, text as sa_text
 from app.models import db
 from app.models.model_mixin import ModelMixin, SoftDeleteQuery
 from app.models.app_state import AppState
@@ -21,6 +21,7 @@ class App(ModelMixin):
     port = db.Column(db.Integer, nullable=False)
     date_created = db.Column(db.DateTime, default=db.func.current_timestamp())
     deleted = db.Column(db.Boolean, default=False)
+    deleting = db.Column(db.Boolean, default=False)
     has_custom_domain = db.Column(db.Boolean, nullable=False, default=False)
     command = db.Column(db.String(256), nullable=True)
     replicas = db.Column(db.Integer, nullable=True)
@@ -35,3 +36,21 @@ class App(ModelMixin):
     model_image_uri = db.Column(db.String(256), nullable=True)
     api_type = db.Column(db.String(256), nullable=True)
     model_server = db.Column(db.String(256), nullable=True)
+
+    __table_args__ = (
+        # trigram index behind keyword search
+        db.Index('ix_app_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        # live apps of a project, newest first, and apps looked up by name
+        db.Index('ix_app_project_id_date_created', 'project_id', 'date_created',
+                 postgresql_where=sa_text('deleted IS NOT TRUE')),
+        db.Index('ix_app_project_id_name', 'project_id', 'name',
+                 postgresql_where=sa_text('deleted IS NOT TRUE')),
+        db.Index('ix_app_name', 'name',
+                 postgresql_where=sa_text('deleted IS NOT TRUE')),
+        # keyset pages of all live apps
+        db.Index('ix_app_date_created_id', 'date_created', 'id',
+                 postgresql_where=sa_text('deleted IS NOT TRUE')),
+        # the days the creation rollup counts again
+        db.Index('ix_app_date_created_date', cast(date_created, Date)),
+    )
@@ -20,7 +20,7 @@ class AppState(ModelMixin):
     id = db.Column(UUID(as_uuid=True), primary_key=True,
                    server_default=sa_text("uuid_generate_v4()"))
     app = db.Column(UUID(as_uuid=True), db.ForeignKey(
-        'app.id'), nullable=False)
+        'app.id'), nullable=False, unique=True)
     failure_reason = db.Column(db.String)
     message = db.Column(db.String)
     status = db.Column(db.Enum(AppStatusList), nullable=False)
@@ -12,6 +12,11 @@ class BillingInvoice(ModelMixin):
     """ billing invoice table definition"""
 
     __tablename__ = 'billing_invoices'
+    # a project's latest cashed or uncashed invoice
+    __table_args__ = (
+        db.Index('ix_billing_invoices_project_id_is_cashed_date_created',
+                 'project_id', 'is_cashed', 'date_created'),
+    )
 
     # billing invoice fields
     id = db.Column(UUID(as_uuid=True), primary_key=True, 
@@ -0,0 +1,18 @@
+from app.models import db
+from app.models.model_mixin import ModelMixin
+
+
+class CreationRollup(ModelMixin):
+    """
+    Users, projects or apps created on a day, and how many of the day's
+    users are verified and beta users. Rebuilt from the source tables by
+    refresh_creation_rollup, the creation charts read it instead of them.
+    """
+    __tablename__ = 'creation_rollups'
+
+    # users, projects or apps
+    entity = db.Column(db.String(32), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    created = db.Column(db.Integer, nullable=False, default=0)
+    verified = db.Column(db.Integer, nullable=False, default=0)
+    beta = db.Column(db.Integer, nullable=False, default=0)
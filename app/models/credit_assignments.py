@@ -7,6 +7,11 @@ from dateutil.relativedelta import *
 
 class CreditAssignment(ModelMixin):
     __tablename__ = 'credit_assignments'
+    # a user's assignment that expires last
+    __table_args__ = (
+        db.Index('ix_credit_assignments_user_id_expiry_date',
+                 'user_id', 'expiry_date'),
+    )
     id = db.Column(UUID(as_uuid=True), primary_key=True, server_default=sa_text("uuid_generate_v4()"))
     amount = db.Column(db.Integer, nullable=False)
     description = db.Column(db.String, nullable=True)
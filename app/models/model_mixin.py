@@ -2,7 +2,7 @@ from sqlalchemy import inspect, func, column
 from sqlalchemy.exc import SQLAlchemyError
 from flask_sqlalchemy import BaseQuery
 from ..models import db
-from sqlalchemy import or_
+from app.helpers.pagination import paginate_query
 import time
 from types import SimpleNamespace
 
@@ -19,8 +19,9 @@ class SoftDeleteQuery(BaseQuery):
             if not with_deleted:
                 deleted_column = getattr(
                     obj._entities[0].mapper.class_, 'deleted')
+                # IS NOT TRUE, the predicate of the partial indexes
                 return obj.filter(*filtered_entities).filter(
-                    or_(deleted_column == False, deleted_column == None))
+                    deleted_column.isnot(True))
         return obj
 
     def __init__(self, *args, **kwargs):
@@ -96,25 +97,27 @@ class ModelMixin(db.Model):
 
     @classmethod
     def find_all(cls, **kwargs):
+        """
+        rows matching the filters, or with paginate a page of them newest
+        first. A cursor (an empty one for the first page) pages by keyset,
+        see keyset_paginate, unfiltered lists then get an estimated total.
+        """
         paginate = kwargs.pop('paginate', False)
         page = kwargs.pop('page', 1)
         per_page = kwargs.pop('per_page', 10)
+        cursor = kwargs.pop('cursor', None)
+        count = kwargs.pop('count', None)
 
         try:
             if paginate:
-                result = cls.query.filter_by(
-                    **kwargs).order_by(cls.date_created.desc()).paginate(page=page, per_page=per_page, error_out=False)
-                pagination = {
-                    'total': result.total,
-                    'pages': result.pages,
-                    'page': result.page,
-                    'per_page': result.per_page,
-                    'next': result.next_num,
-                    'prev': result.prev_num,
-                }
+                if cursor is not None and not kwargs:
+                    count = count or 'estimate'
+                pagination, items = paginate_query(
+                    cls.query.filter_by(**kwargs).order_by(cls.date_created.desc()),
+                    cls, page, per_page, cursor=cursor, count=count)
                 return SimpleNamespace(
                     pagination=pagination,
-                    items=result.items)
+                    items=items)
             else:
                 return cls.query.filter_by(**kwargs).all()
         except SQLAlchemyError:
@@ -145,6 +148,13 @@ class ModelMixin(db.Model):
 
     @classmethod
     def graph_data(cls, start, end, set_by):
+        from app.helpers.creation_rollup import creation_graph_data, rollup_entity
+
+        # users, projects and apps are counted from their daily rollup
+        entity = rollup_entity(cls)
+        if entity:
+            return creation_graph_data(entity, start, end, set_by)
+
         if set_by == 'month':
             date_list = func.generate_series(
                 start, end, '1 month').alias('month')
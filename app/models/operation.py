@@ -0,0 +1,60 @@
+import datetime
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import text as sa_text
+from app.models import db
+from app.models.model_mixin import ModelMixin
+
+
+class Operation(ModelMixin):
+    """
+    A long running job, such as an app deployment, run by a celery worker
+    and polled by the client until it finishes
+    """
+    __tablename__ = 'operation'
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True,
+                   server_default=sa_text("uuid_generate_v4()"))
+    operation_type = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(32), nullable=False, default=PENDING)
+    user_id = db.Column(UUID(as_uuid=True),
+                        db.ForeignKey('user.id'), nullable=True)
+    project_id = db.Column(UUID(as_uuid=True),
+                           db.ForeignKey('project.id'), nullable=True)
+    # what a resumed operation needs to pick up where it stopped
+    params = db.Column(JSONB, nullable=True)
+    steps = db.Column(JSONB, nullable=False, default=list)
+    result = db.Column(JSONB, nullable=True)
+    message = db.Column(db.String, nullable=True)
+    date_created = db.Column(db.DateTime, default=db.func.current_timestamp())
+    date_updated = db.Column(db.DateTime, default=db.func.current_timestamp(),
+                             onupdate=db.func.current_timestamp())
+
+    def set_step(self, name, status, message=None, **details):
+        """
+        record the progress of one step, steps keep their first position
+        """
+        now = datetime.datetime.now().isoformat()
+        steps = [dict(step) for step in (self.steps or [])]
+        step = next((step for step in steps if step['name'] == name), None)
+        if not step:
+            step = dict(name=name, started_at=now)
+            steps.append(step)
+        step.update(status=status, updated_at=now, **details)
+        if message is not None:
+            step['message'] = str(message)
+        # reassign so that the JSONB change is picked up
+        self.steps = steps
+        return self.save()
+
+    def set_status(self, status, message=None, result=None):
+        self.status = status
+        if message is not None:
+            self.message = str(message)
+        if result is not None:
+            self.result = result
+        return self.save()
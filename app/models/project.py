@@ -1,5 +1,5 @@
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import text as sa_text
+from sqlalchemy import Date, cast, text as sa_text
 from sqlalchemy.orm import relationship
 from app.models import db
 from app.models.model_mixin import ModelMixin, SoftDeleteQuery
@@ -34,10 +34,28 @@ class Project(ModelMixin):
     anonymoususers = db.relationship(
         'AnonymousUser', backref='anonymous_project_users', lazy=True)
     deleted = db.Column(db.Boolean, default=False)
+    # set while the namespace is being deleted, before deleted
+    deleting = db.Column(db.Boolean, default=False)
     disabled = db.Column(db.Boolean, default=False)
     admin_disabled = db.Column(db.Boolean, default=False)
     tags = relationship('ProjectTag', back_populates='project')
 
+    __table_args__ = (
+        # trigram index behind keyword search
+        db.Index('ix_project_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        # live projects of an owner and of a cluster
+        db.Index('ix_project_owner_id_date_created', 'owner_id', 'date_created',
+                 postgresql_where=sa_text('deleted IS NOT TRUE')),
+        db.Index('ix_project_cluster_id', 'cluster_id',
+                 postgresql_where=sa_text('deleted IS NOT TRUE')),
+        # keyset pages of all live projects
+        db.Index('ix_project_date_created_id', 'date_created', 'id',
+                 postgresql_where=sa_text('deleted IS NOT TRUE')),
+        # the days the creation rollup counts again
+        db.Index('ix_project_date_created_date', cast(date_created, Date)),
+    )
+
     def is_followed_by(self, user):
         return any(follower.user_id == user.id for follower in self.followers)
 
@@ -14,6 +14,10 @@ class RolesList(enum.Enum):
 
 class ProjectUser(ModelMixin):
     _tablename_ = "project_users"
+    __table_args__ = (
+        db.Index('ix_project_user_user_id_project_id', 'user_id', 'project_id'),
+        db.Index('ix_project_user_project_id', 'project_id'),
+    )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, server_default=sa_text("uuid_generate_v4()"))
     user_id = db.Column('user_id', UUID(as_uuid=True), db.ForeignKey(User.id), nullable=False)
@@ -27,6 +31,11 @@ class ProjectUser(ModelMixin):
 
 class ProjectFollowers(ModelMixin):
     _tablename_ = "project_followers"
+    __table_args__ = (
+        # projects a user follows and the followers of a project
+        db.Index('ix_project_followers_user_id', 'user_id'),
+        db.Index('ix_project_followers_project_id', 'project_id'),
+    )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, server_default=sa_text("uuid_generate_v4()"))
     user_id = db.Column('user_id', UUID(as_uuid=True), db.ForeignKey(User.id), nullable=False)
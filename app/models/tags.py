@@ -7,6 +7,11 @@ from sqlalchemy import text as sa_text
 class Tag(ModelMixin):
     __tablename__ = "tag"
     query_class = SoftDeleteQuery
+    # trigram indexes behind keyword search
+    __table_args__ = (
+        db.Index('ix_tag_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True,
                    server_default=sa_text("uuid_generate_v4()"))
@@ -1,6 +1,6 @@
 from flask import current_app
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import text as sa_text
+from sqlalchemy import Date, cast, text as sa_text
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import create_access_token
 from datetime import timedelta
@@ -14,6 +14,11 @@ class Followers(ModelMixin):
     """ followers table definition """
 
     _tablename_ = "followers"
+    # the primary key starts with follower_id, this counts followers
+    __table_args__ = (
+        db.Index('ix_followers_followed_id', 'followed_id'),
+    )
+
     follower_id = db.Column(
         UUID(as_uuid=True), db.ForeignKey('user.id'), nullable=False, primary_key=True)
     followed_id = db.Column(
@@ -55,6 +60,20 @@ class User(ModelMixin):
     followed_tags = db.relationship(
         'TagFollowers', back_populates='user')
 
+    __table_args__ = (
+        # trigram indexes behind keyword search
+        db.Index('ix_user_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_user_email_trgm', 'email', postgresql_using='gin',
+                 postgresql_ops={'email': 'gin_trgm_ops'}),
+        # the cast(..., Date) filters of the active users view
+        db.Index('ix_user_last_seen_date', cast(last_seen, Date),
+                 postgresql_where=verified),
+        db.Index('ix_user_date_created_date', cast(date_created, Date)),
+        # keyset pages of all users
+        db.Index('ix_user_date_created_id', 'date_created', 'id'),
+    )
+
     def __init__(self, email, name, password, organisation=None):
         """ initialize with email, username and password """
         self.email = email
@@ -2,7 +2,7 @@ from flask_restful import Api
 from app.controllers import (
     IndexView, UsersView, UserLoginView, OAuthView, DeploymentsView, RolesView, InActiveUsersView, ProjectPinView,
     RolesDetailView, CreditAssignmentView, CreditAssignmentDetailView,  CreditView, UserRolesView, UserDataSummaryView, ClustersView,
-    ClusterDetailView, ClusterNamespacesView,
+    ClusterClientsView, ClusterStatusReconcilerView, ClusterHealthView, ClusterDetailView, ClusterNamespacesView,
     ClusterNamespaceDetailView, ClusterNodesView, ClusterNodeDetailView,
     ClusterDeploymentsView, ClusterDeploymentDetailView, ClusterPvcsView, ClusterPvcDetailView,
     ClusterPVDetailView, ClusterPVsView, ClusterPodsView, ClusterPodDetailView,
@@ -10,18 +10,21 @@ from app.controllers import (
     ClusterStorageClassView, ClusterStorageClassDetailView,
     ProjectsView, ProjectDetailView, UserProjectsView, UserEmailVerificationView,
     EmailVerificationRequest, ForgotPasswordView, ResetPasswordView, AppsView, UserDetailView, AdminLoginView,
-    ProjectAppsView, AppDetailView, RegistriesView, AppLogsView,
+    ProjectAppsView, AppDetailView, RegistriesView, AppLogsView, AppLogsStreamView,
     UserAdminUpdateView, AppRevertView, ProjectGetCostsView, TransactionRecordView, CreditTransactionRecordView, CreditPurchaseTransactionRecordView,
     BillingInvoiceView, BillingInvoiceNotificationView, SystemSummaryView, CreditDetailView, ProjectUsersView, ProjectUsersTransferView, AppReviseView,
     ProjectUsersHandleInviteView, ClusterProjectsView, ProjectDisableView, ProjectEnableView, AppRedeployView, AppDisableView, AppEnableView,
     TagsView, TagsDetailView, TagFollowingView, GenericSearchView, MLProjectAppsView,
-    UserDisableView, UserEnableView, AppDockerWebhookListenerView, UserFollowersView, UserFollowView, ProjectFollowingView, ActivityFeedView,SendInactiveUserMailReminder,)
+    UserDisableView, UserEnableView, AppDockerWebhookListenerView, UserFollowersView, UserFollowView, ProjectFollowingView, ActivityFeedView,SendInactiveUserMailReminder, OperationDetailView,)
 from app.controllers.app import AppRevisionsView
 from app.controllers.billing_invoice import BillingInvoiceDetailView
 from app.controllers.receipts import BillingReceiptsDetailView, BillingReceiptsView
 from app.controllers.transactions import TransactionRecordDetailView, TransactionVerificationView
+from app.helpers.json_output import output_json
 
 api = Api()
+# responses are encoded with orjson
+api.representations['application/json'] = output_json
 
 # Index route
 api.add_resource(IndexView, '/')
@@ -57,6 +60,9 @@ api.add_resource(GenericSearchView, '/search')
 
 # Clusters
 api.add_resource(ClustersView, '/clusters', endpoint='clusters')
+api.add_resource(ClusterClientsView, '/clusters/clients')
+api.add_resource(ClusterStatusReconcilerView, '/clusters/status_reconciler')
+api.add_resource(ClusterHealthView, '/clusters/health')
 api.add_resource(ClusterDetailView, '/clusters/<string:cluster_id>')
 api.add_resource(ClusterNamespacesView,
                  '/clusters/<string:cluster_id>/namespaces')
@@ -177,6 +183,11 @@ api.add_resource(
     MLProjectAppsView, '/projects/<string:project_id>/apps/ml')
 api.add_resource(
     AppLogsView, '/projects/<string:project_id>/apps/<string:app_id>/logs')
+api.add_resource(
+    AppLogsStreamView, '/projects/<string:project_id>/apps/<string:app_id>/logs/stream')
+
+# Operations
+api.add_resource(OperationDetailView, '/operations/<string:operation_id>')
 
 
 # Registry routes
@@ -15,3 +15,4 @@ from .credit_assignments import CreditAssignmentSchema
 from .anonymous_users import AnonymousUsersSchema
 from .app_state import AppStateSchema
 from .tags import TagSchema, TagsProjectsSchema, TagsDetailSchema, TagFollowerSchema
+from .operation import OperationSchema
@@ -43,6 +43,7 @@ class AppSchema(Schema):
     has_custom_domain = fields.Boolean()
     disabled = fields.Boolean(dump_only=True)
     admin_disabled = fields.Boolean(dump_only=True)
+    deleting = fields.Boolean(dump_only=True)
     delete_env_vars = fields.List(fields.Str(), load_only=True)
     app_status = fields.Nested(AppStateSchema, many=True, dump_only=True)
     is_ai = fields.Boolean(required=False)
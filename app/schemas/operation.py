@@ -0,0 +1,15 @@
+from marshmallow import Schema, fields
+
+
+class OperationSchema(Schema):
+    id = fields.UUID(dump_only=True)
+    operation_type = fields.String(dump_only=True)
+    status = fields.String(dump_only=True)
+    user_id = fields.String(dump_only=True)
+    project_id = fields.String(dump_only=True)
+    params = fields.Raw(dump_only=True)
+    steps = fields.Raw(dump_only=True)
+    result = fields.Raw(dump_only=True)
+    message = fields.String(dump_only=True)
+    date_created = fields.DateTime(dump_only=True)
+    date_updated = fields.DateTime(dump_only=True)
@@ -61,6 +61,7 @@ class ProjectSchema(Schema):
     apps_count = fields.Method("get_apps_count", dump_only=True)
     disabled = fields.Boolean(dump_only=True)
     admin_disabled = fields.Boolean(dump_only=True)
+    deleting = fields.Boolean(dump_only=True)
     prometheus_url = fields.Method("get_prometheus_url", dump_only=True)
     followers_count = fields.Method("get_followers_count", dump_only=True)
     is_following = fields.Method("get_is_following", dump_only=True)
@@ -69,7 +70,12 @@ class ProjectSchema(Schema):
     tags_add = fields.List(fields.String, load_only=True)
     tags_remove = fields.List(fields.String, load_only=True)
 
+    # the counters come from the context when a page of projects was
+    # preloaded with preload_projects, and are queried per project otherwise
+
     def get_is_following(self, obj):
+        if 'followed_projects' in self.context:
+            return obj.id in self.context['followed_projects']
         current_user_id = get_jwt_identity()
         current_user = User.get_by_id(current_user_id)
         return obj.is_followed_by(current_user)
@@ -78,10 +84,14 @@ class ProjectSchema(Schema):
         return get_item_age(obj.date_created)
 
     def get_apps_count(self, obj):
+        if 'apps_count' in self.context:
+            return self.context['apps_count'].get(obj.id, 0)
         return App.count(project_id=obj.id)
 
     def get_prometheus_url(self, obj):
         return obj.cluster.prometheus_url
 
     def get_followers_count(self, obj):
+        if 'followers_count' in self.context:
+            return self.context['followers_count'].get(obj.id, 0)
         return ProjectFollowers.count(project_id=obj.id)
@@ -44,6 +44,12 @@ class TagsProjectsSchema(TagSchema):
     def get_is_super_tag(self, obj):
         return obj.tag.is_super_tag
 
+    def get_is_following(self, obj):
+        if 'followed_tags' in self.context:
+            return obj.tag_id in self.context['followed_tags']
+        return TagFollowers.check_exists(
+            user_id=get_jwt_identity(), tag_id=obj.tag_id)
+
 
 class TagsDetailSchema(TagSchema):
     projects = fields.Nested(ProjectIndexSchema, many=True, dump_only=True)
@@ -18,7 +18,17 @@ from app.models.user import User
 
 from ..helpers.invoice_notification import send_invoice
 from ..helpers.credit_expiration_notification import send_credit_expiration_notification
-from ..helpers.app_status_updater import check_app_statuses
+from ..helpers.app_status_updater import check_app_statuses, reconcile_cluster_app_statuses
+from ..helpers.app_deployment import run_deployment_operation
+from ..helpers.bulk_operations import run_bulk_operation, find_stale_operations
+from ..helpers.project_deletion import (NamespaceTerminating, abandon_project_deletion,
+                                        finalise_project_deletion)
+from ..helpers.kube_health import probe_clusters
+from ..helpers.creation_rollup import refresh_recent_creations
+from app.models.clusters import Cluster
+from kubernetes import client as kube_client
+from urllib3.exceptions import HTTPError
+import time
 
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
 celery_app = Celery(__name__, broker=redis_url,
@@ -70,6 +80,21 @@ def setup_periodic_tasks(**kwargs):
         crontab(minute=0, hour=0), updateScheduler.s(), name='check credits expiry')
     celery_app.add_periodic_task(crontab(minute=0, hour=0), sendExpirationNotification.s(
     ), name='send credits expiry notifications')
+    # Reconciles app states every APP_STATUS_RECONCILE_SECONDS
+    celery_app.add_periodic_task(
+        int(os.getenv("APP_STATUS_RECONCILE_SECONDS", "300")),
+        reconcile_app_statuses.s(), name='reconcile app statuses')
+    # Picks up bulk operations whose worker went away
+    celery_app.add_periodic_task(
+        60, resume_stale_operations.s(), name='resume stale operations')
+    # Records the reachability and latency of every cluster
+    celery_app.add_periodic_task(
+        int(os.getenv("KUBE_HEALTH_PROBE_SECONDS", "30")),
+        probe_cluster_health.s(), name='probe cluster health')
+    # Counts the users, projects and apps created on the last few days
+    celery_app.add_periodic_task(
+        int(os.getenv("CREATION_ROLLUP_SECONDS", "600")),
+        update_creation_rollup.s(), name='update creation rollup')
 
 
 @celery_app.task()
@@ -183,9 +208,68 @@ def sendExpirationNotification():
                     message='Internal server error'), 500
 
 
-# @celery_app.task()
-# def check_app_states():
-#     check_app_statuses()
+@celery_app.task()
+def reconcile_app_statuses():
+    # one shard per cluster so a slow cluster doesn't hold up the others
+    scheduled_at = time.time()
+    for cluster in Cluster.find_all():
+        reconcile_cluster_statuses.delay(str(cluster.id), scheduled_at)
+
+
+@celery_app.task()
+def reconcile_cluster_statuses(cluster_id, scheduled_at=None):
+    return reconcile_cluster_app_statuses(cluster_id, scheduled_at)
+
+
+@celery_app.task()
+def deploy_apps(operation_id, project_id, user_id, app_data=None, apps_data=None, app_id=None):
+    return run_deployment_operation(
+        operation_id, project_id, user_id, app_data=app_data,
+        apps_data=apps_data, app_id=app_id)
+
+
+# acknowledged once finished, so a job lost with its worker is delivered again
+@celery_app.task(acks_late=True, reject_on_worker_lost=True)
+def bulk_operation(operation_id):
+    return run_bulk_operation(operation_id)
+
+
+@celery_app.task()
+def resume_stale_operations():
+    stale_seconds = int(os.getenv("BULK_OPERATION_STALE_SECONDS", "300"))
+    for operation in find_stale_operations(stale_seconds):
+        bulk_operation.delay(str(operation.id))
+
+
+# a terminating namespace, or a cluster or database that is briefly away
+FINALISE_RETRY_ERRORS = (NamespaceTerminating, kube_client.rest.ApiException,
+                         HTTPError, SQLAlchemyError)
+
+
+@celery_app.task(bind=True, max_retries=120, autoretry_for=FINALISE_RETRY_ERRORS,
+                 retry_backoff=5, retry_backoff_max=60, retry_jitter=False)
+def finalise_project_delete(self, project_id, user_id=None):
+    # checks back until the namespace, and with it every app, is gone
+    try:
+        return finalise_project_deletion(project_id, user_id)
+    except Exception as e:
+        if self.request.retries >= self.max_retries or \
+                not isinstance(e, FINALISE_RETRY_ERRORS):
+            # the project would otherwise stay flagged as deleting for good
+            abandon_project_deletion(
+                project_id, getattr(e, 'reason', None) or str(e), user_id)
+        raise
+
+
+# expires with the next run so probes don't pile up behind a slow worker
+@celery_app.task(expires=int(os.getenv("KUBE_HEALTH_PROBE_SECONDS", "30")))
+def probe_cluster_health():
+    return probe_clusters(Cluster.find_all())
+
+
+@celery_app.task()
+def update_creation_rollup():
+    return refresh_recent_creations()
 
 
 @celery_app.task
@@ -0,0 +1,97 @@
+import json
+from types import SimpleNamespace
+
+from kubernetes import client
+
+from app.helpers.app_discovery import label_legacy_app
+from app.helpers.kube import get_app_deployments
+
+
+def make_apps_api(deployments, patches):
+    def read_namespaced_deployment(name, namespace, _preload_content=True):
+        if name not in deployments:
+            raise client.rest.ApiException(status=404)
+        return SimpleNamespace(data=json.dumps(deployments[name]))
+
+    def patch_namespaced_deployment(name, namespace, body, _preload_content=True):
+        patches.append((name, body))
+
+    return SimpleNamespace(
+        read_namespaced_deployment=read_namespaced_deployment,
+        patch_namespaced_deployment=patch_namespaced_deployment)
+
+
+def make_deployment(name, labels=None, template_labels=None):
+    return dict(
+        metadata=dict(name=name, labels=labels),
+        spec=dict(template=dict(metadata=dict(labels=template_labels))))
+
+
+def test_label_legacy_app_labels_each_unlabelled_deployment():
+    """
+    GIVEN an unlabelled app, a labelled app with an unlabelled database
+    deployment and a labelled app without one
+    WHEN the apps are migrated to label based discovery
+    THEN check that only the unlabelled deployments are patched, and that
+    only the app deployment's pod template is
+    """
+    patches = []
+    deployments = {
+        'web-deployment': make_deployment('web-deployment', template_labels=dict(run='web')),
+        'api-deployment': make_deployment(
+            'api-deployment', dict(app='api'), dict(app='api')),
+        'api-postgres-db': make_deployment('api-postgres-db'),
+        'worker-deployment': make_deployment(
+            'worker-deployment', dict(app='worker'), dict(app='worker')),
+    }
+    kube_client = SimpleNamespace(appsv1_api=make_apps_api(deployments, patches))
+
+    assert label_legacy_app(kube_client, 'project', 'web')
+    assert label_legacy_app(kube_client, 'project', 'api')
+    assert not label_legacy_app(kube_client, 'project', 'worker')
+
+    assert patches == [('web-deployment', {
+        'metadata': {'labels': {'app': 'web'}},
+        'spec': {'template': {'metadata': {'labels': {'app': 'web'}}}}
+    }), ('api-postgres-db', {'metadata': {'labels': {'app': 'api'}}})]
+
+
+def test_get_app_deployments_reads_unlabelled_apps_by_name():
+    """
+    GIVEN a labelled app, an unlabelled app with a database deployment and
+    an app whose deployment is gone
+    WHEN their deployments are fetched
+    THEN check that only the apps missing from the labelled list are read
+    by name, and nothing else lists the namespace
+    """
+    calls = []
+
+    def deployment(name):
+        return SimpleNamespace(metadata=SimpleNamespace(name=name))
+
+    def list_namespaced_deployment(namespace, **kwargs):
+        calls.append(('list', kwargs))
+        return SimpleNamespace(items=[deployment('web-deployment')])
+
+    def read_namespaced_deployment(name, namespace):
+        calls.append(('read', name))
+        if name not in ('api-deployment', 'api-postgres-db'):
+            raise client.rest.ApiException(status=404)
+        return deployment(name)
+
+    kube_client = SimpleNamespace(appsv1_api=SimpleNamespace(
+        list_namespaced_deployment=list_namespaced_deployment,
+        read_namespaced_deployment=read_namespaced_deployment))
+
+    app_deployments = get_app_deployments(
+        kube_client, 'project', ['web', 'api', 'gone'])
+
+    assert app_deployments['web'].deployment.metadata.name == 'web-deployment'
+    assert app_deployments['api'].db_deployment.metadata.name == 'api-postgres-db'
+    assert app_deployments['gone'].deployment is None
+    assert calls == [
+        ('list', dict(label_selector='app in (api,gone,web)')),
+        ('read', 'api-deployment'),
+        ('read', 'api-postgres-db'),
+        ('read', 'gone-deployment'),
+    ]
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.helpers.app_status_updater import app_state_status, reconcile_namespace
+
+
+def make_list_function(items, calls):
+    def list_function(namespace, _preload_content=True, **kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(data=json.dumps(dict(metadata={}, items=items)))
+    return list_function
+
+
+def test_reconcile_namespace_computes_all_app_statuses_from_one_list():
+    """
+    GIVEN a namespace with a running app, a crashing app and a missing app
+    WHEN the namespace is reconciled
+    THEN check that each app gets its status from the shared pod list
+    and that only the apps' objects are listed
+    """
+    calls = []
+    pods = [
+        dict(metadata=dict(name='web-deployment-5d8-abc', labels=dict(app='web')),
+             status=dict(phase='Running')),
+        dict(metadata=dict(name='api-deployment-7f9-def', labels=dict(app='api')),
+             status=dict(phase='Pending', containerStatuses=[dict(
+                 state=dict(waiting=dict(reason='CrashLoopBackOff', message='back-off')))])),
+    ]
+    deployments = [
+        dict(metadata=dict(name='web-deployment')),
+        dict(metadata=dict(name='api-deployment')),
+    ]
+    kube_client = SimpleNamespace(
+        kube=SimpleNamespace(list_namespaced_pod=make_list_function(pods, calls)),
+        appsv1_api=SimpleNamespace(
+            list_namespaced_deployment=make_list_function(deployments, calls)))
+    apps = [
+        SimpleNamespace(id=1, alias='web', disabled=False),
+        SimpleNamespace(id=2, alias='api', disabled=False),
+        SimpleNamespace(id=3, alias='gone', disabled=False),
+    ]
+
+    states = reconcile_namespace(kube_client, 'project', apps, datetime.now())
+    statuses = {state['app']: state['status'] for state in states}
+
+    assert statuses == {1: 'running', 2: 'failed', 3: 'down'}
+    assert 'CrashLoopBackOff' in states[1]['failure_reason']
+    assert [call['label_selector'] for call in calls] == ['app in (api,gone,web)'] * 2
+
+
+def test_app_state_status_writes_detail_statuses_as_enum_values():
+    """
+    GIVEN the statuses the app detail view works out
+    WHEN they are turned into app state statuses
+    THEN check that each is one of the appstatuslist enum values
+    """
+    assert app_state_status('running', True) == 'running'
+    assert app_state_status('failed', False) == 'failed'
+    assert app_state_status('disabled', False) == 'failed'
+    assert app_state_status('partially_running', True) == 'running'
+    assert app_state_status('partially_running', False) == 'failed'
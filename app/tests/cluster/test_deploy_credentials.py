@@ -0,0 +1,50 @@
+from flask import Flask
+
+from app.helpers import deploy_credentials
+from app.helpers.deploy_credentials import claim_credentials, stash_credentials
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+
+def test_registry_credentials_are_kept_out_of_the_task(monkeypatch):
+    """
+    GIVEN a multi-app payload with a private image
+    WHEN its deployment is queued and then picked up by a worker
+    THEN check that the credentials are only stored encrypted and are
+    given back to the worker once
+    """
+    redis = FakeRedis()
+    monkeypatch.setattr(deploy_credentials, 'get_redis', lambda: redis)
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'secret'
+
+    apps_data = [
+        dict(name='web', image='user/web', private_image=True,
+             docker_username='user', docker_password='hunter2'),
+        dict(name='db', image='postgres'),
+    ]
+    with app.app_context():
+        task_apps = stash_credentials('operation', apps_data)
+
+        assert task_apps == [
+            dict(name='web', image='user/web', private_image=True),
+            dict(name='db', image='postgres'),
+        ]
+        assert b'hunter2' not in redis.values['deploy_credentials:operation']
+
+        assert claim_credentials('operation', task_apps) == apps_data
+        assert redis.values == {}
+        assert claim_credentials('operation', task_apps) == task_apps
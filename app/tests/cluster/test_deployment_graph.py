@@ -0,0 +1,40 @@
+import pytest
+
+from app.helpers.deployment_graph import build_deployment_graph, deployment_levels
+
+
+def test_deployment_graph_levels_follow_dependencies():
+    """
+    GIVEN a multi-app payload where apps name others in dependant_env_vars
+    WHEN the payload is parsed into a dependency graph
+    THEN check that each level only depends on earlier levels
+    """
+    graph = build_deployment_graph([
+        dict(name='web', dependant_env_vars=dict(API_URL='api')),
+        dict(name='api', dependant_env_vars=dict(DB_URL='db', CACHE_URL='cache')),
+        dict(name='db'),
+        dict(name='cache'),
+        dict(name='worker', dependant_env_vars=dict(DB_URL='db',
+                                                    OTHER_URL='elsewhere')),
+    ])
+
+    assert graph['worker'] == {'db'}
+    assert deployment_levels(graph) == [
+        ['db', 'cache'], ['api', 'worker'], ['web']]
+
+
+def test_deployment_graph_rejects_cycles():
+    """
+    GIVEN a multi-app payload whose apps depend on each other in a cycle
+    WHEN the payload is parsed into a dependency graph
+    THEN check that it is rejected before anything is deployed
+    """
+    with pytest.raises(ValueError) as error:
+        build_deployment_graph([
+            dict(name='a', dependant_env_vars=dict(B_URL='b')),
+            dict(name='b', dependant_env_vars=dict(C_URL='c')),
+            dict(name='c', dependant_env_vars=dict(A_URL='a')),
+            dict(name='d'),
+        ])
+
+    assert 'a, b, c' in str(error.value)
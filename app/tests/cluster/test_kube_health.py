@@ -0,0 +1,58 @@
+import pytest
+from kubernetes import client
+
+from app.helpers.kube_health import CircuitBreaker, ClusterApiClient, ClusterUnavailable
+
+
+def test_circuit_breaker_opens_after_consecutive_failures():
+    """
+    GIVEN a circuit breaker with a threshold of two failures
+    WHEN calls fail and the reset time passes
+    THEN check that it opens, lets a single trial through and closes again
+    """
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+    breaker.record_failure()
+    breaker.reset_seconds = 60
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    breaker.reset_seconds = 0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+
+def test_cluster_api_client_fails_fast_while_open(monkeypatch):
+    """
+    GIVEN a cluster whose API server keeps failing
+    WHEN requests are made through its client
+    THEN check that they get the default timeout and fail fast with 503 once the breaker opens
+    """
+    timeouts = []
+
+    def failing_request(self, method, url, **kwargs):
+        timeouts.append(kwargs['_request_timeout'])
+        raise client.rest.ApiException(status=500)
+
+    monkeypatch.setattr(client.ApiClient, 'request', failing_request)
+    api_client = ClusterApiClient(
+        client.Configuration(), cluster_id='cluster-1',
+        breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60),
+        connect_timeout=5, read_timeout=30)
+
+    for _ in range(2):
+        with pytest.raises(client.rest.ApiException):
+            api_client.request('GET', 'https://cluster/version')
+    with pytest.raises(ClusterUnavailable) as error:
+        api_client.request('GET', 'https://cluster/version')
+
+    assert timeouts == [(5, 30), (5, 30)]
+    assert error.value.status == 503
+    assert error.value.code == 503
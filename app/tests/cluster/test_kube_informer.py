@@ -0,0 +1,62 @@
+from app.helpers.kube_informer import ResourceStore, parse_label_selector
+
+
+def make_pod(name, namespace, labels=None, resource_version='1'):
+    return dict(metadata=dict(
+        name=name, namespace=namespace, labels=labels,
+        resourceVersion=resource_version))
+
+
+def test_resource_store_indexes_by_namespace_and_label():
+    """
+    GIVEN a resource store filled from a list call
+    WHEN objects are listed by namespace and by label
+    THEN check that only the matching objects are returned
+    """
+    store = ResourceStore()
+    store.replace([
+        make_pod('web-1', 'project-a', {'app': 'web'}),
+        make_pod('db-1', 'project-a', {'app': 'db'}),
+        make_pod('web-1', 'project-b', {'app': 'web'}),
+    ], '10')
+
+    assert store.synced
+    assert store.resource_version == '10'
+    assert len(store.list()) == 3
+    assert len(store.list(namespace='project-a')) == 2
+    assert len(store.list(labels={'app': 'web'})) == 2
+    assert len(store.list(namespace='project-b', labels={'app': 'web'})) == 1
+    assert len(store.list(name='web-1')) == 2
+
+
+def test_resource_store_applies_watch_events():
+    """
+    GIVEN a synced resource store
+    WHEN modified and deleted watch events are applied
+    THEN check that the store and its indexes follow them
+    """
+    store = ResourceStore()
+    store.replace([make_pod('web-1', 'project-a', {'app': 'web'})], '10')
+
+    store.apply('MODIFIED', make_pod(
+        'web-1', 'project-a', {'app': 'api'}, resource_version='11'))
+    assert store.list(labels={'app': 'web'}) == []
+    assert len(store.list(labels={'app': 'api'})) == 1
+    assert store.resource_version == '11'
+
+    store.apply('DELETED', make_pod(
+        'web-1', 'project-a', {'app': 'api'}, resource_version='12'))
+    assert store.list() == []
+
+
+def test_parse_label_selector():
+    """
+    GIVEN label selectors passed to the cluster views
+    WHEN they are parsed for the label index
+    THEN check that set based and existence selectors are left to live reads
+    """
+    assert parse_label_selector('app=web, tier==db') == {
+        'app': 'web', 'tier': 'db'}
+    assert parse_label_selector('app in (web,db)') is None
+    assert parse_label_selector('app') is None
+    assert parse_label_selector('app=web,tier') is None
@@ -0,0 +1,49 @@
+import pytest
+from kubernetes import client
+
+from app.helpers.kube_patch import container_patch, env_vars_patch, retry_on_conflict
+
+
+def test_container_patch_merges_env_vars_by_name():
+    """
+    GIVEN env vars to set and env vars to delete
+    WHEN a container patch is built for them
+    THEN check that it is a strategic merge patch of the named container
+    """
+    patch = container_patch(
+        'web', replicas=2,
+        env=env_vars_patch({'PORT': 80}, ['DEBUG']))
+
+    assert patch == {'spec': {
+        'replicas': 2,
+        'template': {'spec': {'containers': [{
+            'name': 'web',
+            'env': [{'name': 'PORT', 'value': '80'},
+                    {'name': 'DEBUG', '$patch': 'delete'}]
+        }]}}
+    }}
+    assert container_patch('web') == {}
+
+
+def test_retry_on_conflict_retries_conflicts_only():
+    """
+    GIVEN a mutation that fails with conflicts before succeeding
+    WHEN it is run with conflict retry
+    THEN check that conflicts are retried and other errors are raised
+    """
+    attempts = []
+
+    def mutation():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise client.rest.ApiException(status=409)
+        return 'patched'
+
+    assert retry_on_conflict(mutation, backoff=0) == 'patched'
+    assert len(attempts) == 3
+
+    def failing_mutation():
+        raise client.rest.ApiException(status=422)
+
+    with pytest.raises(client.rest.ApiException):
+        retry_on_conflict(failing_mutation, backoff=0)
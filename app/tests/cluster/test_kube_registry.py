@@ -0,0 +1,38 @@
+from app.helpers.kube_registry import KubeClientRegistry
+
+
+def test_registry_reuses_clients_for_same_credentials():
+    """
+    GIVEN a kube client registry
+    WHEN clients for the same cluster and credentials are requested twice
+    THEN check that the same pooled clients are returned
+    """
+    registry = KubeClientRegistry()
+    first = registry.get('cluster-1', 'https://kube.example', 'token')
+    second = registry.get('cluster-1', 'https://kube.example', 'token')
+
+    assert first is second
+    assert first.kube.api_client is first.appsv1_api.api_client
+    assert registry.hits == 1
+    assert registry.misses == 1
+
+
+def test_registry_rebuilds_clients_when_credentials_change():
+    """
+    GIVEN a kube client registry with a cached cluster
+    WHEN the cluster token changes or the entry is invalidated
+    THEN check that new clients are built
+    """
+    registry = KubeClientRegistry()
+    first = registry.get('cluster-1', 'https://kube.example', 'token')
+    rotated = registry.get('cluster-1', 'https://kube.example', 'new-token')
+
+    assert rotated is not first
+    assert registry.misses == 2
+
+    registry.invalidate('cluster-1')
+    rebuilt = registry.get('cluster-1', 'https://kube.example', 'new-token')
+
+    assert rebuilt is not rotated
+    assert registry.invalidations == 1
+    assert registry.stats()['clusters']['cluster-1']['pools'] == []
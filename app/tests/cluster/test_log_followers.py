@@ -0,0 +1,84 @@
+from app.helpers import pod_logs
+from app.helpers.pod_logs import LogFollowerLimiter
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.values.get(key, {})
+        for member, score in list(members.items()):
+            if score <= high:
+                del members[member]
+
+    def zadd(self, key, mapping):
+        self.values.setdefault(key, {}).update(mapping)
+
+    def zcard(self, key):
+        return len(self.values.get(key, {}))
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.values.get(key, {}).pop(member, None)
+        if not self.values.get(key):
+            self.values.pop(key, None)
+
+    def expire(self, key, seconds):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+        return lambda *args: self.commands.append((command, args))
+
+    def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+def test_log_follower_limits_hold_across_workers():
+    """
+    GIVEN two workers sharing the followers in redis
+    WHEN followers join and leave an app and another app
+    THEN check that the per app and total limits count every worker
+    """
+    redis = FakeRedis()
+    worker, other_worker = LogFollowerLimiter(redis, 260), LogFollowerLimiter(redis, 260)
+
+    first = worker.acquire('app', per_app_limit=2, total_limit=3)
+    assert first
+    assert other_worker.acquire('app', per_app_limit=2, total_limit=3)
+    assert not worker.acquire('app', per_app_limit=2, total_limit=3)
+
+    other = other_worker.acquire('other', per_app_limit=2, total_limit=3)
+    assert other
+    assert not worker.acquire('other', per_app_limit=2, total_limit=3)
+
+    worker.release('app', first)
+    assert other_worker.acquire('other', per_app_limit=2, total_limit=3)
+    assert len(redis.values['log_followers:total']) == 3
+
+
+def test_log_follower_places_expire(monkeypatch):
+    """
+    GIVEN followers whose streams were never released
+    WHEN their places expire
+    THEN check that new followers can take them
+    """
+    redis = FakeRedis()
+    limiter = LogFollowerLimiter(redis, 260)
+    monkeypatch.setattr(pod_logs.time, 'time', lambda: 1000.0)
+
+    assert limiter.acquire('app', per_app_limit=1, total_limit=1)
+    assert not limiter.acquire('other', per_app_limit=1, total_limit=1)
+
+    monkeypatch.setattr(pod_logs.time, 'time', lambda: 1261.0)
+    assert limiter.acquire('other', per_app_limit=1, total_limit=1)
@@ -0,0 +1,64 @@
+import time
+from types import SimpleNamespace
+
+from flask import Flask
+from prometheus_client import REGISTRY
+
+from app.helpers.metrics import kube_request_labels, observe_kube_request
+from app.helpers.pod_logs import fetch_pod_logs
+
+
+def test_kube_request_labels_name_verb_and_resource():
+    """
+    GIVEN API server requests for collections, objects and subresources
+    WHEN their metric labels are worked out
+    THEN check that they are labelled with the kubernetes verb and resource
+    """
+    host = 'https://cluster'
+
+    assert kube_request_labels(
+        'GET', f'{host}/api/v1/namespaces/ns/pods') == ('list', 'pods')
+    assert kube_request_labels(
+        'GET', f'{host}/api/v1/pods', [('watch', True)]) == ('watch', 'pods')
+    assert kube_request_labels(
+        'GET', f'{host}/api/v1/namespaces/ns/pods/web/log') == ('get', 'pods/log')
+    assert kube_request_labels(
+        'PATCH', f'{host}/apis/apps/v1/namespaces/ns/deployments/web/scale'
+    ) == ('patch', 'deployments/scale')
+    assert kube_request_labels(
+        'DELETE', f'{host}/api/v1/namespaces/ns') == ('delete', 'namespaces')
+    assert kube_request_labels('GET', f'{host}/version/') == ('get', 'version')
+
+
+def test_kube_calls_of_worker_threads_keep_the_request_endpoint():
+    """
+    GIVEN a request reading the logs of several pods on worker threads
+    WHEN each worker calls the API server
+    THEN check that the calls are labelled with the request's endpoint
+    """
+    app = Flask(__name__)
+    app.add_url_rule('/apps/<app_id>/logs', 'app_logs', lambda app_id: '')
+
+    def read_namespaced_pod_log(pod, namespace, **kwargs):
+        observe_kube_request(
+            'cluster-a', 'GET',
+            f'https://cluster/api/v1/namespaces/{namespace}/pods/{pod}/log',
+            [], time.monotonic(), 200)
+        return f'{pod} log'
+
+    kube_client = SimpleNamespace(kube=SimpleNamespace(
+        read_namespaced_pod_log=read_namespaced_pod_log))
+    labels = dict(cluster='cluster-a', verb='get', resource='pods/log',
+                  code='200')
+
+    def calls(endpoint):
+        return REGISTRY.get_sample_value(
+            'kube_api_requests_total', dict(endpoint=endpoint, **labels)) or 0
+
+    before = calls('app_logs')
+    with app.test_request_context('/apps/web/logs'):
+        assert fetch_pod_logs(kube_client, 'ns', ['web-1', 'web-2', 'web-3']) == \
+            ['web-1 log', 'web-2 log', 'web-3 log']
+
+    assert calls('app_logs') - before == 3
+    assert calls('background') == 0
@@ -31,6 +31,7 @@ def test_client():
         with flask_app.app_context():
             # create the database and database tables
             db.engine.execute('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"')
+            db.engine.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
             db.create_all()
             create_default_roles()
             yield testing_client  # this is where the testing happens
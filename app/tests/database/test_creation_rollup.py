@@ -0,0 +1,109 @@
+from datetime import date, datetime
+
+from app.helpers import creation_rollup
+from app.helpers.creation_rollup import (creation_graph_data, refresh_creation_rollup,
+                                         refresh_recent_creations)
+from app.models import db
+from app.models.user import User
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+    def sadd(self, key, *members):
+        self.values.setdefault(key, set()).update(
+            member.encode('utf-8') for member in members)
+
+    def spop(self, key, count):
+        members = self.values.pop(key, set())
+        return list(members)
+
+
+def add_user(name, date_created, verified=False, is_beta_user=False):
+    user = User(email=f'{name}@cranecloud.io', name=name, password='password')
+    user.date_created = date_created
+    user.verified = verified
+    user.is_beta_user = is_beta_user
+    db.session.add(user)
+    return user
+
+
+def test_creation_rollup_counts_users_per_month(test_client):
+    """
+    GIVEN users created over a few months
+    WHEN the creation rollup is refreshed fully and then from a day on
+    THEN check that the monthly charts read from it count them right
+    """
+    add_user('january', datetime(2024, 1, 5), verified=True)
+    add_user('january 2', datetime(2024, 1, 20, 23, 30), verified=True)
+    add_user('january 3', datetime(2024, 1, 20, 8))
+    march = add_user('march', datetime(2024, 3, 1), is_beta_user=True)
+    db.session.commit()
+
+    refresh_creation_rollup()
+
+    def chart(value='created'):
+        return [item['value'] for item in creation_graph_data(
+            'users', date(2024, 1, 1), date(2024, 3, 1), 'month', value)]
+
+    assert chart() == [3, 0, 1]
+    assert chart('verified') == [2, 0, 0]
+    assert chart('unverified') == [1, 0, 1]
+    assert chart('beta') == [0, 0, 1]
+    assert User.graph_data(date(2024, 1, 1), date(2024, 3, 1), 'month')[0] == \
+        {'year': 2024, 'month': 1, 'value': 3}
+
+    # only the days from since on are counted again
+    add_user('february', datetime(2024, 2, 10))
+    add_user('late january', datetime(2024, 1, 30))
+    march.verified = True
+    db.session.commit()
+    refresh_creation_rollup(since=date(2024, 2, 1))
+
+    assert chart() == [3, 1, 1]
+    assert chart('verified') == [2, 0, 1]
+
+    refresh_creation_rollup(days={date(2024, 1, 30)})
+    assert chart() == [4, 1, 1]
+
+
+def test_creation_rollup_follows_changes_to_old_days(test_client, monkeypatch):
+    """
+    GIVEN a rollup counted over users created long ago
+    WHEN users are verified one by one and in bulk, and deleted
+    THEN check that the next refresh counts their days again
+    """
+    redis = FakeRedis()
+    monkeypatch.setattr(creation_rollup, 'get_redis', lambda: redis)
+
+    first = add_user('first', datetime(2024, 1, 5))
+    add_user('second', datetime(2024, 2, 5))
+    db.session.commit()
+    refresh_creation_rollup()
+
+    def chart(value='created'):
+        return [item['value'] for item in creation_graph_data(
+            'users', date(2024, 1, 1), date(2024, 2, 1), 'month', value)]
+
+    first.verified = True
+    db.session.commit()
+    assert refresh_recent_creations()['stale_days'] == 1
+    assert chart('verified') == [1, 0]
+
+    User.query.filter(User.email == 'second@cranecloud.io').update(
+        {User.verified: True}, synchronize_session=False)
+    db.session.commit()
+    assert refresh_recent_creations()['since'] is None
+    assert chart('verified') == [1, 1]
+
+    db.session.delete(first)
+    db.session.commit()
+    refresh_recent_creations()
+    assert chart() == [0, 1]
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from app.helpers import platform_stats
+from app.helpers.platform_stats import get_platform_stats
+from app.models import db
+from app.models.clusters import Cluster
+from app.models.project import Project
+from app.models.user import User
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+
+def test_platform_stats_are_cleared_by_changes(test_client, monkeypatch):
+    """
+    GIVEN cached user and project statistics
+    WHEN a user is created and a project disabled and then deleted
+    THEN check that the statistics are recomputed after each change
+    """
+    redis = FakeRedis()
+    monkeypatch.setattr(platform_stats, 'get_redis', lambda: redis)
+
+    owner = User(email='owner@cranecloud.io', name='owner', password='password')
+    owner.save()
+    cluster = Cluster(name='cluster', host='https://cluster', token='token',
+                      description='cluster')
+    cluster.save()
+    project = Project(name='project', alias='project', owner_id=owner.id,
+                      cluster_id=cluster.id, project_type='web')
+    project.save()
+
+    assert get_platform_stats('users')['total'] == 1
+    assert get_platform_stats('projects') == dict(
+        total=1, disabled=0, project_type={'web': 1})
+    assert 'platform_stats:users' in redis.values
+
+    User(email='user@cranecloud.io', name='user', password='password').save()
+    assert get_platform_stats('users')['total'] == 2
+
+    # last_seen isn't counted and leaves the statistics cached
+    User.update(owner, last_seen=datetime.now())
+    assert 'platform_stats:users' in redis.values
+
+    Project.update(project, disabled=True)
+    assert get_platform_stats('projects')['disabled'] == 1
+
+    # bulk updates skip the flush but clear the statistics all the same
+    Project.query.filter(Project.id == project.id).update(
+        {Project.deleted: True}, synchronize_session=False)
+    db.session.commit()
+    assert get_platform_stats('projects')['total'] == 0
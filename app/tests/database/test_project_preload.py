@@ -0,0 +1,82 @@
+from sqlalchemy import event
+
+from app.helpers.project_preload import preload_projects
+from app.models import db
+from app.models.app import App
+from app.models.clusters import Cluster
+from app.models.project import Project
+from app.models.project_users import ProjectFollowers
+from app.models.tags import ProjectTag, Tag, TagFollowers
+from app.models.user import User
+from app.schemas import ProjectSchema
+
+
+def seed_projects(count):
+    owner = User(email='owner@cranecloud.io', name='owner', password='password')
+    follower = User(email='follower@cranecloud.io', name='follower', password='password')
+    cluster = Cluster(name='cluster', host='https://cluster', token='token',
+                      description='cluster', prometheus_url='https://prometheus')
+    tag = Tag(name='tag')
+    db.session.add_all([owner, follower, cluster, tag])
+    db.session.flush()
+
+    for i in range(count):
+        project = Project(name=f'project {i}', alias=f'project-{i}',
+                          owner_id=owner.id, cluster_id=cluster.id)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add_all([
+            App(name=f'app {i}', alias=f'app-{i}', port=80, project_id=project.id),
+            App(name=f'db {i}', alias=f'db-{i}', port=5432, project_id=project.id),
+            ProjectFollowers(user_id=follower.id, project_id=project.id),
+            ProjectTag(project_id=project.id, tag_id=tag.id),
+        ])
+    db.session.add(TagFollowers(user_id=follower.id, tag_id=tag.id))
+    db.session.commit()
+    return follower
+
+
+def dump_page(per_page, user_id):
+    """
+    dump a fresh page of projects, counting the queries it takes
+    """
+    db.session.expire_all()
+    projects = Project.query.order_by(
+        Project.date_created.desc()).limit(per_page).all()
+
+    statements = []
+
+    def count(*args, **kwargs):
+        statements.append(args[2])
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        project_schema = ProjectSchema(many=True)
+        project_schema.context = preload_projects(projects, user_id)
+        data, errors = project_schema.dump(projects)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert not errors
+    return data, statements
+
+
+def test_project_page_queries_are_constant(test_client):
+    """
+    GIVEN projects with apps, followers and tags
+    WHEN pages of 2 and 10 of them are dumped with ProjectSchema
+    THEN check that both take the same few queries and the counters are right
+    """
+    follower = seed_projects(10)
+
+    small_page, small_statements = dump_page(2, follower.id)
+    page, statements = dump_page(10, follower.id)
+
+    assert len(statements) == len(small_statements) <= 3, statements
+    assert len(page) == 10
+    for project in page:
+        assert project['apps_count'] == 2
+        assert project['followers_count'] == 1
+        assert project['is_following'] is True
+        assert project['prometheus_url'] == 'https://prometheus'
+        assert project['tags'][0]['name'] == 'tag'
+        assert project['tags'][0]['is_following'] is True
@@ -0,0 +1,160 @@
+import datetime
+import json
+import os
+
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import Date, cast, desc, text, tuple_
+
+from app.models import db
+from app.models.app import App
+from app.models.billing_invoice import BillingInvoice
+from app.models.credit_assignments import CreditAssignment
+from app.models.project import Project
+from app.models.project_users import ProjectUser
+from app.models.user import User
+from server import create_app
+
+MIGRATIONS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'migrations')
+
+SEED_SQL = [
+    """INSERT INTO clusters (name, host, token, description)
+       VALUES ('cluster', 'https://cluster', 'token'::bytea, 'cluster')""",
+    """INSERT INTO "user" (email, name, username, password, verified, is_beta_user,
+                           date_created, last_seen)
+       SELECT 'user' || i || '@cranecloud.io', 'user ' || i, 'user' || i, 'password',
+              i % 4 <> 0, false, now() - i * interval '1 hour', now() - i * interval '1 hour'
+       FROM generate_series(1, 2000) i""",
+    """INSERT INTO project (name, alias, owner_id, cluster_id, deleted, date_created)
+       SELECT 'project ' || i, 'project-' || i, u.id, c.id, i % 10 = 0,
+              now() - i * interval '1 minute'
+       FROM generate_series(1, 4000) i
+       JOIN (SELECT id, row_number() OVER () AS n FROM "user") u ON u.n = i % 2000 + 1
+       CROSS JOIN clusters c""",
+    """INSERT INTO app (name, alias, project_id, port, has_custom_domain, deleted, date_created)
+       SELECT 'app ' || i, 'app-' || i || '-' || p.alias, p.id, 80, false, i = 3,
+              now() - i * interval '1 minute'
+       FROM project p CROSS JOIN generate_series(1, 5) i""",
+    """INSERT INTO project_user (user_id, project_id, role)
+       SELECT owner_id, id, 'owner' FROM project""",
+    """INSERT INTO billing_invoices (project_id, is_cashed, date_created)
+       SELECT p.id, i > 1, now() - i * interval '30 days'
+       FROM project p CROSS JOIN generate_series(1, 3) i""",
+    """INSERT INTO credit_assignments (user_id, amount, expiry_date)
+       SELECT id, 100, now() + interval '6 months' FROM "user" """,
+    'ANALYZE',
+]
+
+
+@pytest.fixture(scope='function')
+def migrated_database():
+    """
+    the schema built by the migrations, as in production, rather than by
+    create_all from the models
+    """
+    flask_app = create_app(config_name='testing')
+    with flask_app.app_context():
+        upgrade(directory=MIGRATIONS_DIRECTORY)
+        yield
+        db.session.remove()
+        # the migrations create more than the models know about
+        db.engine.execute('DROP SCHEMA public CASCADE')
+        db.engine.execute('CREATE SCHEMA public')
+
+
+def migrated_indexes(table_name):
+    return {row[0] for row in db.session.execute(
+        text('SELECT indexname FROM pg_indexes WHERE tablename = :table_name'),
+        dict(table_name=table_name))}
+
+
+def scanned_relations(plan, node_type):
+    nodes = [plan]
+    relations = []
+    while nodes:
+        node = nodes.pop()
+        if node.get('Node Type') == node_type:
+            relations.append(node.get('Relation Name'))
+        nodes.extend(node.get('Plans', []))
+    return relations
+
+
+def query_plan(query):
+    statement = query.statement.compile(dialect=db.engine.dialect)
+    result = db.session.connection().execute(
+        f'EXPLAIN (FORMAT JSON) {statement}', statement.params).scalar()
+    return (json.loads(result) if isinstance(result, str) else result)[0]['Plan']
+
+
+def hot_queries():
+    user_id = str(db.session.query(User.id).first()[0])
+    project = db.session.query(Project.id, Project.cluster_id).first()
+    project_id, cluster_id = str(project[0]), str(project[1])
+    today = datetime.date.today()
+    # the last row of a page deep into the lists
+    last_user = db.session.query(User.date_created, User.id).order_by(
+        User.date_created.desc()).offset(500).first()
+    last_project = db.session.query(Project.date_created, Project.id).order_by(
+        Project.date_created.desc()).offset(500).first()
+
+    return {
+        'apps of a project': App.query.filter_by(
+            project_id=project_id).order_by(App.date_created.desc()),
+        'app of a project by name': App.query.filter_by(
+            project_id=project_id, name='app 1'),
+        'projects of an owner': Project.query.filter_by(
+            owner_id=user_id).order_by(Project.date_created.desc()),
+        'projects of a cluster': Project.query.filter_by(cluster_id=cluster_id),
+        'project membership': ProjectUser.query.filter_by(
+            user_id=user_id, project_id=project_id),
+        'latest uncashed invoice': BillingInvoice.query.filter_by(
+            project_id=project_id, is_cashed=False).order_by(
+                BillingInvoice.date_created.desc()),
+        'latest credit expiry': CreditAssignment.query.filter_by(
+            user_id=user_id).order_by(desc('expiry_date')),
+        'active users': User.query.filter(
+            cast(User.last_seen, Date) <= today,
+            cast(User.last_seen, Date) >= today - datetime.timedelta(days=7),
+            User.verified == True),
+        'keyset page of users': User.query.filter(
+            tuple_(User.date_created, User.id) < (last_user[0], str(last_user[1]))
+        ).order_by(User.date_created.desc(), User.id.desc()).limit(11),
+        'keyset page of projects': Project.query.filter(
+            tuple_(Project.date_created, Project.id) < (last_project[0], str(last_project[1]))
+        ).order_by(Project.date_created.desc(), Project.id.desc()).limit(11),
+    }
+
+
+def test_migrations_create_the_model_indexes(migrated_database):
+    """
+    GIVEN a database built by the migrations
+    WHEN its indexes are listed
+    THEN check that every index the models declare is there
+    """
+    for table in db.metadata.sorted_tables:
+        missing = {index.name for index in table.indexes} - \
+            migrated_indexes(table.name)
+        assert not missing, f'{table.name} is missing indexes {sorted(missing)}'
+
+
+def test_hot_queries_use_indexes(migrated_database):
+    """
+    GIVEN a database built by the migrations and seeded with thousands of
+    users, projects and apps
+    WHEN the plans of the hot queries are explained
+    THEN check that none of them falls back to a sequential scan
+    """
+    for statement in SEED_SQL:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+    # a seq scan is then only chosen when no index can serve the query
+    db.session.execute(text('SET enable_seqscan = off'))
+    try:
+        for name, query in hot_queries().items():
+            plan = query_plan(query)
+            assert not scanned_relations(plan, 'Seq Scan'), \
+                f'{name} is planned as a sequential scan: {json.dumps(plan)}'
+    finally:
+        db.session.execute(text('RESET enable_seqscan'))
@@ -1,5 +1,12 @@
 from app.tests.user import UserBaseTestCase
 from flask_jwt_extended import create_access_token
+from app.models import db
+from app.models.app import App
+from app.models.clusters import Cluster
+from app.models.project import Project
+from app.models.project_users import ProjectFollowers
+from app.models.user import Followers
+from app.schemas.user import UserSchema
 
 
 # # Test get user info
@@ -28,4 +35,45 @@ def test_get_all_users_admin(test_client, admin_login_user):
         headers=admin_login_user.headers
         )
         
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+
+# Test the profile counters
+def test_get_user_info_counters(test_client, login_user):
+    """
+    GIVEN a user with projects, apps, a deleted project and followers
+    WHEN the '/users/<user_id>' page is requested (GET) by a follower
+    THEN check that the counters only count live projects and apps
+    """
+    user = login_user.user
+    other_user = UserBaseTestCase().create_user(UserBaseTestCase.user_data_2)
+    cluster = Cluster(name='cluster', host='https://cluster', token='token',
+                      description='cluster')
+    db.session.add(cluster)
+    db.session.flush()
+
+    projects = [Project(name=f'project {i}', alias=f'project-{i}', owner_id=user.id,
+                        cluster_id=cluster.id, deleted=i == 2) for i in range(3)]
+    db.session.add_all(projects)
+    db.session.flush()
+    db.session.add_all(
+        [App(name=f'app {i}', alias=f'app-{i}', port=80, project_id=project.id)
+         for i, project in enumerate(projects)] +
+        [ProjectFollowers(user_id=other_user.id, project_id=projects[0].id),
+         Followers(follower_id=other_user.id, followed_id=user.id)])
+    db.session.commit()
+
+    other_user_dict, _ = UserSchema().dump(other_user)
+    other_user_headers = {'Authorization': 'Bearer {}'.format(
+        other_user.generate_token(other_user_dict))}
+    response = test_client.get(f'/users/{user.id}', headers=other_user_headers)
+    assert response.status_code == 200
+
+    data = response.json['data']['user']
+    assert data['projects_count'] == 2
+    assert data['apps_count'] == 2
+    assert data['follower_count'] == 1
+    assert data['following_count'] == 0
+    assert data['followed_projects_count'] == 0
+    assert data['projects_followers_count'] == 1
+    assert data['requesting_user_follows'] is True
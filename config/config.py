@@ -37,6 +37,80 @@ class Base:
 
     KUBE_SERVICE_PORT = int(os.getenv("KUBE_SERVICE_PORT", "80"))
 
+    # connections kept open per cluster by the shared kube clients
+    KUBE_CLIENT_POOL_MAXSIZE = int(
+        os.getenv("KUBE_CLIENT_POOL_MAXSIZE", "10"))
+
+    # seconds allowed to connect to and to wait on a cluster's API server
+    KUBE_CONNECT_TIMEOUT = int(os.getenv("KUBE_CONNECT_TIMEOUT", "5"))
+    KUBE_READ_TIMEOUT = int(os.getenv("KUBE_READ_TIMEOUT", "30"))
+
+    # consecutive failed calls that stop calls to a cluster, and the
+    # seconds before a call is tried again
+    KUBE_CIRCUIT_FAILURE_THRESHOLD = int(
+        os.getenv("KUBE_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    KUBE_CIRCUIT_RESET_SECONDS = int(
+        os.getenv("KUBE_CIRCUIT_RESET_SECONDS", "30"))
+
+    # how often clusters are probed, the probe's timeout and how long a
+    # worker keeps the result before reading it from redis again
+    KUBE_HEALTH_PROBE_SECONDS = int(
+        os.getenv("KUBE_HEALTH_PROBE_SECONDS", "30"))
+    KUBE_HEALTH_PROBE_TIMEOUT = int(
+        os.getenv("KUBE_HEALTH_PROBE_TIMEOUT", "3"))
+    KUBE_HEALTH_CACHE_SECONDS = int(
+        os.getenv("KUBE_HEALTH_CACHE_SECONDS", "5"))
+
+    # timeouts of calls to prometheus and kubecost on the clusters
+    HTTP_CONNECT_TIMEOUT = int(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = int(os.getenv("HTTP_READ_TIMEOUT", "30"))
+
+    # serve the admin cluster views from a list+watch cache of the cluster
+    KUBE_INFORMERS_ENABLED = os.getenv(
+        "KUBE_INFORMERS_ENABLED", "false").lower() == "true"
+    KUBE_INFORMER_WATCH_TIMEOUT = int(
+        os.getenv("KUBE_INFORMER_WATCH_TIMEOUT", "300"))
+
+    # seconds the cluster resource counts are cached for
+    KUBE_RESOURCE_COUNT_TTL = int(os.getenv("KUBE_RESOURCE_COUNT_TTL", "30"))
+
+    # pods whose logs are read at the same time by AppLogsView
+    APP_LOGS_MAX_WORKERS = int(os.getenv("APP_LOGS_MAX_WORKERS", "8"))
+
+    # following logs holds a request thread for the whole stream, only
+    # enable it on threaded workers (see scripts/start-prod.sh)
+    APP_LOG_FOLLOW_ENABLED = os.getenv(
+        "APP_LOG_FOLLOW_ENABLED", "false").lower() == "true"
+    # live log followers allowed per app and in total across all workers,
+    # and how long a follow stream lasts before the client has to reconnect
+    APP_LOG_FOLLOWERS_PER_APP = int(
+        os.getenv("APP_LOG_FOLLOWERS_PER_APP", "5"))
+    APP_LOG_FOLLOWERS_TOTAL = int(
+        os.getenv("APP_LOG_FOLLOWERS_TOTAL", "8"))
+    APP_LOG_FOLLOW_SECONDS = int(os.getenv("APP_LOG_FOLLOW_SECONDS", "200"))
+
+    # apps of a multi-app payload deployed at the same time
+    APP_DEPLOY_MAX_WORKERS = int(os.getenv("APP_DEPLOY_MAX_WORKERS", "4"))
+    # seconds the registry credentials of a queued deployment are kept for
+    DEPLOY_CREDENTIALS_SECONDS = int(
+        os.getenv("DEPLOY_CREDENTIALS_SECONDS", "86400"))
+
+    # kube calls made at a time on each cluster by bulk disable and enable
+    BULK_OPERATION_CLUSTER_CONCURRENCY = int(
+        os.getenv("BULK_OPERATION_CLUSTER_CONCURRENCY", "10"))
+
+    # seconds the admin dashboard statistics are cached for, creating,
+    # disabling and deleting users and projects clears them earlier
+    PLATFORM_STATS_CACHE_SECONDS = int(
+        os.getenv("PLATFORM_STATS_CACHE_SECONDS", "60"))
+
+    # days before today the creation rollup counts again on every refresh
+    CREATION_ROLLUP_REFRESH_DAYS = int(
+        os.getenv("CREATION_ROLLUP_REFRESH_DAYS", "2"))
+
+    # bearer token prometheus has to send to read /metrics (optional)
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
     # Docker logins (optional)
     SYSTEM_DOCKER_EMAIL = os.getenv("SYSTEM_DOCKER_EMAIL")
     SYSTEM_DOCKER_PASSWORD = os.getenv("SYSTEM_DOCKER_PASSWORD")
@@ -0,0 +1,10 @@
+# read by gunicorn from the working directory, alongside the options
+# passed in scripts/start-prod.sh
+import os
+
+
+def child_exit(server, worker):
+    # drop the live gauges of a worker that has gone away
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
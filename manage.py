@@ -1,7 +1,11 @@
+
 import click
 from flask.cli import with_appcontext
 from app.helpers.admin import create_superuser, create_default_roles
 from app.helpers.registry import add_registries
+from app.helpers.app_discovery import label_legacy_apps
+from app.helpers.creation_rollup import parse_day, refresh_creation_rollup
+from app.models.project import Project
 
 
 @click.command('admin_user',help='Create an admin user')
@@ -23,3 +27,21 @@ def create_roles():
 @with_appcontext
 def create_registries():
     add_registries()
+
+
+@click.command('label_legacy_apps',
+               help='Label the deployments of apps that predate label based discovery')
+@with_appcontext
+def label_apps():
+    labelled, unchanged, failed = label_legacy_apps(
+        Project.query.filter(Project.deleted.isnot(True)).all())
+    click.echo(f'{labelled} apps labelled, {unchanged} already labelled, {failed} failed')
+
+
+@click.command('backfill_creation_rollup',
+               help='Count the users, projects and apps created on every day again')
+@click.option('-s', '--since', default=None, help='first day to count, YYYY-MM-DD')
+@with_appcontext
+def backfill_creation_rollup(since):
+    refresh_creation_rollup(since=parse_day(since) if since else None)
+    click.echo(f'creation rollup counted since {since or "the first day"}')
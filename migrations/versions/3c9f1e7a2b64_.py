@@ -0,0 +1,32 @@
+"""empty message
+
+Revision ID: 3c9f1e7a2b64
+Revises: 701f36199305
+Create Date: 2025-03-18 09:12:31.504211
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9f1e7a2b64'
+down_revision = '701f36199305'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keep only the latest state of each app before making app unique
+    op.execute("""
+        DELETE FROM app_state older
+        USING app_state newer
+        WHERE older.app = newer.app
+        AND (COALESCE(older.last_check, 'epoch'), older.id::text)
+            < (COALESCE(newer.last_check, 'epoch'), newer.id::text)
+    """)
+    op.create_unique_constraint('app_state_app_key', 'app_state', ['app'])
+
+
+def downgrade():
+    op.drop_constraint('app_state_app_key', 'app_state', type_='unique')
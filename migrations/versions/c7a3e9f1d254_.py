@@ -0,0 +1,37 @@
+"""empty message
+
+Revision ID: c7a3e9f1d254
+Revises: b4e7c2d9a816
+Create Date: 2025-04-02 09:41:18.215637
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a3e9f1d254'
+down_revision = 'b4e7c2d9a816'
+branch_labels = None
+depends_on = None
+
+TRIGRAM_INDEXES = [
+    ('ix_project_name_trgm', 'project', 'name'),
+    ('ix_app_name_trgm', 'app', 'name'),
+    ('ix_tag_name_trgm', 'tag', 'name'),
+    ('ix_user_name_trgm', 'user', 'name'),
+    ('ix_user_email_trgm', 'user', 'email'),
+]
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(name, table, [column], unique=False,
+                        postgresql_using='gin',
+                        postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade():
+    for name, table, _ in TRIGRAM_INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,119 @@
+"""
+Compare the two ways of turning a page of users into a response body, per
+100 users dumped with UserSchema:
+
+  dumps/loads: schema.dumps, json.loads the string back, then encode the
+               response with flask-restful's json representation (the old
+               view code)
+  dump:        schema.dump once, then encode the response with the orjson
+               representation in app.helpers.json_output
+
+and, on a page already dumped, the encoding each path adds to the dump
+they both pay.
+
+Run from the repository root:
+
+    python scripts/benchmark_json_output.py [rounds]
+"""
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from flask import Flask
+from flask_restful.representations.json import output_json as restful_output_json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.helpers.json_output import output_json  # noqa: E402
+from app.schemas import UserSchema  # noqa: E402
+
+ITEMS = 100
+
+
+def make_user(index):
+    date_created = datetime(2024, 5, 1) - timedelta(days=index)
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        email=f'user{index}@cranecloud.io',
+        name=f'User {index}',
+        roles=[SimpleNamespace(id=uuid.uuid4(), name='customer')],
+        verified=index % 3 != 0,
+        date_created=date_created,
+        last_seen=date_created + timedelta(days=2),
+        is_beta_user=index % 5 == 0,
+        credits=[],
+        organisation='Crane Cloud',
+        disabled=False,
+        admin_disabled=False,
+        is_public=True,
+    )
+
+
+def response(users, pagination):
+    return dict(status='success',
+                data=dict(pagination=pagination, users=users))
+
+
+def dumps_loads_path(schema, users, pagination):
+    users_data, _ = schema.dumps(users)
+    return restful_output_json(
+        response(json.loads(users_data), pagination), 200).get_data()
+
+
+def dump_path(schema, users, pagination):
+    users_data, _ = schema.dump(users)
+    return output_json(response(users_data, pagination), 200).get_data()
+
+
+def encode_twice(users_data, pagination):
+    # what schema.dumps added over schema.dump, then the response encoding
+    users_data = json.loads(json.dumps(users_data))
+    return restful_output_json(response(users_data, pagination), 200).get_data()
+
+
+def encode_once(users_data, pagination):
+    return output_json(response(users_data, pagination), 200).get_data()
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    number = 200
+
+    schema = UserSchema(many=True)
+    users = [make_user(index) for index in range(ITEMS)]
+    pagination = dict(total=ITEMS, pages=1, page=1, per_page=ITEMS,
+                      next=None, prev=None)
+
+    app = Flask(__name__)
+    with app.app_context():
+        old = dumps_loads_path(schema, users, pagination)
+        new = dump_path(schema, users, pagination)
+        assert json.loads(old) == json.loads(new)
+        users_data, _ = schema.dump(users)
+
+        print(f'{ITEMS} users, {len(new) / 1024:.1f} KiB response, '
+              f'best of {rounds}')
+
+        results = [
+            ('dumps + loads + json', lambda: dumps_loads_path(
+                schema, users, pagination)),
+            ('dump + orjson', lambda: dump_path(schema, users, pagination)),
+            ('encode, dumps/loads path', lambda: encode_twice(
+                users_data, pagination)),
+            ('encode, dump path', lambda: encode_once(users_data, pagination)),
+        ]
+        baseline = None
+        for index, (label, run) in enumerate(results):
+            best = min(timeit.repeat(run, number=number, repeat=rounds)) / number
+            # each pair is compared with its first row
+            baseline = best if index % 2 == 0 else baseline
+            print(f'{label:<28} {best * 1000:7.2f} ms per {ITEMS} items  '
+                  f'{baseline / best:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
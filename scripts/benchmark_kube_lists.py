@@ -0,0 +1,174 @@
+"""
+Compare the two ways of turning a kubernetes list response into response
+data for the cluster views, on a generated list of 5000 pods:
+
+  model: deserialize into V1Pod objects, sanitize_for_serialization each
+         item, then json.dumps/json.loads the page (the old view code)
+  raw:   orjson.loads the response body once, optionally pruning metadata
+
+Run from the repository root:
+
+    python scripts/benchmark_kube_lists.py [pod_count] [rounds]
+"""
+import json
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+from kubernetes import client
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.helpers.kube_raw import load_raw, prune_object  # noqa: E402
+
+
+def make_pod(index):
+    name = f'app-{index}-deployment-6d4cf56db6-x{index:05d}'
+    return {
+        'metadata': {
+            'name': name,
+            'namespace': f'project-{index % 200}',
+            'uid': f'1c0d8c8e-0000-4000-8000-{index:012d}',
+            'resourceVersion': str(100000 + index),
+            'creationTimestamp': '2024-05-01T10:00:00Z',
+            'labels': {'app': f'app-{index}', 'pod-template-hash': '6d4cf56db6'},
+            'annotations': {
+                'kubectl.kubernetes.io/restartedAt': '2024-05-01T10:00:00Z',
+                'cni.projectcalico.org/podIP': f'10.1.{index % 250}.{index % 200}/32',
+            },
+            'ownerReferences': [{
+                'apiVersion': 'apps/v1', 'kind': 'ReplicaSet',
+                'name': f'app-{index}-deployment-6d4cf56db6',
+                'uid': f'2c0d8c8e-0000-4000-8000-{index:012d}',
+                'controller': True, 'blockOwnerDeletion': True,
+            }],
+            'managedFields': [{
+                'manager': 'kube-controller-manager',
+                'operation': 'Update',
+                'apiVersion': 'v1',
+                'time': '2024-05-01T10:00:00Z',
+                'fieldsType': 'FieldsV1',
+                'fieldsV1': {
+                    'f:metadata': {'f:labels': {'.': {}, 'f:app': {}}},
+                    'f:spec': {'f:containers': {f'k:{{"name":"app-{index}"}}': {
+                        '.': {}, 'f:image': {}, 'f:imagePullPolicy': {},
+                        'f:ports': {'.': {}}, 'f:resources': {}}}},
+                },
+            }, {
+                'manager': 'kubelet',
+                'operation': 'Update',
+                'apiVersion': 'v1',
+                'time': '2024-05-01T10:00:05Z',
+                'fieldsType': 'FieldsV1',
+                'fieldsV1': {'f:status': {
+                    'f:conditions': {}, 'f:containerStatuses': {},
+                    'f:hostIP': {}, 'f:phase': {}, 'f:podIP': {},
+                    'f:podIPs': {}, 'f:startTime': {}}},
+            }],
+        },
+        'spec': {
+            'containers': [{
+                'name': f'app-{index}',
+                'image': f'registry.example/app-{index}:latest',
+                'ports': [{'containerPort': 80, 'protocol': 'TCP'}],
+                'env': [{'name': 'PORT', 'value': '80'},
+                        {'name': 'DATABASE_URL', 'value': 'postgresql://db/app'}],
+                'resources': {},
+                'terminationMessagePath': '/dev/termination-log',
+                'terminationMessagePolicy': 'File',
+                'imagePullPolicy': 'Always',
+            }],
+            'restartPolicy': 'Always',
+            'terminationGracePeriodSeconds': 30,
+            'dnsPolicy': 'ClusterFirst',
+            'serviceAccountName': 'default',
+            'nodeName': f'node-{index % 12}',
+            'schedulerName': 'default-scheduler',
+            'tolerations': [{
+                'key': 'node.kubernetes.io/not-ready', 'operator': 'Exists',
+                'effect': 'NoExecute', 'tolerationSeconds': 300}],
+        },
+        'status': {
+            'phase': 'Running',
+            'conditions': [
+                {'type': 'Initialized', 'status': 'True',
+                 'lastTransitionTime': '2024-05-01T10:00:00Z'},
+                {'type': 'Ready', 'status': 'True',
+                 'lastTransitionTime': '2024-05-01T10:00:05Z'},
+                {'type': 'ContainersReady', 'status': 'True',
+                 'lastTransitionTime': '2024-05-01T10:00:05Z'},
+                {'type': 'PodScheduled', 'status': 'True',
+                 'lastTransitionTime': '2024-05-01T10:00:00Z'},
+            ],
+            'hostIP': f'192.168.0.{index % 12}',
+            'podIP': f'10.1.{index % 250}.{index % 200}',
+            'podIPs': [{'ip': f'10.1.{index % 250}.{index % 200}'}],
+            'startTime': '2024-05-01T10:00:00Z',
+            'containerStatuses': [{
+                'name': f'app-{index}',
+                'state': {'running': {'startedAt': '2024-05-01T10:00:04Z'}},
+                'ready': True,
+                'restartCount': 0,
+                'image': f'registry.example/app-{index}:latest',
+                'imageID': 'docker-pullable://registry.example/app@sha256:0',
+                'containerID': f'containerd://{index:064d}',
+                'started': True,
+            }],
+            'qosClass': 'BestEffort',
+        },
+    }
+
+
+def make_fixture(pod_count):
+    return json.dumps({
+        'kind': 'PodList',
+        'apiVersion': 'v1',
+        'metadata': {'resourceVersion': '200000'},
+        'items': [make_pod(index) for index in range(pod_count)],
+    }).encode('utf-8')
+
+
+def model_path(api_client, data):
+    pods = api_client.deserialize(
+        SimpleNamespace(data=data.decode('utf-8')), 'V1PodList')
+    items = [api_client.sanitize_for_serialization(item)
+             for item in pods.items]
+    return json.loads(json.dumps(items))
+
+
+def raw_path(data, prune):
+    items = load_raw(SimpleNamespace(data=data))['items']
+    if prune:
+        items = [prune_object(item) for item in items]
+    return items
+
+
+def main():
+    pod_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    data = make_fixture(pod_count)
+    api_client = client.ApiClient()
+
+    print(f'{pod_count} pods, {len(data) / 1024 / 1024:.1f} MiB response, '
+          f'best of {rounds}')
+
+    results = [
+        ('model + sanitize + dumps/loads',
+         lambda: model_path(api_client, data)),
+        ('raw orjson', lambda: raw_path(data, prune=False)),
+        ('raw orjson, pruned', lambda: raw_path(data, prune=True)),
+    ]
+    baseline = None
+    for label, run in results:
+        best = min(timeit.repeat(run, number=1, repeat=rounds))
+        baseline = baseline or best
+        print(f'{label:<32} {best * 1000:9.1f} ms  {baseline / best:6.1f}x')
+
+    pruned_size = len(json.dumps(raw_path(data, prune=True)))
+    print(f'pruned payload {pruned_size / 1024 / 1024:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
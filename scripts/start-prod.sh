@@ -4,6 +4,15 @@
 # apply migrations onto db
 flask db upgrade
 
+# every gunicorn worker writes its metrics here, cleared on each start
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/dev/shm/metrics}
+rm -rf $PROMETHEUS_MULTIPROC_DIR
+mkdir -p $PROMETHEUS_MULTIPROC_DIR
+
+# threaded workers, so that a request following app logs holds a thread
+# rather than a whole worker
+export APP_LOG_FOLLOW_ENABLED=${APP_LOG_FOLLOW_ENABLED:-true}
+
 # start server
-NEW_RELIC_CONFIG_FILE=newrelic.ini newrelic-admin run-program gunicorn --worker-tmp-dir /dev/shm --workers=4 --bind 0.0.0.0:5000 --timeout 240 server:app
+NEW_RELIC_CONFIG_FILE=newrelic.ini newrelic-admin run-program gunicorn --worker-tmp-dir /dev/shm --workers=4 --worker-class gthread --threads=${GUNICORN_THREADS:-8} --bind 0.0.0.0:5000 --timeout 240 server:app
 
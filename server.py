@@ -9,11 +9,14 @@ from flasgger import Swagger
 from flask_migrate import Migrate
 
 from app.routes import api
-from manage import admin_user, create_registries, create_roles
+from manage import admin_user, backfill_creation_rollup, create_registries, create_roles, label_apps
 from app.models import db, mongo
 from app.helpers.email import mail
 from app.tasks import update_celery
 from app.helpers.crane_app_logger import logger
+from app.helpers.metrics import init_metrics
+from app.helpers.platform_stats import init_platform_stats
+from app.helpers.creation_rollup import init_creation_rollup
 
 dotenv_path = join(dirname(__file__), '.env')
 load_dotenv(dotenv_path)
@@ -46,6 +49,15 @@ def create_app(config_name):
     # initialize api resources
     api.init_app(app)
 
+    # request, database and kube call metrics served at /metrics
+    init_metrics(app)
+
+    # clear the cached dashboard statistics when what they count changes
+    init_platform_stats(app)
+
+    # note the days whose verified and beta user counts change
+    init_creation_rollup(app)
+
     # initialize jwt with app
     jwt = JWTManager(app)
 
@@ -68,6 +80,8 @@ def create_app(config_name):
     app.cli.add_command(create_roles)
     app.cli.add_command(create_registries)
     app.cli.add_command(admin_user)
+    app.cli.add_command(label_apps)
+    app.cli.add_command(backfill_creation_rollup)
 
     # handle default 404 exceptions with a custom response
     @app.errorhandler(404)